@@ -0,0 +1,81 @@
+"""
+Flask app factory shared by the dev server and every Netlify function.
+
+Each function used to rebuild the app, CORS, sessions and OAuth by hand.
+create_app does it in one place and only sets up what the caller asks for,
+so a function that never starts an OAuth flow doesn't import authlib, and
+one that only reads the session doesn't import the database layer.
+"""
+
+import os
+from flask import Flask
+from flask_cors import CORS
+from utils.http_metrics import init_http_metrics
+from utils.tracing import init_tracing
+from utils.responses import init_responses
+from utils.sessions import configure_sessions
+
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
+IS_PRODUCTION = (os.getenv('FLASK_ENV') == 'production' or os.getenv('ENV') == 'production'
+                 or os.getenv('NETLIFY') == 'true')
+IS_DEVELOPMENT = os.getenv('FLASK_ENV') == 'development' or os.getenv('ENV') == 'development'
+# Load testing only: POST /api/test/login mints sessions for synthetic users
+TEST_AUTH_MODE = os.getenv('TEST_AUTH_MODE', 'false').lower() == 'true'
+if TEST_AUTH_MODE and IS_PRODUCTION:
+    raise ValueError("TEST_AUTH_MODE must not be enabled in production")
+
+CORS_ALLOW_HEADERS = ['Content-Type', 'Authorization', 'If-None-Match', 'traceparent']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'Retry-After', 'ETag', 'traceresponse']
+
+
+def _secret_key():
+    """FLASK_SECRET_KEY, with a fixed fallback only in development."""
+    secret_key = os.getenv('FLASK_SECRET_KEY')
+    if secret_key:
+        return secret_key
+    if IS_DEVELOPMENT:
+        print("WARNING: Using default secret key. Set FLASK_SECRET_KEY in production!")
+        return 'dev-secret-key-change-in-production'
+    raise ValueError("FLASK_SECRET_KEY environment variable is required in production")
+
+
+def allowed_origins():
+    """CORS origins: the frontend, plus the Vite dev server outside production."""
+    origins = [FRONTEND_URL]
+    if not IS_PRODUCTION:
+        origins.extend(['http://localhost:5173', 'http://127.0.0.1:5173'])
+    return origins
+
+
+def create_app(routes=(), sessions=False, oauth=False, import_name=None):
+    """
+    Build a configured Flask app.
+
+    routes: blueprints to register.
+    sessions: install signed-token sessions (needs FLASK_SECRET_KEY).
+    oauth: also register the Google OAuth client (implies sessions).
+    """
+    app = Flask(import_name or __name__)
+    init_http_metrics(app)
+    init_tracing(app)
+    init_responses(app)
+
+    if sessions or oauth:
+        app.config['SECRET_KEY'] = _secret_key()
+        # Stateless token sessions, also carry OAuth state between login and callback
+        configure_sessions(app, secure=IS_PRODUCTION)
+
+    # CORS - must allow credentials and specific origin
+    CORS(app,
+         supports_credentials=True,
+         origins=allowed_origins(),
+         allow_headers=CORS_ALLOW_HEADERS,
+         expose_headers=CORS_EXPOSE_HEADERS)
+
+    if oauth:
+        from utils.auth import init_auth  # Imports authlib
+        init_auth(app)
+
+    for blueprint in routes:
+        app.register_blueprint(blueprint)
+    return app
@@ -6,29 +6,54 @@ Frontend polls this endpoint for real-time updates.
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from utils.db import get_payment, get_recent_payments
+from utils.db import get_payment, get_recent_payments, get_payments_version
+from utils.etags import (
+    payment_etags, user_versions, payment_etag, payments_list_etag,
+    etag_matches, not_modified, json_with_etag
+)
+from utils.responses import init_responses
 
 app = Flask(__name__)
+init_responses(app)
 CORS(app)
 
 
 @app.route('/api/check_status/<payment_id>', methods=['GET'])
 def check_status(payment_id):
+    if_none_match = request.headers.get('If-None-Match')
+    
+    cached = payment_etags.get(payment_id)
+    if cached and etag_matches(if_none_match, cached[1]):
+        return not_modified(cached[1])
+    
     payment = get_payment(payment_id)
     
     if not payment:
         return jsonify({'error': 'Payment not found'}), 404
     
-    return jsonify(payment), 200
+    etag = payment_etag(payment)
+    payment_etags.set(payment_id, (payment['user_id'], etag))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    return json_with_etag(payment, etag)
 
 
 @app.route('/api/recent_payments', methods=['GET'])
 def recent_payments():
     """Get recent payment history."""
     limit = request.args.get('limit', 50, type=int)
-    payments = get_recent_payments(limit)
     
-    return jsonify({'payments': payments}), 200
+    version = user_versions.get(None)
+    if version is None:
+        version = get_payments_version()
+        user_versions.set(None, version)
+    etag = payments_list_etag(None, version, limit)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return not_modified(etag)
+    
+    payments = get_recent_payments(limit)
+    return json_with_etag({'payments': payments}, etag)
 
 
 if __name__ == '__main__':
@@ -8,7 +8,7 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import uuid
 from utils.db import create_payment
-from utils.chain_config import get_all_chains
+from utils.chain_config import get_registry
 
 app = Flask(__name__)
 CORS(app)
@@ -23,12 +23,11 @@ def create_payment_handler():
     if not all(field in data for field in required):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    # Validate chains
-    if data['source_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid source chain'}), 400
-    
-    if data['dest_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid destination chain'}), 400
+    # Validate chains and route
+    try:
+        get_registry().check_route(data['source_chain'], data['dest_chain'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Generate unique payment ID
     payment_id = str(uuid.uuid4())
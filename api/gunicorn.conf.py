@@ -0,0 +1,75 @@
+"""
+gunicorn configuration for the gateway (see wsgi.py).
+
+    cd api && gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings come from the environment:
+
+    WEB_CONCURRENCY       worker processes (default: 2 x CPUs + 1, max 8)
+    GUNICORN_THREADS      threads per worker for the gthread class (default 4)
+    GUNICORN_WORKER_CLASS gthread (default) or gevent
+    GEVENT_CONNECTIONS    concurrent requests per gevent worker (default 256)
+    PORT / GUNICORN_BIND  listen address (default 0.0.0.0:8000)
+
+gevent mode turns the blocking RPC, Iris and SSE waits into cooperative
+greenlets, so one worker can hold hundreds of slow requests open without an
+OS thread each. It needs `pip install gevent` (and psycogreen for
+PostgreSQL, otherwise psycopg2 calls block the whole worker).
+
+In gthread mode every open /api/payments/<id>/events stream holds one of the
+WEB_CONCURRENCY x GUNICORN_THREADS threads, so SSE_MAX_DURATION defaults to
+30s there (EventSource reconnects on its own). Size GUNICORN_THREADS for the
+trackers expected open at once plus normal traffic, or use gevent.
+"""
+
+import multiprocessing
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app (and its sockets, threads and SSL) is imported,
+    # since preload_app imports it in the master
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+else:
+    # Read by server.py at import (preload_app), so it must be set before that
+    os.environ.setdefault('SSE_MAX_DURATION', '30')
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GEVENT_CONNECTIONS', '256'))
+
+# Import the app once in the master; workers fork with the code already loaded
+preload_app = True
+# SSE streams stay open up to SSE_MAX_DURATION; the timeout only catches hung workers
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+# Heartbeat files on tmpfs avoid disk stalls freezing workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Each worker needs its own DB connections, not the master's
+    from wsgi import after_fork
+    after_fork()
+
+
+def post_worker_init(worker):
+    from wsgi import start_background_services
+    start_background_services()
+
+
+def worker_exit(server, worker):
+    from wsgi import stop_background_services
+    stop_background_services()
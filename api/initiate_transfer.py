@@ -6,40 +6,14 @@ This is called after user approves transaction in their wallet.
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from utils.cctp_handler import CCTPHandler
-from utils.db import get_payment, update_payment
-import threading
+from utils.db import get_payment
+from utils.transfer_pool import PoolFull
+from utils.transfers import submit_transfer
 
 app = Flask(__name__)
 CORS(app)
 
 
-def process_transfer_async(payment_id, burn_tx_hash, source_chain, dest_chain):
-    """
-    Background task to fetch attestation and complete transfer.
-    Runs in separate thread to avoid blocking API response.
-    """
-    try:
-        handler = CCTPHandler(source_chain, dest_chain)
-        
-        # Wait for burn confirmation
-        update_payment(payment_id, status='burning', burn_tx_hash=burn_tx_hash)
-        
-        # Fetch attestation from Circle
-        update_payment(payment_id, status='fetching_attestation')
-        attestation = handler.fetch_attestation(burn_tx_hash)
-        
-        # Mark as ready for minting
-        update_payment(
-            payment_id, 
-            status='ready_to_mint',
-            metadata=str(attestation)
-        )
-        
-    except Exception as e:
-        update_payment(payment_id, status='failed', metadata=str(e))
-
-
 @app.route('/api/initiate_transfer', methods=['POST'])
 def initiate_transfer():
     data = request.json
@@ -52,20 +26,22 @@ def initiate_transfer():
     if not payment:
         return jsonify({'error': 'Payment not found'}), 404
     
-    # Start background processing
-    thread = threading.Thread(
-        target=process_transfer_async,
-        args=(
+    # Enqueue a durable transfer job; standalone workers (python -m api.worker) run it
+    try:
+        job_id = submit_transfer(
             data['payment_id'],
             data['burn_tx_hash'],
             payment['source_chain'],
             payment['dest_chain']
         )
-    )
-    thread.start()
+    except PoolFull as e:
+        return jsonify({'error': 'Too many transfers in progress. Please retry later.'}), 429, {
+            'Retry-After': str(e.retry_after)
+        }
     
     return jsonify({
         'status': 'processing',
+        'job_id': job_id,
         'message': 'Transfer initiated. Poll /api/check_status for updates.'
     }), 202
 
@@ -12,7 +12,10 @@ from dotenv import load_dotenv
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from utils.db import SessionLocal, User, Payment, init_db, create_user, create_payment, update_payment
+from utils.db import (
+    SessionLocal, User, Payment, init_db, create_user, create_payment, update_payment,
+    rebuild_volume_rollups
+)
 
 load_dotenv()
 
@@ -174,6 +177,9 @@ def seed_demo_data():
             
             created_count += 1
         
+        # Timestamps and statuses above were written directly, so recompute rollups
+        rebuild_volume_rollups()
+        
         print(f"✅ Created {created_count} demo transactions")
         print(f"\n📊 Demo Data Summary:")
         print(f"   - User: {demo_email}")
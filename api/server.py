@@ -4,86 +4,62 @@ Combines all API endpoints with OAuth2, audit trails, and production features.
 """
 
 import os
-from flask import Flask, request, jsonify, session, redirect
-from flask_cors import CORS
-from flask_session import Session
+from flask import request, jsonify, session, redirect, Response
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 import uuid
-import threading
+import json
+import queue
+import time
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+# Load environment variables before utils read their settings
+load_dotenv()
+
+from app_factory import create_app, FRONTEND_URL, TEST_AUTH_MODE
 from utils.db import (
     create_payment, get_payment, update_payment, get_recent_payments,
-    log_audit, get_user_by_id
+    get_payments_by_ids, get_payments_version, log_audit, get_user_by_id,
+    upsert_user_and_log_login, get_user_id_by_email, get_stage_timing_stats, get_payment_volume,
+    create_webhook_endpoint, get_webhook_endpoints, delete_webhook_endpoint,
+    get_webhook_deliveries, retry_webhook_delivery
+)
+from utils.chain_config import get_registry
+from utils.auth import login_required, admin_required, get_current_user, get_google, login_userinfo
+from utils.transfer_pool import PoolFull
+from utils.transfers import submit_transfer, start_embedded_worker
+from utils.metrics import render_prometheus, scrape_allowed, PROMETHEUS_CONTENT_TYPE
+from utils.rate_limit import rate_limit_key, RATE_LIMIT_STORAGE_URI, RATE_LIMIT_STRATEGY
+from utils.events import payment_events, STREAM_END_STATUSES
+from utils.stage_timing import STAGE_STATS_DEFAULT_HOURS, STAGE_STATS_MAX_HOURS
+from utils.analytics import parse_volume_query
+from utils.webhooks import (
+    parse_endpoint_request, generate_secret, start_embedded_dispatcher, WEBHOOK_MAX_ENDPOINTS
+)
+from utils.etags import (
+    payment_etags, user_versions, payment_etag, payments_list_etag,
+    etag_matches, not_modified, json_with_etag, parse_batch_status_request
 )
-from utils.chain_config import get_all_chains
-from utils.cctp_handler import CCTPHandler
-from utils.auth import init_auth, login_required, get_current_user, handle_google_callback
-
-# Load environment variables
-load_dotenv()
 
-app = Flask(__name__)
+# Server-Sent Events: keepalive/DB re-check interval and max stream lifetime
+SSE_HEARTBEAT = int(os.getenv('SSE_HEARTBEAT', '15'))
+SSE_MAX_DURATION = int(os.getenv('SSE_MAX_DURATION', '300'))
+# Synthetic users minted by /api/test/login must use this email domain
+TEST_AUTH_EMAIL_DOMAIN = '@loadtest.invalid'
 
-# SECURITY: Require SECRET_KEY in production
-FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY')
-if not FLASK_SECRET_KEY:
-    if os.getenv('FLASK_ENV') == 'development' or os.getenv('ENV') == 'development':
-        FLASK_SECRET_KEY = 'dev-secret-key-change-in-production'
-        print("WARNING: Using default secret key. Set FLASK_SECRET_KEY in production!")
-    else:
-        raise ValueError("FLASK_SECRET_KEY environment variable is required in production")
-app.config['SECRET_KEY'] = FLASK_SECRET_KEY
-
-# Determine if we're in production
-IS_PRODUCTION = os.getenv('FLASK_ENV') == 'production' or os.getenv('ENV') == 'production' or os.getenv('NETLIFY') == 'true'
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-
-# Session configuration - critical for OAuth state management
-# Use 'null' session type for serverless (stateless), 'filesystem' for local dev
-if IS_PRODUCTION:
-    # In serverless/Netlify, we need to use signed cookies or external session store
-    # For now, use filesystem with proper path, but consider Redis/Memcached for production
-    app.config['SESSION_TYPE'] = 'filesystem'
-else:
-    app.config['SESSION_TYPE'] = 'filesystem'
-
-app.config['SESSION_PERMANENT'] = True
-app.config['SESSION_COOKIE_NAME'] = 'usdc_gateway_session'
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = IS_PRODUCTION  # True in production (HTTPS required)
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_PATH'] = '/'
-app.config['SESSION_COOKIE_DOMAIN'] = None  # Let Flask handle domain automatically
-
-# CORS - must allow credentials and specific origin
-# In production, use FRONTEND_URL from environment
-allowed_origins = [FRONTEND_URL]
-if not IS_PRODUCTION:
-    # Allow localhost for development
-    allowed_origins.extend(['http://localhost:5173', 'http://127.0.0.1:5173'])
-
-CORS(app, 
-     supports_credentials=True, 
-     origins=allowed_origins,
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
-
-# Initialize session AFTER CORS
-Session(app)
-
-# Initialize OAuth (must be done before importing google)
-oauth = init_auth(app)
-from utils.auth import google
+# Sessions, CORS, fast JSON/compression and Google OAuth (see app_factory)
+app = create_app(oauth=True, import_name=__name__)
 
 # Rate limiting - configured for 100+ transactions/hour capacity
 # Default: 200 per day, 150 per hour (allows for bursts above 100/hr)
+# Counters live in shared storage (SQLite file by default) so every worker
+# process enforces the same limit; signed-in users are keyed per account
 limiter = Limiter(
     app=app,
-    key_func=get_remote_address,
+    key_func=rate_limit_key,
     default_limits=["200 per day", "150 per hour"],
-    storage_uri="memory://"
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY
 )
 
 
@@ -98,6 +74,16 @@ def health_check():
     }), 200
 
 
+@app.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    """Prometheus-style metrics for this process (bearer METRICS_TOKEN, or loopback when unset)."""
+    allowed, status, error = scrape_allowed(request.headers.get('Authorization'), request.remote_addr)
+    if not allowed:
+        return jsonify({'error': error}), status
+    return Response(render_prometheus(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+
 # OAuth2 Routes
 @app.route('/api/auth/login', methods=['GET'])
 def login():
@@ -120,7 +106,7 @@ def login():
     # OAuth redirect URI must match exactly what's in Google Cloud Console
     callback_url = request.url_root.rstrip('/') + '/api/auth/callback'
     # Use authorize_redirect with explicit state handling
-    return google.authorize_redirect(callback_url)
+    return get_google().authorize_redirect(callback_url)
 
 
 @app.route('/api/auth/callback', methods=['GET'])
@@ -136,20 +122,14 @@ def auth_callback():
         # 1. Get the state from the callback URL params
         # 2. Get the stored state from the session
         # 3. Compare them - if they don't match, raise MismatchingStateError
+        google = get_google()
         token = google.authorize_access_token()
         
         if not token:
             return jsonify({'error': 'Failed to get access token from Google'}), 400
         
-        # Get user info from Google - use full URL
-        # Google's userinfo endpoint
-        userinfo_url = 'https://www.googleapis.com/oauth2/v2/userinfo'
-        resp = google.get(userinfo_url, token=token)
-        
-        if resp.status_code != 200:
-            return jsonify({'error': f'Failed to get user info: {resp.status_code}'}), 400
-        
-        user_info = resp.json()
+        # Claims from the id_token, validated locally against the cached JWKS
+        user_info = login_userinfo(google, token)
         
         if not user_info or not user_info.get('email'):
             return jsonify({'error': 'Email not provided by Google'}), 400
@@ -159,19 +139,16 @@ def auth_callback():
         picture = user_info.get('picture')
         sub = user_info.get('sub')
         
-        # Get or create user
-        from utils.db import get_user_by_email, create_user
-        user = get_user_by_email(email)
-        if not user:
-            user_id = create_user(
-                email=email,
-                name=name,
-                picture=picture,
-                oauth_provider='google',
-                oauth_id=sub
-            )
-        else:
-            user_id = user['user_id']
+        # Create or refresh the user and audit the login in one transaction
+        user_id, _ = upsert_user_and_log_login(
+            email=email,
+            name=name,
+            picture=picture,
+            oauth_provider='google',
+            oauth_id=sub,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
         
         # Set session data - CRITICAL: Must set before redirect
         session['user_id'] = user_id
@@ -194,16 +171,6 @@ def auth_callback():
         except:
             pass
         
-        # Log login
-        log_audit(
-            user_id=user_id,
-            action='login',
-            resource_type='user',
-            resource_id=user_id,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
-        
         # Get redirect URI from session (set during login)
         redirect_uri = session.pop('oauth_redirect_uri', FRONTEND_URL)
         if redirect_uri.startswith('/'):
@@ -271,6 +238,32 @@ def get_me():
     return get_user()
 
 
+if TEST_AUTH_MODE:
+    # Never registered in production (app_factory refuses to start)
+    @app.route('/api/test/login', methods=['POST'])
+    @limiter.exempt
+    def test_login():
+        """Sign in a synthetic load-test user without OAuth."""
+        data = request.get_json(silent=True) or {}
+        email = (data.get('email') or '').strip().lower()
+        if not email.endswith(TEST_AUTH_EMAIL_DOMAIN) or len(email) <= len(TEST_AUTH_EMAIL_DOMAIN):
+            return jsonify({'error': f'email must end with {TEST_AUTH_EMAIL_DOMAIN}'}), 400
+        
+        user_id, _ = upsert_user_and_log_login(
+            email=email,
+            name=data.get('name') or email.split('@')[0],
+            oauth_provider='test',
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+        session['user_id'] = user_id
+        session['email'] = email
+        session['name'] = data.get('name') or email.split('@')[0]
+        session['picture'] = None
+        session.permanent = True
+        return jsonify(get_current_user()), 200
+
+
 # Protected Payment Routes
 @app.route('/api/create_payment', methods=['POST'])
 @limiter.limit("30 per minute")  # Increased for 100+ tx/hour capacity
@@ -285,12 +278,11 @@ def create_payment_handler():
     if not all(field in data for field in required):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    # Validate chains
-    if data['source_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid source chain'}), 400
-    
-    if data['dest_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid destination chain'}), 400
+    # Validate chains and route
+    try:
+        get_registry().check_route(data['source_chain'], data['dest_chain'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Generate unique payment ID
     payment_id = str(uuid.uuid4())
@@ -323,33 +315,6 @@ def create_payment_handler():
         return jsonify({'error': str(e)}), 500
 
 
-def process_transfer_async(payment_id, burn_tx_hash, source_chain, dest_chain, user_id=None):
-    """
-    Background task to fetch attestation and complete transfer.
-    Runs in separate thread to avoid blocking API response.
-    """
-    try:
-        handler = CCTPHandler(source_chain, dest_chain)
-        
-        # Wait for burn confirmation
-        update_payment(payment_id, user_id=user_id, status='burning', burn_tx_hash=burn_tx_hash)
-        
-        # Fetch attestation from Circle
-        update_payment(payment_id, user_id=user_id, status='fetching_attestation')
-        attestation = handler.fetch_attestation(burn_tx_hash)
-        
-        # Mark as ready for minting
-        update_payment(
-            payment_id,
-            user_id=user_id,
-            status='ready_to_mint',
-            metadata=str(attestation)
-        )
-        
-    except Exception as e:
-        update_payment(payment_id, user_id=user_id, status='failed', metadata=str(e))
-
-
 @app.route('/api/initiate_transfer', methods=['POST'])
 @limiter.limit("60 per minute")  # Increased for 100+ tx/hour capacity
 @login_required
@@ -369,21 +334,23 @@ def initiate_transfer():
     if payment.get('user_id') != user['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    # Start background processing
-    thread = threading.Thread(
-        target=process_transfer_async,
-        args=(
+    # Enqueue a durable transfer job; workers pick it up from the database
+    try:
+        job_id = submit_transfer(
             data['payment_id'],
             data['burn_tx_hash'],
             payment['source_chain'],
             payment['dest_chain'],
             user['user_id']
         )
-    )
-    thread.start()
+    except PoolFull as e:
+        return jsonify({'error': 'Too many transfers in progress. Please retry later.'}), 429, {
+            'Retry-After': str(e.retry_after)
+        }
     
     return jsonify({
         'status': 'processing',
+        'job_id': job_id,
         'message': 'Transfer initiated. Poll /api/check_status for updates.'
     }), 202
 
@@ -391,40 +358,237 @@ def initiate_transfer():
 @app.route('/api/check_status/<payment_id>', methods=['GET'])
 @login_required
 def check_status(payment_id):
-    """Returns current payment status."""
+    """Returns current payment status. Supports If-None-Match (304)."""
+    user = get_current_user()
+    if_none_match = request.headers.get('If-None-Match')
+    
+    # Unchanged since the client's last poll: answer from the version cache
+    cached = payment_etags.get(payment_id)
+    if cached and cached[0] == user['user_id'] and etag_matches(if_none_match, cached[1]):
+        return not_modified(cached[1])
+    
+    payment = get_payment(payment_id)
+    
+    if not payment:
+        return jsonify({'error': 'Payment not found'}), 404
+    
+    # Verify ownership
+    if payment.get('user_id') != user['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    etag = payment_etag(payment)
+    payment_etags.set(payment_id, (payment['user_id'], etag))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    return json_with_etag(payment, etag)
+
+
+@app.route('/api/check_status', methods=['POST'])
+@login_required
+def check_status_batch():
+    """
+    Returns statuses for many payments in one query.
+    
+    Body: {"payment_ids": [...], "since": "<as_of from a previous call>"}.
+    Only the caller's payments are returned, keyed by payment_id; with
+    `since`, only those updated after it. Pass the returned `as_of` as the
+    next `since` to fetch just the changes.
+    """
+    user = get_current_user()
+    try:
+        payment_ids, since = parse_batch_status_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Taken before the query so an update racing with it is returned next time
+    as_of = datetime.utcnow().isoformat()
+    payments = get_payments_by_ids(payment_ids, user_id=user['user_id'], since=since)
+    
+    return jsonify({
+        'payments': {p['payment_id']: p for p in payments},
+        'as_of': as_of
+    }), 200
+
+
+@app.route('/api/payments/<payment_id>/events', methods=['GET'])
+@login_required
+def payment_events_stream(payment_id):
+    """
+    Server-Sent Events stream of status transitions for one payment.
+    
+    Pushes an initial snapshot, then every update published by update_payment.
+    Each heartbeat re-reads the payment, so updates made by other processes
+    (standalone workers, the sweeper) still arrive. Sends 'end' and closes
+    once the backend is done with the payment (ready_to_mint, completed or
+    failed); otherwise closes after SSE_MAX_DURATION and lets the
+    browser's EventSource reconnect.
+    """
     user = get_current_user()
+    
+    # Subscribe before the snapshot so no transition can slip in between
+    updates = payment_events.subscribe(payment_id)
     payment = get_payment(payment_id)
     
     if not payment:
+        payment_events.unsubscribe(payment_id, updates)
         return jsonify({'error': 'Payment not found'}), 404
     
     # Verify ownership
     if payment.get('user_id') != user['user_id']:
+        payment_events.unsubscribe(payment_id, updates)
         return jsonify({'error': 'Unauthorized'}), 403
     
-    return jsonify(payment), 200
+    def stream(current):
+        try:
+            yield f"event: status\ndata: {json.dumps(current)}\n\n"
+            deadline = time.monotonic() + SSE_MAX_DURATION
+            while current['status'] not in STREAM_END_STATUSES and time.monotonic() < deadline:
+                try:
+                    latest = updates.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    latest = get_payment(payment_id)
+                    if latest and latest['updated_at'] == current['updated_at']:
+                        yield ": keepalive\n\n"
+                        continue
+                if latest:
+                    current = latest
+                    yield f"event: status\ndata: {json.dumps(current)}\n\n"
+            if current['status'] in STREAM_END_STATUSES:
+                yield "event: end\ndata: {}\n\n"
+        finally:
+            payment_events.unsubscribe(payment_id, updates)
+    
+    return Response(stream(payment), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let proxies buffer the stream
+    })
 
 
 @app.route('/api/recent_payments', methods=['GET'])
 @login_required
 def recent_payments():
-    """Get recent payment history for current user."""
+    """Get recent payment history for current user. Supports If-None-Match (304)."""
     user = get_current_user()
     limit = request.args.get('limit', 50, type=int)
     demo_mode = request.args.get('demo', 'false').lower() == 'true'
     
     # If demo mode, get demo user's payments
+    target_user_id = user['user_id']
     if demo_mode:
-        from utils.db import get_user_by_email
-        demo_user = get_user_by_email('demo@usdcgateway.com')
-        if demo_user:
-            payments = get_recent_payments(limit=limit, user_id=demo_user['user_id'])
-        else:
-            payments = []
-    else:
-        payments = get_recent_payments(limit=limit, user_id=user['user_id'])
+        target_user_id = get_user_id_by_email('demo@usdcgateway.com')
+        if not target_user_id:
+            return jsonify({'payments': []}), 200
     
-    return jsonify({'payments': payments}), 200
+    # (count, latest updated_at) changes whenever any listed payment does
+    version = user_versions.get(target_user_id)
+    if version is None:
+        version = get_payments_version(target_user_id)
+        user_versions.set(target_user_id, version)
+    etag = payments_list_etag(target_user_id, version, limit)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return not_modified(etag)
+    
+    payments = get_recent_payments(limit=limit, user_id=target_user_id)
+    return json_with_etag({'payments': payments}, etag)
+
+
+@app.route('/api/analytics/stages', methods=['GET'])
+@admin_required
+def stage_timing_stats():
+    """Time-in-stage stats per (source_chain, dest_chain) over the last `hours`."""
+    hours = request.args.get('hours', STAGE_STATS_DEFAULT_HOURS, type=int)
+    if not hours or hours < 1 or hours > STAGE_STATS_MAX_HOURS:
+        return jsonify({'error': f'hours must be between 1 and {STAGE_STATS_MAX_HOURS}'}), 400
+    
+    since = datetime.utcnow() - timedelta(hours=hours)
+    stats = get_stage_timing_stats(
+        since,
+        source_chain=request.args.get('source_chain'),
+        dest_chain=request.args.get('dest_chain')
+    )
+    return jsonify({'stages': stats, 'since': since.isoformat(), 'hours': hours}), 200
+
+
+@app.route('/api/analytics/volume', methods=['GET'])
+@admin_required
+def payment_volume():
+    """Payment count and USD volume from the hourly rollups (admins only)."""
+    try:
+        start, end, group_by = parse_volume_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows = get_payment_volume(start, end, group_by)
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'group_by': group_by,
+        'rows': rows,
+        'totals': {
+            'payment_count': sum(r['payment_count'] for r in rows),
+            'volume_usd': round(sum(r['volume_usd'] for r in rows), 2)
+        }
+    }), 200
+
+
+@app.route('/api/webhooks', methods=['POST'])
+@limiter.limit("10 per minute")
+@login_required
+def create_webhook():
+    """Register a webhook endpoint. The signing secret is only returned here."""
+    user = get_current_user()
+    try:
+        url, events = parse_endpoint_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(get_webhook_endpoints(user['user_id'])) >= WEBHOOK_MAX_ENDPOINTS:
+        return jsonify({'error': f'At most {WEBHOOK_MAX_ENDPOINTS} webhook endpoints per account'}), 409
+    
+    endpoint = create_webhook_endpoint(user['user_id'], url, generate_secret(), events)
+    return jsonify(endpoint), 201
+
+
+@app.route('/api/webhooks', methods=['GET'])
+@login_required
+def list_webhooks():
+    """The current user's webhook endpoints (without secrets)."""
+    user = get_current_user()
+    return jsonify({'webhooks': get_webhook_endpoints(user['user_id'])}), 200
+
+
+@app.route('/api/webhooks/<endpoint_id>', methods=['DELETE'])
+@login_required
+def delete_webhook(endpoint_id):
+    """Remove an endpoint and its queued deliveries."""
+    user = get_current_user()
+    if not delete_webhook_endpoint(endpoint_id, user['user_id']):
+        return jsonify({'error': 'Webhook not found'}), 404
+    return jsonify({'deleted': endpoint_id}), 200
+
+
+@app.route('/api/webhooks/<endpoint_id>/deliveries', methods=['GET'])
+@login_required
+def list_webhook_deliveries(endpoint_id):
+    """Recent deliveries for an endpoint, optionally filtered by status (e.g. ?status=dead)."""
+    user = get_current_user()
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    deliveries = get_webhook_deliveries(endpoint_id, user['user_id'],
+                                        status=request.args.get('status'), limit=limit)
+    if deliveries is None:
+        return jsonify({'error': 'Webhook not found'}), 404
+    return jsonify({'deliveries': deliveries}), 200
+
+
+@app.route('/api/webhooks/<endpoint_id>/deliveries/<int:delivery_id>/retry', methods=['POST'])
+@login_required
+def retry_webhook(endpoint_id, delivery_id):
+    """Requeue a dead-lettered delivery."""
+    user = get_current_user()
+    if not retry_webhook_delivery(delivery_id, endpoint_id, user['user_id']):
+        return jsonify({'error': 'No dead delivery with that id for this webhook'}), 404
+    return jsonify({'delivery_id': delivery_id, 'status': 'pending'}), 202
 
 
 @app.route('/api/audit_logs', methods=['GET'])
@@ -441,4 +605,9 @@ def get_audit_logs():
 
 
 if __name__ == '__main__':
+    # Process transfer jobs and webhooks in this server unless standalone workers
+    # are used. Only the reloader child serves requests, so skip the file-watcher parent.
+    if os.getenv('EMBEDDED_TRANSFER_WORKER', 'true').lower() == 'true' and os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        start_embedded_worker()
+        start_embedded_dispatcher()
     app.run(debug=True, port=5001)
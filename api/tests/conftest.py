@@ -0,0 +1,27 @@
+"""
+Shared test setup: utils read their settings at import, so the environment
+points at a throwaway SQLite file before anything imports them.
+"""
+
+import os
+import sys
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix='usdc-gateway-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'payments.db')
+os.environ['RATE_LIMIT_STORAGE_URI'] = 'sqlite:///' + os.path.join(TEST_DIR, 'ratelimit.db')
+os.environ.setdefault('FLASK_ENV', 'development')
+os.environ.setdefault('SESSION_MODE', 'token')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """utils.db on freshly created tables."""
+    from utils import db as db_module
+    db_module.Base.metadata.drop_all(bind=db_module.engine)
+    db_module.init_db()
+    return db_module
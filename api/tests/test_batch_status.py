@@ -0,0 +1,36 @@
+"""
+parse_batch_status_request: the body validation shared by the dev server
+and the Netlify check_status function.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from utils.etags import BATCH_STATUS_MAX_IDS, parse_batch_status_request
+
+
+def test_valid_body_dedupes_ids_and_parses_since():
+    payment_ids, since = parse_batch_status_request({
+        'payment_ids': ['pay-1', 'pay-2', 'pay-1'], 'since': '2026-01-02T03:04:05.123456'
+    })
+    assert sorted(payment_ids) == ['pay-1', 'pay-2']
+    assert since == datetime(2026, 1, 2, 3, 4, 5, 123456)
+
+
+def test_since_is_optional():
+    assert parse_batch_status_request({'payment_ids': []}) == ([], None)
+
+
+@pytest.mark.parametrize('data, error', [
+    (None, 'payment_ids must be a list of strings'),
+    ([], 'payment_ids must be a list of strings'),
+    ({'payment_ids': 'pay-1'}, 'payment_ids must be a list of strings'),
+    ({'payment_ids': ['pay-1', 2]}, 'payment_ids must be a list of strings'),
+    ({'payment_ids': ['pay'] * (BATCH_STATUS_MAX_IDS + 1)}, f'At most {BATCH_STATUS_MAX_IDS} payment_ids'),
+    ({'payment_ids': [], 'since': 'yesterday'}, 'since must be an ISO 8601 timestamp'),
+    ({'payment_ids': [], 'since': 12345}, 'since must be an ISO 8601 timestamp'),
+])
+def test_invalid_bodies(data, error):
+    with pytest.raises(ValueError, match=error):
+        parse_batch_status_request(data)
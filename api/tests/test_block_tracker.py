@@ -0,0 +1,95 @@
+"""
+BlockHeadTracker resolves hashes that never emit a CCTP log: a reverted burn
+and a burn whose first receipt lookup hit an RPC error.
+
+    python -m pytest -q api/tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from web3.exceptions import TransactionNotFound  # noqa: E402
+from utils import block_tracker  # noqa: E402
+from utils.block_tracker import BlockHeadTracker  # noqa: E402
+
+TX_HASH = '0x' + 'ab' * 32
+
+
+class FakeEth:
+    def __init__(self, receipts):
+        self.block_number = 100
+        self.receipts = list(receipts)  # Answers for successive receipt lookups
+        self.receipt_calls = 0
+
+    def get_transaction_receipt(self, tx_hash):
+        self.receipt_calls += 1
+        answer = self.receipts.pop(0) if len(self.receipts) > 1 else self.receipts[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def get_logs(self, query):
+        return []  # Reverted burns emit no MessageSent
+
+
+class FakeWeb3:
+    def __init__(self, receipts):
+        self.eth = FakeEth(receipts)
+
+
+class ManualTracker(BlockHeadTracker):
+    """Tracker without the background thread; tests call poll_once themselves."""
+
+    def _ensure_running(self):
+        pass
+
+
+def reverted_receipt(block_number=101):
+    return {'status': 0, 'blockNumber': block_number, 'logs': []}
+
+
+def advance(tracker, blocks):
+    for _ in range(blocks):
+        tracker.web3.eth.block_number += 1
+        tracker.poll_once()
+
+
+def test_reverted_burn_resolves_on_first_lookup():
+    tracker = ManualTracker('sepolia', web3=FakeWeb3([reverted_receipt()]))
+    watch = tracker.track(TX_HASH)
+    assert watch.status() == {'confirmed': True, 'success': False, 'block_number': 101}
+    assert tracker.pending_count() == 0
+
+
+def test_reverted_burn_mined_later_resolves_through_recheck():
+    web3 = FakeWeb3([TransactionNotFound('not mined'), reverted_receipt(102)])
+    tracker = ManualTracker('sepolia', web3=web3)
+    watch = tracker.track(TX_HASH)
+    assert watch.status()['confirmed'] is False
+
+    tracker.poll_once()  # Follower starts at the head
+    advance(tracker, block_tracker.RECEIPT_RECHECK_BLOCKS)
+    assert watch.status() == {'confirmed': True, 'success': False, 'block_number': 102}
+    assert tracker.pending_count() == 0
+
+
+def test_transient_rpc_error_is_retried():
+    web3 = FakeWeb3([ConnectionError('rpc down'), reverted_receipt()])
+    tracker = ManualTracker('sepolia', web3=web3, poll_interval=0)
+    watch = tracker.track(TX_HASH)
+    assert watch.status()['confirmed'] is False
+
+    # A repeat track() of a pending hash looks the receipt up again
+    assert tracker.track(TX_HASH) is watch
+    assert web3.eth.receipt_calls == 2
+    assert watch.status()['confirmed'] is True
+
+
+def test_repeat_track_is_throttled_by_poll_interval():
+    web3 = FakeWeb3([TransactionNotFound('not mined')])
+    tracker = ManualTracker('sepolia', web3=web3, poll_interval=60)
+    tracker.track(TX_HASH)
+    tracker.track(TX_HASH)
+    assert web3.eth.receipt_calls == 1
@@ -0,0 +1,82 @@
+"""
+SQLiteStorage under the limits fixed-window and moving-window strategies,
+on a clock the tests move by hand.
+"""
+
+import os
+
+import pytest
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+from conftest import TEST_DIR
+from utils import rate_limit
+from utils.rate_limit import SQLiteStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def storage(clock):
+    storage = SQLiteStorage('sqlite:///' + os.path.join(TEST_DIR, 'limits.db'))
+    storage.reset()
+    return storage
+
+
+def test_fixed_window_blocks_until_the_window_ends(storage, clock):
+    limiter = FixedWindowRateLimiter(storage)
+    item = parse('3/minute')
+
+    assert [limiter.hit(item, 'ip:1') for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(item, 'ip:2')  # Separate key, separate counter
+    assert storage.get(item.key_for('ip:1')) == 4  # limits counts the rejected hit too
+
+    clock.now += 61
+    assert limiter.hit(item, 'ip:1')
+    assert storage.get(item.key_for('ip:1')) == 1
+
+
+def test_fixed_window_elastic_expiry_extends_the_window(storage, clock):
+    storage.incr('key', 60)
+    clock.now += 50
+    storage.incr('key', 60, elastic_expiry=True)
+    clock.now += 20
+    assert storage.incr('key', 60) == 3
+
+
+def test_moving_window_frees_slots_as_entries_age_out(storage, clock):
+    limiter = MovingWindowRateLimiter(storage)
+    item = parse('2/minute')
+
+    assert limiter.hit(item, 'ip:1')
+    clock.now += 30
+    assert limiter.hit(item, 'ip:1')
+    assert not limiter.hit(item, 'ip:1')
+
+    clock.now += 31  # The first hit is now over a minute old; the second is not
+    assert limiter.hit(item, 'ip:1')
+    assert not limiter.hit(item, 'ip:1')
+
+
+def test_clear_and_reset(storage):
+    storage.incr('fixed', 60)
+    storage.acquire_entry('moving', 5, 60)
+
+    storage.clear('fixed')
+    assert storage.get('fixed') == 0
+    assert storage.get_moving_window('moving', 5, 60)[1] == 1
+    assert storage.reset() == 1
+    assert storage.get_moving_window('moving', 5, 60)[1] == 0
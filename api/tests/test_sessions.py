@@ -0,0 +1,107 @@
+"""
+TokenSessionInterface: tokens expire after their TTL, tampered tokens are
+rejected, and a token past half its lifetime is reissued.
+"""
+
+import pytest
+from cryptography.fernet import Fernet
+from flask import Flask, session
+
+from utils import sessions
+from utils.sessions import SESSION_COOKIE_NAME, TokenSessionInterface, configure_sessions
+
+TTL = 3600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions, 'time', clock)
+    return clock
+
+
+def make_app(encryption_key=None):
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    configure_sessions(app)
+    app.session_interface = TokenSessionInterface(ttl=TTL, encryption_key=encryption_key)
+
+    @app.route('/login')
+    def login():
+        session['user_id'] = 'user-1'
+        return 'ok'
+
+    @app.route('/me')
+    def me():
+        return session.get('user_id') or 'anonymous'
+
+    return app
+
+
+@pytest.fixture(params=[None, Fernet.generate_key().decode()], ids=['signed', 'encrypted'])
+def client(request, clock):
+    return make_app(request.param).test_client()
+
+
+def cookie(client):
+    found = client.get_cookie(SESSION_COOKIE_NAME)
+    return found.value if found else None
+
+
+def test_login_round_trips(client):
+    client.get('/login')
+    assert cookie(client)
+    assert client.get('/me').text == 'user-1'
+
+
+def test_token_expires_after_ttl(client, clock):
+    client.get('/login')
+    clock.now += TTL + 1
+    assert client.get('/me').text == 'anonymous'
+
+
+def test_tampered_token_is_rejected(client):
+    client.get('/login')
+    token = cookie(client)
+    tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+    client.set_cookie(SESSION_COOKIE_NAME, tampered)
+    assert client.get('/me').text == 'anonymous'
+
+
+def test_token_from_another_secret_is_rejected(clock):
+    client = make_app().test_client()
+    client.get('/login')
+    other = make_app()
+    other.secret_key = 'other-secret'
+    other_client = other.test_client()
+    other_client.set_cookie(SESSION_COOKIE_NAME, cookie(client))
+    assert other_client.get('/me').text == 'anonymous'
+
+
+def test_fresh_token_is_not_reissued(client, clock):
+    client.get('/login')
+    clock.now += TTL / 4
+    response = client.get('/me')
+    assert response.text == 'user-1'
+    assert 'Set-Cookie' not in response.headers
+
+
+def test_sliding_refresh_past_half_lifetime(client, clock):
+    client.get('/login')
+    first = cookie(client)
+    clock.now += TTL * 3 / 4
+    response = client.get('/me')
+    assert 'Set-Cookie' in response.headers
+    assert cookie(client) != first
+
+    # The reissued token is good for a full TTL from the refresh
+    clock.now += TTL * 3 / 4
+    assert client.get('/me').text == 'user-1'
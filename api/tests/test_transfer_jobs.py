@@ -0,0 +1,117 @@
+"""
+Durable transfer queue: claiming, lease renewal, reaping and the
+retry / dead / lost outcomes of fail_transfer_job.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import update
+
+BURN_TX = '0x' + 'cd' * 32
+
+
+def enqueue(db, payment_id='pay-1', max_attempts=3):
+    db.create_payment(payment_id, 10, 'sepolia', 'base_sepolia', '0xsender', '0xrecipient', user_id='user-1')
+    return db.enqueue_transfer_job(payment_id, BURN_TX, 'sepolia', 'base_sepolia',
+                                   user_id='user-1', max_attempts=max_attempts)
+
+
+def expire_lease(db, job_id):
+    session = db.SessionLocal()
+    try:
+        session.execute(update(db.TransferJob).where(db.TransferJob.job_id == job_id)
+                        .values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+    finally:
+        session.close()
+
+
+def make_due(db, job_id):
+    session = db.SessionLocal()
+    try:
+        session.execute(update(db.TransferJob).where(db.TransferJob.job_id == job_id)
+                        .values(run_after=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+    finally:
+        session.close()
+
+
+def get_job(db, job_id):
+    session = db.SessionLocal()
+    try:
+        return db._job_to_dict(session.get(db.TransferJob, job_id))
+    finally:
+        session.close()
+
+
+def test_claim_leases_each_job_once(db):
+    job_id = enqueue(db)
+
+    claimed = db.claim_transfer_jobs('worker-a', limit=5)
+    assert [job['job_id'] for job in claimed] == [job_id]
+    assert claimed[0]['status'] == 'running'
+    assert claimed[0]['attempts'] == 1
+    assert db.claim_transfer_jobs('worker-b', limit=5) == []
+
+
+def test_expired_lease_is_reclaimed_and_renewal_prevents_it(db):
+    job_id = enqueue(db)
+    db.claim_transfer_jobs('worker-a')
+
+    assert db.renew_transfer_job_leases('worker-b', [job_id]) == 0  # Not worker-b's job
+    expire_lease(db, job_id)
+    assert db.renew_transfer_job_leases('worker-a', [job_id]) == 1
+    assert db.claim_transfer_jobs('worker-b') == []
+
+    expire_lease(db, job_id)
+    claimed = db.claim_transfer_jobs('worker-b')
+    assert [job['job_id'] for job in claimed] == [job_id]
+    assert claimed[0]['attempts'] == 2
+
+
+def test_fail_retries_with_backoff_then_dead_letters(db):
+    job_id = enqueue(db, max_attempts=2)
+
+    db.claim_transfer_jobs('worker-a')
+    assert db.fail_transfer_job(job_id, 'worker-a', 'rpc timeout') == 'retry'
+    job = get_job(db, job_id)
+    assert job['status'] == 'queued'
+    assert job['run_after'] > datetime.utcnow()
+    assert db.claim_transfer_jobs('worker-a') == []  # Still backing off
+
+    make_due(db, job_id)
+    db.claim_transfer_jobs('worker-a')
+    assert db.fail_transfer_job(job_id, 'worker-a', 'rpc timeout') == 'dead'
+    assert get_job(db, job_id)['status'] == 'dead'
+
+
+def test_permanent_failure_dead_letters_at_once(db):
+    job_id = enqueue(db, max_attempts=5)
+    db.claim_transfer_jobs('worker-a')
+
+    assert db.fail_transfer_job(job_id, 'worker-a', 'burn reverted', permanent=True) == 'dead'
+    assert get_job(db, job_id)['last_error'] == 'burn reverted'
+
+
+def test_fail_after_losing_the_lease_is_lost(db):
+    job_id = enqueue(db)
+    db.claim_transfer_jobs('worker-a')
+    expire_lease(db, job_id)
+    db.claim_transfer_jobs('worker-b')
+
+    assert db.fail_transfer_job(job_id, 'worker-a', 'late failure') == 'lost'
+    job = get_job(db, job_id)
+    assert job['status'] == 'running'
+    assert job['last_error'] is None
+
+
+def test_reaper_dead_letters_only_final_attempts(db):
+    final = enqueue(db, 'pay-final', max_attempts=1)
+    retryable = enqueue(db, 'pay-retryable', max_attempts=3)
+    db.claim_transfer_jobs('worker-a', limit=2)
+    expire_lease(db, final)
+    expire_lease(db, retryable)
+
+    reaped = db.reap_expired_transfer_jobs()
+    assert [job['job_id'] for job in reaped] == [final]
+    assert get_job(db, final)['status'] == 'dead'
+    assert get_job(db, retryable)['status'] == 'running'  # Left for another worker to claim
@@ -0,0 +1,58 @@
+"""
+Hourly volume rollups maintained by create_payment/update_payment match a
+full rebuild from the payments table.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+STATUSES = ('burning', 'fetching_attestation', 'ready_to_mint', 'completed')
+GROUP_BY = ('hour', 'source_chain', 'dest_chain', 'status')
+
+
+def volume(db):
+    now = datetime.utcnow()
+    return db.get_payment_volume(now - timedelta(days=1), now + timedelta(hours=1), GROUP_BY)
+
+
+def test_incremental_rollups_match_rebuild(db):
+    db.create_payment('pay-1', 10, 'sepolia', 'base_sepolia', '0xa', '0xb')
+    db.create_payment('pay-2', 25.5, 'sepolia', 'base_sepolia', '0xa', '0xb')
+    db.create_payment('pay-3', 4, 'base_sepolia', 'arbitrum_sepolia', '0xa', '0xb')
+    for status in STATUSES:
+        db.update_payment('pay-1', status=status)
+    db.update_payment('pay-2', status='burning')
+    db.update_payment('pay-2', status='failed')
+    db.update_payment('pay-3', burn_tx_hash='0x01')  # Not a status change
+
+    incremental = volume(db)
+    by_status = {row['status']: row for row in incremental}
+    assert by_status['completed']['volume_usd'] == 10
+    assert by_status['failed']['payment_count'] == 1
+    assert by_status['pending']['payment_count'] == 1
+    assert 'burning' not in by_status  # Moved on; its row nets to zero
+
+    db.rebuild_volume_rollups()
+    assert volume(db) == incremental
+
+
+def test_concurrent_updates_keep_rollups_exact(db):
+    payment_ids = [f'pay-{i}' for i in range(8)]
+    for payment_id in payment_ids:
+        db.create_payment(payment_id, 1, 'sepolia', 'base_sepolia', '0xa', '0xb')
+
+    def advance(payment_id):
+        for status in STATUSES:
+            db.update_payment(payment_id, status=status)
+
+    # Two threads race through the same transitions on every payment
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(advance, payment_ids * 2))
+
+    incremental = volume(db)
+    assert incremental == [{
+        'hour': incremental[0]['hour'], 'source_chain': 'sepolia', 'dest_chain': 'base_sepolia',
+        'status': 'completed', 'payment_count': 8, 'volume_usd': 8
+    }]
+    db.rebuild_volume_rollups()
+    assert volume(db) == incremental
@@ -0,0 +1,75 @@
+"""
+Webhook outbox coalescing and request signing.
+"""
+
+import json
+import time
+
+from utils.webhooks import sign, verify_signature
+
+SECRET = 'whsec_test'
+
+
+def setup_endpoint(db, events=None):
+    db.create_payment('pay-1', 10, 'sepolia', 'base_sepolia', '0xa', '0xb', user_id='user-1')
+    return db.create_webhook_endpoint('user-1', 'https://example.com/hook', SECRET, events)['endpoint_id']
+
+
+def deliveries(db, endpoint_id, status=None):
+    return db.get_webhook_deliveries(endpoint_id, 'user-1', status=status)
+
+
+def claimed_payloads(claimed):
+    return [json.loads(delivery['payload']) for delivery in claimed]
+
+
+def test_transitions_coalesce_into_the_pending_delivery(db):
+    endpoint_id = setup_endpoint(db)
+    for status in ('burning', 'fetching_attestation', 'ready_to_mint'):
+        db.update_payment('pay-1', status=status)
+    db.update_payment('pay-1', burn_tx_hash='0x01')  # No transition, no event
+
+    assert len(deliveries(db, endpoint_id)) == 1
+    payload, = claimed_payloads(db.claim_webhook_deliveries('worker-a'))
+    assert payload['status'] == 'ready_to_mint'
+    assert payload['version'] == 4
+
+
+def test_delivery_in_flight_is_not_overwritten(db):
+    endpoint_id = setup_endpoint(db)
+    db.update_payment('pay-1', status='burning')
+    in_flight, = db.claim_webhook_deliveries('worker-a')
+
+    db.update_payment('pay-1', status='fetching_attestation')
+    db.update_payment('pay-1', status='ready_to_mint')
+    assert len(deliveries(db, endpoint_id, status='sending')) == 1
+    assert len(deliveries(db, endpoint_id, status='pending')) == 1
+
+    db.complete_webhook_deliveries([in_flight['delivery_id']], 'worker-a')
+    assert json.loads(in_flight['payload'])['status'] == 'burning'
+    payload, = claimed_payloads(db.claim_webhook_deliveries('worker-b'))
+    assert payload['status'] == 'ready_to_mint'
+
+
+def test_endpoint_event_filter(db):
+    endpoint_id = setup_endpoint(db, events=['completed'])
+    db.update_payment('pay-1', status='burning')
+    assert deliveries(db, endpoint_id) == []
+    db.update_payment('pay-1', status='completed')
+    assert len(deliveries(db, endpoint_id)) == 1
+
+
+def test_signature_round_trip():
+    body = b'{"events":[]}'
+    header = sign(SECRET, body)
+    assert verify_signature(SECRET, body, header)
+    assert not verify_signature('whsec_other', body, header)
+    assert not verify_signature(SECRET, body + b' ', header)
+
+
+def test_signature_rejects_stale_and_malformed_headers():
+    body = b'{"events":[]}'
+    assert not verify_signature(SECRET, body, sign(SECRET, body, timestamp=time.time() - 301))
+    assert verify_signature(SECRET, body, sign(SECRET, body, timestamp=time.time() - 60))
+    for header in (None, '', 'v1=abc', 't=soon,v1=abc', 'garbage'):
+        assert not verify_signature(SECRET, body, header)
@@ -0,0 +1,43 @@
+"""
+Request parsing for the analytics endpoints, shared by the dev server and
+the analytics Netlify function.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+VOLUME_DEFAULT_HOURS = 24
+VOLUME_MAX_DAYS = int(os.getenv('VOLUME_MAX_DAYS', '366'))
+VOLUME_GROUP_FIELDS = ('hour', 'day', 'source_chain', 'dest_chain', 'status')
+
+
+def _parse_time(value, name):
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO 8601 timestamp')
+    if parsed.tzinfo is not None:
+        # Rollups are bucketed in naive UTC
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+def parse_volume_query(args):
+    """
+    (start, end, group_by) from ?from=&to=&group_by=a,b. Defaults to the
+    last 24 hours grouped by hour. Raises ValueError with a message for the client.
+    """
+    end = _parse_time(args['to'], 'to') if args.get('to') else datetime.utcnow()
+    start = _parse_time(args['from'], 'from') if args.get('from') else end - timedelta(hours=VOLUME_DEFAULT_HOURS)
+    if start >= end:
+        raise ValueError('from must be before to')
+    if end - start > timedelta(days=VOLUME_MAX_DAYS):
+        raise ValueError(f'Range cannot exceed {VOLUME_MAX_DAYS} days')
+
+    group_by = [g.strip() for g in (args.get('group_by') or 'hour').split(',') if g.strip()]
+    unknown = [g for g in group_by if g not in VOLUME_GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown group_by {', '.join(unknown)}; use {', '.join(VOLUME_GROUP_FIELDS)}")
+    if 'hour' in group_by and 'day' in group_by:
+        raise ValueError('group_by can include hour or day, not both')
+    return start, end, group_by
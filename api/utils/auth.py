@@ -2,49 +2,108 @@
 OAuth2 authentication module using Google OAuth.
 
 Handles user authentication, session management, and protected routes.
+authlib and the database layer are imported lazily, so routes that only
+check the session (login_required, get_current_user) never load them.
 """
 
 import os
+import threading
 from functools import wraps
-from flask import session, redirect, url_for, request, jsonify
-from authlib.integrations.flask_client import OAuth
-from .db import get_user_by_email, create_user
-
-# Initialize OAuth
-oauth = OAuth()
-
-# Google OAuth configuration
-# Note: authlib automatically handles state for CSRF protection
-# The state is stored in the session by default
-google = oauth.register(
-    name='google',
-    client_id=os.getenv('GOOGLE_CLIENT_ID'),
-    client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
+from flask import session, request, jsonify
+
+# Comma-separated emails allowed to read cross-user analytics
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv('ADMIN_EMAILS', '').split(',') if e.strip()}
+
+_oauth = None
+_google = None
+_oauth_lock = threading.Lock()
+
+
+def _get_oauth():
+    """Create the OAuth registry and Google client on first use."""
+    global _oauth, _google
+    with _oauth_lock:
+        if _oauth is None:
+            from authlib.integrations.flask_client import OAuth
+            oauth = OAuth()
+            # Google OAuth configuration
+            # Note: authlib automatically handles state for CSRF protection
+            # The state is stored in the session by default
+            _google = oauth.register(
+                name='google',
+                client_id=os.getenv('GOOGLE_CLIENT_ID'),
+                client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
+                server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+                client_kwargs={
+                    'scope': 'openid email profile'
+                }
+            )
+            _oauth = oauth
+    return _oauth
+
+
+def get_google():
+    """The registered Google OAuth client, seeded with cached OIDC metadata and keys."""
+    _get_oauth()
+    from .oidc import prime_client
+    return prime_client(_google)
+
+
+def login_userinfo(google, token):
+    """
+    User claims for a completed login. authorize_access_token() has already
+    validated the id_token against the cached JWKS and put its claims in
+    token['userinfo'], so normally no further request is needed; the
+    userinfo endpoint is only a fallback for tokens without an id_token.
+    """
+    from .oidc import remember_client_keys
+    remember_client_keys(google)
+    userinfo = token.get('userinfo')
+    if not userinfo or not userinfo.get('email'):
+        userinfo = google.userinfo(token=token)
+    return userinfo
+
+
+def __getattr__(name):
+    # `from utils.auth import google` still works; it just triggers the lazy setup
+    if name == 'oauth':
+        return _get_oauth()
+    if name == 'google':
+        return get_google()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_auth(app):
     """Initialize OAuth with Flask app."""
+    oauth = _get_oauth()
     oauth.init_app(app)
     return oauth
 
 
 def login_required(f):
-    """Decorator to protect routes that require authentication."""
+    """Decorator to protect routes that require authentication (in-memory session check)."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Authentication required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_required(f):
+    """Decorator for routes limited to ADMIN_EMAILS (session check only)."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return jsonify({'error': 'Authentication required'}), 401
+        if (session.get('email') or '').lower() not in ADMIN_EMAILS:
+            return jsonify({'error': 'Admin access required'}), 403
         return f(*args, **kwargs)
     return decorated_function
 
 
 def get_current_user():
-    """Get current logged-in user from session."""
+    """Get current logged-in user from the session token - no DB or disk access."""
     if 'user_id' not in session:
         return None
     return {
@@ -57,14 +116,12 @@ def get_current_user():
 
 def handle_google_callback():
     """Handle Google OAuth callback and create/login user."""
-    from flask import request
+    from .db import upsert_user_and_log_login
+    google = get_google()
     try:
         token = google.authorize_access_token()
-        # Get user info from Google - use full URL
-        # Google's userinfo endpoint
-        userinfo_url = 'https://www.googleapis.com/oauth2/v2/userinfo'
-        resp = google.get(userinfo_url, token=token)
-        user_info = resp.json()
+        # Claims from the locally validated id_token
+        user_info = login_userinfo(google, token)
         
         if not user_info:
             return None, 'Failed to get user info'
@@ -77,19 +134,16 @@ def handle_google_callback():
         if not email:
             return None, 'Email not provided by Google'
         
-        # Get or create user
-        user = get_user_by_email(email)
-        if not user:
-            # Create new user
-            user_id = create_user(
-                email=email,
-                name=name,
-                picture=picture,
-                oauth_provider='google',
-                oauth_id=sub
-            )
-        else:
-            user_id = user['user_id']
+        # Create or refresh the user and audit the login in one transaction
+        user_id, _ = upsert_user_and_log_login(
+            email=email,
+            name=name,
+            picture=picture,
+            oauth_provider='google',
+            oauth_id=sub,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
         
         # Set session
         session['user_id'] = user_id
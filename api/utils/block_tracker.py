@@ -0,0 +1,334 @@
+"""
+Shared per-chain block-head tracker for confirmation monitoring.
+
+One background follower per chain polls eth_blockNumber and, once per new
+block range, fetches MessageSent and MintAndWithdraw logs from the configured
+CCTP contracts. Every pending burn and mint hash we track is matched against
+those logs, so confirmation detection costs O(blocks) instead of
+O(pending transactions x polls). Hashes that never emit a CCTP log (reverted
+burns, or a first receipt lookup that hit an RPC error) are re-checked by
+receipt every BLOCK_RECEIPT_RECHECK blocks.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from eth_abi import decode
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from .chain_config import get_chain_config, get_registry
+
+# Event signatures emitted by the CCTP contracts
+# MessageSent(bytes) - MessageTransmitter on the source chain
+# MintAndWithdraw(address,uint256,address) - TokenMessenger on the destination chain
+MESSAGE_SENT_TOPIC = Web3.keccak(text="MessageSent(bytes)").hex()
+MINT_AND_WITHDRAW_TOPIC = Web3.keccak(text="MintAndWithdraw(address,uint256,address)").hex()
+
+POLL_INTERVAL = float(os.getenv('BLOCK_POLL_INTERVAL', '3'))
+MAX_BLOCK_RANGE = int(os.getenv('BLOCK_LOG_RANGE', '500'))  # Most RPCs cap eth_getLogs ranges
+WATCH_TTL = int(os.getenv('BLOCK_WATCH_TTL', '3600'))  # Drop hashes that never land
+RECEIPT_RECHECK_BLOCKS = int(os.getenv('BLOCK_RECEIPT_RECHECK', '5'))  # Blocks between receipt re-checks
+MAX_RESOLVED = 10000  # Resolved hashes kept for repeat status lookups
+# Config fields a tracker is built from; a hot reload that changes one replaces the tracker
+TRACKER_FIELDS = ('rpc_url', 'message_transmitter', 'token_messenger')
+
+
+def normalize_hash(tx_hash):
+    """Normalize a tx hash (str/bytes/HexBytes) to lowercase 0x-prefixed hex."""
+    if isinstance(tx_hash, (bytes, bytearray)):
+        tx_hash = Web3.to_hex(tx_hash)
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith('0x') else '0x' + tx_hash
+
+
+def decode_message_sent(data):
+    """
+    Decode MessageSent(bytes) log data into the raw CCTP message.
+    Returns (message_bytes, message_hash).
+    """
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+    message_bytes = decode(['bytes'], bytes(data))[0]
+    return message_bytes, Web3.keccak(message_bytes).hex()
+
+
+def message_domains(message_bytes):
+    """(source_domain, destination_domain) from a CCTP message header (uint32 version first)."""
+    if len(message_bytes) < 12:
+        return None, None
+    return int.from_bytes(message_bytes[4:8], 'big'), int.from_bytes(message_bytes[8:12], 'big')
+
+
+class Watch:
+    """Handle for one tracked transaction hash."""
+
+    def __init__(self, tx_hash, kind):
+        self.tx_hash = tx_hash
+        self.kind = kind  # 'burn' or 'mint'
+        self.created_at = time.time()
+        self.checked_at = 0.0  # Last receipt lookup
+        self.result = None
+        self._event = threading.Event()
+
+    def resolve(self, result):
+        self.result = result
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """Block until the transaction is seen on-chain. Returns result dict."""
+        if not self._event.wait(timeout):
+            raise TimeoutError(f"Transaction {self.tx_hash} not seen within {timeout}s")
+        return self.result
+
+    def status(self):
+        """Non-blocking status in the same shape as CCTPHandler.get_tx_status."""
+        if self.result is None:
+            return {'confirmed': False, 'success': False}
+        return {
+            'confirmed': True,
+            'success': self.result['success'],
+            'block_number': self.result['block_number']
+        }
+
+
+class BlockHeadTracker:
+    """Follows the block head of one chain and matches CCTP logs to watched hashes."""
+
+    def __init__(self, chain_name, web3=None, poll_interval=POLL_INTERVAL):
+        self.chain_name = chain_name
+        self.config = get_chain_config(chain_name)
+        self.web3 = web3 or Web3(Web3.HTTPProvider(self.config["rpc_url"]))
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pending = {}  # tx_hash -> Watch
+        self._resolved = OrderedDict()  # tx_hash -> Watch (bounded)
+        self._last_block = None
+        self._last_recheck = None  # Block of the last receipt re-check pass
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    # Public API
+    def track(self, tx_hash, kind='burn'):
+        """
+        Start tracking a hash and return its Watch.
+
+        Registers the hash before a single receipt lookup, so a transaction
+        mined before the follower reached its block is never missed.
+        Resolved hashes are answered from memory; a pending one gets its
+        receipt looked up again at most once per poll interval.
+        """
+        tx_hash = normalize_hash(tx_hash)
+        with self._lock:
+            watch = self._resolved.get(tx_hash)
+            if watch:
+                return watch
+            watch = self._pending.get(tx_hash)
+            if watch is None:
+                watch = Watch(tx_hash, kind)
+                self._pending[tx_hash] = watch
+            elif time.time() - watch.checked_at < self.poll_interval:
+                return watch
+
+        self._ensure_running()
+        self._check_receipt(watch)
+        return watch
+
+    def wait(self, tx_hash, kind='burn', timeout=120):
+        """Block until the hash is seen on-chain; raises TimeoutError."""
+        return self.track(tx_hash, kind).wait(timeout)
+
+    def lookup(self, tx_hash):
+        """Return the Watch for a hash if it is tracked, else None (no RPC)."""
+        tx_hash = normalize_hash(tx_hash)
+        with self._lock:
+            return self._resolved.get(tx_hash) or self._pending.get(tx_hash)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def adopt(self, other):
+        """Take over another tracker's watches (its config was replaced)."""
+        with other._lock:
+            pending = dict(other._pending)
+            resolved = OrderedDict(other._resolved)
+        with self._lock:
+            self._pending.update(pending)
+            self._resolved.update(resolved)
+        if pending:
+            self._ensure_running()
+
+    # Internals
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._wakeup.set()
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f'block-tracker-{self.chain_name}',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Log error but keep following the chain
+                print(f"[BLOCKS] {self.chain_name} poll failed: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def poll_once(self):
+        """Advance to the current head and match logs. Returns blocks scanned."""
+        self._expire_stale()
+        with self._lock:
+            idle = not self._pending
+        if idle:
+            # Nothing to match - restart from the head when work arrives.
+            # Hashes mined meanwhile are caught by the receipt check in track().
+            self._last_block = None
+            self._last_recheck = None
+            return 0
+
+        head = self.web3.eth.block_number
+        if self._last_block is None:
+            self._last_block = head - 1
+        if head <= self._last_block:
+            return 0
+
+        from_block = self._last_block + 1
+        to_block = min(head, from_block + MAX_BLOCK_RANGE - 1)
+        logs = self.web3.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': [
+                Web3.to_checksum_address(self.config["message_transmitter"]),
+                Web3.to_checksum_address(self.config["token_messenger"])
+            ],
+            'topics': [[MESSAGE_SENT_TOPIC, MINT_AND_WITHDRAW_TOPIC]]
+        })
+        self._match_logs(logs)
+        self._last_block = to_block
+
+        if self._last_recheck is None:
+            self._last_recheck = to_block
+        elif to_block - self._last_recheck >= RECEIPT_RECHECK_BLOCKS:
+            self._last_recheck = to_block
+            self._recheck_pending()
+        return to_block - from_block + 1
+
+    def _recheck_pending(self):
+        """Look up receipts for hashes the logs did not resolve."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for watch in pending:
+            if self._stop.is_set():
+                return
+            self._check_receipt(watch)
+
+    def _match_logs(self, logs):
+        for log in logs:
+            tx_hash = normalize_hash(log['transactionHash'])
+            with self._lock:
+                watch = self._pending.get(tx_hash)
+            if not watch:
+                continue
+            result = self._result_from_logs([log], log['blockNumber'], success=True)
+            if result:
+                self._resolve(watch, result)
+
+    def _check_receipt(self, watch):
+        watch.checked_at = time.time()
+        try:
+            receipt = self.web3.eth.get_transaction_receipt(watch.tx_hash)
+        except TransactionNotFound:
+            return  # Not mined yet - the follower will pick it up
+        except Exception as e:
+            # Transient RPC failure - stays pending and is re-checked later
+            print(f"[BLOCKS] {self.chain_name} receipt lookup for {watch.tx_hash} failed: {e}")
+            return
+        result = self._result_from_logs(
+            receipt['logs'], receipt['blockNumber'], success=receipt['status'] == 1
+        )
+        if result is None:
+            # Mined without a CCTP event (e.g. reverted) - still a final answer
+            result = {'success': receipt['status'] == 1, 'block_number': receipt['blockNumber']}
+        self._resolve(watch, result)
+
+    def _result_from_logs(self, logs, block_number, success):
+        """Build a match result from CCTP logs, or None if none are present."""
+        transmitter = self.config["message_transmitter"].lower()
+        messenger = self.config["token_messenger"].lower()
+        for log in logs:
+            if not log['topics']:
+                continue
+            address = log['address'].lower()
+            topic = normalize_hash(log['topics'][0])
+            if address == transmitter and topic == MESSAGE_SENT_TOPIC:
+                message_bytes, message_hash = decode_message_sent(log['data'])
+                _, dest_domain = message_domains(message_bytes)
+                return {
+                    'success': success,
+                    'block_number': block_number,
+                    'event': 'MessageSent',
+                    'message': Web3.to_hex(message_bytes),
+                    'message_hash': message_hash,
+                    'dest_domain': dest_domain,
+                    'dest_chain': get_registry().by_domain(dest_domain)
+                }
+            if address == messenger and topic == MINT_AND_WITHDRAW_TOPIC:
+                return {
+                    'success': success,
+                    'block_number': block_number,
+                    'event': 'MintAndWithdraw'
+                }
+        return None
+
+    def _resolve(self, watch, result):
+        with self._lock:
+            self._pending.pop(watch.tx_hash, None)
+            self._resolved[watch.tx_hash] = watch
+            while len(self._resolved) > MAX_RESOLVED:
+                self._resolved.popitem(last=False)
+        watch.resolve(result)
+
+    def _expire_stale(self):
+        cutoff = time.time() - WATCH_TTL
+        with self._lock:
+            stale = [h for h, w in self._pending.items() if w.created_at < cutoff]
+            for tx_hash in stale:
+                del self._pending[tx_hash]
+
+
+# One tracker per chain, shared by every handler in the process
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(chain_name):
+    """
+    Get (or create) the shared tracker for a chain. If the chain's RPC URL or
+    contracts changed in a registry reload, the tracker is rebuilt and takes
+    over the old one's watches.
+    """
+    config = get_chain_config(chain_name)
+    with _trackers_lock:
+        tracker = _trackers.get(chain_name)
+        if tracker is None or any(tracker.config.get(f) != config.get(f) for f in TRACKER_FIELDS):
+            replacement = BlockHeadTracker(chain_name)
+            if tracker is not None:
+                print(f"[BLOCKS] {chain_name} config changed, restarting its tracker")
+                tracker.stop()
+                replacement.adopt(tracker)
+            tracker = _trackers[chain_name] = replacement
+        return tracker
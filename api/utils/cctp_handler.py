@@ -10,6 +10,11 @@ import requests
 from web3 import Web3
 from eth_account import Account
 from .chain_config import get_chain_config
+from .block_tracker import get_tracker
+from . import tracing
+
+# Iris base URL override, e.g. a local stand-in (load_test/fake_chain.py)
+CIRCLE_IRIS_URL = os.getenv('CIRCLE_IRIS_URL')
 
 # ABI snippets for USDC and CCTP contracts
 USDC_ABI = [
@@ -61,14 +66,21 @@ class CCTPHandler:
     """Manages cross-chain USDC transfers via Circle's CCTP."""
     
     def __init__(self, source_chain, dest_chain):
+        self.source_chain = source_chain
+        self.dest_chain = dest_chain
         self.source_config = get_chain_config(source_chain)
         self.dest_config = get_chain_config(dest_chain)
         self.source_web3 = Web3(Web3.HTTPProvider(self.source_config["rpc_url"]))
         self.dest_web3 = Web3(Web3.HTTPProvider(self.dest_config["rpc_url"]))
+        if tracing.ENABLED:
+            self.source_web3.middleware_onion.add(tracing.web3_middleware(source_chain), 'tracing')
+            self.dest_web3.middleware_onion.add(tracing.web3_middleware(dest_chain), 'tracing')
         
         # Use production API if key is provided, otherwise use sandbox
         self.CIRCLE_API_KEY = os.getenv('CIRCLE_API_KEY')
-        if self.CIRCLE_API_KEY:
+        if CIRCLE_IRIS_URL:
+            self.ATTESTATION_API = f"{CIRCLE_IRIS_URL.rstrip('/')}/v1/attestations"
+        elif self.CIRCLE_API_KEY:
             self.ATTESTATION_API = "https://iris-api.circle.com/v1/attestations"
         else:
             self.ATTESTATION_API = "https://iris-api-sandbox.circle.com/v1/attestations"
@@ -138,7 +150,18 @@ class CCTPHandler:
         
         return burn_hash.hex()
     
-    def fetch_attestation(self, burn_tx_hash, max_wait=300):
+    def wait_for_burn(self, burn_tx_hash, timeout=120):
+        """
+        Block until the burn is mined and return its CCTP message hash.
+        Raises TimeoutError if unseen within timeout, ValueError if it reverted.
+        """
+        # Wait for the burn via the shared block-head tracker; its MessageSent
+        # log carries the message we need, so no per-transaction receipt polling
+        with tracing.span('burn.wait', root=False, **{'chain': self.source_chain, 'tx.hash': burn_tx_hash}):
+            burn = get_tracker(self.source_chain).wait(burn_tx_hash, kind='burn', timeout=timeout)
+        return self._message_hash_from_burn(burn_tx_hash, burn)
+    
+    def fetch_attestation(self, burn_tx_hash, max_wait=300, message_hash=None):
         """
         Step 2: Poll Circle's API for attestation signature.
         This proves the burn happened and allows minting on destination.
@@ -146,29 +169,83 @@ class CCTPHandler:
         Note: The message hash can be extracted from the MessageSent event
         emitted by the MessageTransmitter contract. The event signature is:
         keccak256("MessageSent(bytes)")
+        Pass message_hash when the burn has already been waited for.
+        """
+        if not message_hash:
+            message_hash = self.wait_for_burn(burn_tx_hash)
+        
+        # Poll Circle API for attestation
+        start_time = time.time()
+        while time.time() - start_time < max_wait:
+            try:
+                attestation = self.check_attestation(message_hash)
+                if attestation:
+                    return attestation
+            except requests.exceptions.RequestException as e:
+                # Log error but continue polling
+                print(f"Error fetching attestation: {e}")
+            
+            time.sleep(3)  # Wait 3 seconds before retry
+        
+        raise TimeoutError("Attestation not available within timeout period")
+    
+    def get_burn_message_hash(self, burn_tx_hash):
+        """
+        Non-blocking variant of the burn wait in fetch_attestation.
+        Returns the CCTP message hash once the burn is mined, or None if it isn't yet.
         """
-        # Get transaction receipt to extract message hash
-        receipt = self.source_web3.eth.wait_for_transaction_receipt(burn_tx_hash, timeout=120)
+        watch = get_tracker(self.source_chain).track(burn_tx_hash, kind='burn')
+        if watch.result is None:
+            return None
+        return self._message_hash_from_burn(burn_tx_hash, watch.result)
+    
+    def check_attestation(self, message_hash):
+        """
+        Query Circle's API once. Returns the attestation dict when complete,
+        None while pending. Raises ValueError on an error status.
+        """
+        with tracing.span('iris.attestation', kind='client', root=False,
+                          **{'http.method': 'GET', 'message.hash': message_hash}) as span:
+            response = requests.get(
+                f"{self.ATTESTATION_API}/{message_hash}",
+                headers=self._attestation_headers(),
+                timeout=10
+            )
+            span.set_attribute('http.status_code', response.status_code)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('status') == 'complete':
+                return {
+                    'attestation': data['attestation'],
+                    'message': data['message'],
+                    'message_hash': message_hash
+                }
+            elif data.get('status') != 'pending':
+                # Error or unknown status
+                raise ValueError(f"Attestation status: {data.get('status')}")
         
-        # MessageSent event signature: keccak256("MessageSent(bytes)")
-        # This is the actual event signature from MessageTransmitter contract
-        message_sent_topic = Web3.keccak(text="MessageSent(bytes)").hex()
+        # Still waiting for attestation (or not indexed yet)
+        return None
+    
+    def _attestation_headers(self):
+        headers = {}
+        if self.CIRCLE_API_KEY:
+            # Circle API uses Basic Auth with format: API_KEY:API_SECRET
+            # The key format is: API_KEY:API_SECRET
+            auth_string = base64.b64encode(self.CIRCLE_API_KEY.encode()).decode()
+            headers['Authorization'] = f'Basic {auth_string}'
+        return headers
+    
+    def _message_hash_from_burn(self, burn_tx_hash, burn):
+        """Message hash for a mined burn, with Circle's lookup as a fallback."""
+        if not burn['success']:
+            raise ValueError(f"Burn transaction {burn_tx_hash} reverted")
+        if burn.get('dest_chain') and burn['dest_chain'] != self.dest_chain:
+            raise ValueError(f"Burn transaction {burn_tx_hash} targets {burn['dest_chain']}, not {self.dest_chain}")
         
-        # Extract MessageSent event from logs
-        message_hash = None
-        for log in receipt['logs']:
-            # Check if this log is from the MessageTransmitter contract
-            if (log['address'].lower() == self.source_config["message_transmitter"].lower() and
-                len(log['topics']) > 0 and
-                log['topics'][0].hex() == message_sent_topic):
-                # The message hash is in the data field (not topics)
-                # For MessageSent(bytes), the data contains the message bytes
-                # We need to hash the message to get the message hash
-                if log.get('data') and log['data'] != '0x':
-                    message_bytes = bytes.fromhex(log['data'][2:])
-                    # The message hash is keccak256 of the message
-                    message_hash = Web3.keccak(message_bytes).hex()
-                    break
+        # The message hash is keccak256 of the message bytes in MessageSent(bytes)
+        message_hash = burn.get('message_hash')
         
         # Alternative: If we can't extract from logs, try using Circle's transaction lookup
         # This is a fallback method
@@ -190,44 +267,7 @@ class CCTPHandler:
             # This is not ideal but may work in some cases
             raise ValueError("Could not extract message hash from burn transaction. Please check transaction logs manually.")
         
-        # Poll Circle API for attestation
-        start_time = time.time()
-        headers = {}
-        if self.CIRCLE_API_KEY:
-            # Circle API uses Basic Auth with format: API_KEY:API_SECRET
-            # The key format is: API_KEY:API_SECRET
-            auth_string = base64.b64encode(self.CIRCLE_API_KEY.encode()).decode()
-            headers['Authorization'] = f'Basic {auth_string}'
-        
-        while time.time() - start_time < max_wait:
-            try:
-                response = requests.get(
-                    f"{self.ATTESTATION_API}/{message_hash}",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('status') == 'complete':
-                        return {
-                            'attestation': data['attestation'],
-                            'message': data['message'],
-                            'message_hash': message_hash
-                        }
-                    elif data.get('status') == 'pending':
-                        # Still waiting for attestation
-                        pass
-                    else:
-                        # Error or unknown status
-                        raise ValueError(f"Attestation status: {data.get('status')}")
-            except requests.exceptions.RequestException as e:
-                # Log error but continue polling
-                print(f"Error fetching attestation: {e}")
-            
-            time.sleep(3)  # Wait 3 seconds before retry
-        
-        raise TimeoutError("Attestation not available within timeout period")
+        return message_hash
     
     def mint_usdc(self, attestation_data, recipient_private_key):
         """
@@ -261,16 +301,15 @@ class CCTPHandler:
         return mint_hash.hex()
     
     def get_tx_status(self, tx_hash, chain_type='source'):
-        """Check transaction confirmation status."""
-        web3 = self.source_web3 if chain_type == 'source' else self.dest_web3
+        """
+        Check transaction confirmation status.
+        Served by the chain's block-head tracker: the first call for a hash costs
+        one receipt lookup, later calls are answered from memory.
+        """
+        chain = self.source_chain if chain_type == 'source' else self.dest_chain
+        kind = 'burn' if chain_type == 'source' else 'mint'
         
         try:
-            receipt = web3.eth.get_transaction_receipt(tx_hash)
-            return {
-                'confirmed': True,
-                'success': receipt['status'] == 1,
-                'block_number': receipt['blockNumber']
-            }
+            return get_tracker(chain).track(tx_hash, kind=kind).status()
         except Exception:
             return {'confirmed': False, 'success': False}
-
@@ -2,8 +2,30 @@
 Chain configurations for CCTP-supported testnets.
 
 Each chain has its own USDC contract and domain ID for cross-chain transfers.
+The built-in CHAINS can be replaced by a JSON file (CHAIN_CONFIG_FILE):
+
+    {"chains": {"sepolia": {"chain_id": 11155111, "domain": 0, ...}, ...},
+     "routes": {"sepolia": ["base_sepolia", "arbitrum_sepolia"], ...}}
+
+"routes" is optional and defaults to every pair of distinct chains. The
+file is re-read when its mtime changes (checked at most every
+CHAIN_CONFIG_CHECK_INTERVAL seconds), so chains can be added without a
+redeploy. Lookups go through an immutable ChainRegistry swapped in whole
+on reload; a file that fails validation keeps the previous registry.
 """
 
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+CHAIN_CONFIG_FILE = os.getenv('CHAIN_CONFIG_FILE')
+CHAIN_CONFIG_CHECK_INTERVAL = float(os.getenv('CHAIN_CONFIG_CHECK_INTERVAL', '5'))
+
+REQUIRED_FIELDS = ('chain_id', 'name', 'rpc_url', 'usdc_address', 'token_messenger',
+                   'message_transmitter', 'domain')
+
 CHAINS = {
     "sepolia": {
         "chain_id": 11155111,
@@ -58,14 +80,127 @@ CHAINS = {
 }
 
 
+class ChainRegistry:
+    """Immutable set of chains with O(1) lookups by name, CCTP domain and EVM chain_id."""
+
+    def __init__(self, chains, routes=None):
+        by_name, by_domain, by_chain_id = {}, {}, {}
+        for name, config in chains.items():
+            missing = [f for f in REQUIRED_FIELDS if f not in config]
+            if missing:
+                raise ValueError(f"Chain {name} is missing {', '.join(missing)}")
+            config = MappingProxyType(dict(config))
+            if config['domain'] in by_domain:
+                raise ValueError(f"Chains {by_domain[config['domain']]} and {name} share domain {config['domain']}")
+            if config['chain_id'] in by_chain_id:
+                raise ValueError(f"Chains {by_chain_id[config['chain_id']]} and {name} share chain_id {config['chain_id']}")
+            by_name[name] = config
+            by_domain[config['domain']] = name
+            by_chain_id[config['chain_id']] = name
+
+        if routes is None:
+            pairs = {(s, d) for s in by_name for d in by_name if s != d}
+        else:
+            pairs = set()
+            for source, dests in routes.items():
+                for dest in dests:
+                    if source not in by_name or dest not in by_name:
+                        raise ValueError(f"Route {source} -> {dest} names an unknown chain")
+                    pairs.add((source, dest))
+
+        self._by_name = MappingProxyType(by_name)
+        self._by_domain = MappingProxyType(by_domain)
+        self._by_chain_id = MappingProxyType(by_chain_id)
+        self.routes = frozenset(pairs)
+        self.names = tuple(by_name)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name in self._by_name
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def get(self, name):
+        """Config for a chain name. Raises ValueError if unknown."""
+        try:
+            return self._by_name[name]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unsupported chain: {name}")
+
+    def by_domain(self, domain):
+        """Chain name for a CCTP domain (e.g. from a MessageSent message), or None."""
+        return self._by_domain.get(domain)
+
+    def by_chain_id(self, chain_id):
+        """Chain name for an EVM chain_id (e.g. reported by a wallet), or None."""
+        return self._by_chain_id.get(chain_id)
+
+    def supports_route(self, source, dest):
+        return (source, dest) in self.routes
+
+    def check_route(self, source, dest):
+        """Raise ValueError with a client-facing message unless source -> dest is supported."""
+        # Request bodies can carry any JSON type; lists and dicts aren't hashable
+        if source not in self:
+            raise ValueError('Invalid source chain')
+        if dest not in self:
+            raise ValueError('Invalid destination chain')
+        if (source, dest) not in self.routes:
+            raise ValueError(f'Unsupported route: {source} -> {dest}')
+
+
+def load_registry(path):
+    """Build a ChainRegistry from a JSON file (see module docstring)."""
+    with open(path) as f:
+        data = json.load(f)
+    chains = data.get('chains', data) if isinstance(data, dict) else None
+    if not isinstance(chains, dict) or not chains:
+        raise ValueError(f"{path} defines no chains")
+    return ChainRegistry(chains, data.get('routes'))
+
+
+_registry = ChainRegistry(CHAINS)
+_registry_mtime = None
+_next_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def _maybe_reload():
+    global _registry, _registry_mtime, _next_check
+    with _reload_lock:
+        now = time.monotonic()
+        if now < _next_check:
+            return
+        _next_check = now + CHAIN_CONFIG_CHECK_INTERVAL
+        try:
+            mtime = os.stat(CHAIN_CONFIG_FILE).st_mtime
+        except OSError as e:
+            if _registry_mtime is None:
+                print(f"[CHAINS] Cannot read {CHAIN_CONFIG_FILE}, using built-in chains: {e}")
+                _registry_mtime = -1
+            return
+        if mtime == _registry_mtime:
+            return
+        try:
+            _registry = load_registry(CHAIN_CONFIG_FILE)
+            print(f"[CHAINS] Loaded {len(_registry)} chains from {CHAIN_CONFIG_FILE}")
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[CHAINS] Ignoring invalid {CHAIN_CONFIG_FILE}, keeping previous chains: {e}")
+        _registry_mtime = mtime
+
+
+def get_registry():
+    """The current ChainRegistry, reloaded from CHAIN_CONFIG_FILE when it changes."""
+    if CHAIN_CONFIG_FILE and time.monotonic() >= _next_check:
+        _maybe_reload()
+    return _registry
+
+
 def get_chain_config(chain_name):
     """Fetch configuration for a specific chain."""
-    if chain_name not in CHAINS:
-        raise ValueError(f"Unsupported chain: {chain_name}")
-    return CHAINS[chain_name]
+    return get_registry().get(chain_name)
 
 
 def get_all_chains():
-    """Return list of supported chain names."""
-    return list(CHAINS.keys())
-
+    """Return supported chain names (an immutable tuple shared between calls)."""
+    return get_registry().names
@@ -6,14 +6,27 @@ Uses SQLAlchemy for database abstraction. Falls back to SQLite if PostgreSQL una
 
 import os
 import json
-from datetime import datetime
-from sqlalchemy import create_engine, Column, String, Float, Text, DateTime, Integer, ForeignKey
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, Column, String, Float, Text, DateTime, Integer, Boolean, ForeignKey, Index
+from sqlalchemy import update, or_, and_, inspect, text, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .priority import schedule_key, priority_class
+from .events import payment_events
+from .etags import invalidate_payment, VersionCache
+from . import stage_timing
+from . import query_stats, tracing
 
 Base = declarative_base()
 
+# Payments the transfer pipeline still has to advance
+ACTIVE_PAYMENT_STATUSES = ('burning', 'fetching_attestation')
+
 
 # Database Models
 class User(Base):
@@ -25,6 +38,7 @@ class User(Base):
     picture = Column(String)
     oauth_provider = Column(String)
     oauth_id = Column(String)
+    tier = Column(String, default='standard')  # SLA tier used for transfer priority
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -45,9 +59,22 @@ class Payment(Base):
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     payment_metadata = Column(Text)  # JSON string of payment metadata (renamed from 'metadata' - reserved in SQLAlchemy)
+    stage_timestamps = Column(Text)  # JSON {status: UTC time entered}, see utils.stage_timing
+    version = Column(Integer, default=1)  # Bumped on every update; orders webhook events
     
     # Relationship
     user = relationship("User", backref="payments")
+    
+    __table_args__ = (
+        # Partial index: the sweeper scans only in-flight payments, which stay a
+        # small fraction of the table
+        Index(
+            'ix_payments_active_status',
+            'status', 'updated_at',
+            postgresql_where=status.in_(ACTIVE_PAYMENT_STATUSES),
+            sqlite_where=status.in_(ACTIVE_PAYMENT_STATUSES)
+        ),
+    )
 
 
 class AuditLog(Base):
@@ -64,6 +91,91 @@ class AuditLog(Base):
     created_at = Column(DateTime, default=func.now(), index=True)
 
 
+class TransferJob(Base):
+    __tablename__ = 'transfer_jobs'
+    
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    payment_id = Column(String, ForeignKey('payments.payment_id'), nullable=False, index=True)
+    user_id = Column(String)
+    burn_tx_hash = Column(String, nullable=False)
+    source_chain = Column(String, nullable=False)
+    dest_chain = Column(String, nullable=False)
+    status = Column(String, default='queued', nullable=False)  # 'queued', 'running', 'done', 'dead'
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    scheduled_at = Column(DateTime, default=datetime.utcnow)  # Virtual enqueue time (see utils.priority)
+    priority_class = Column(String, default='normal')
+    locked_by = Column(String)  # Worker ID holding the lease
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    traceparent = Column(String)  # W3C trace context of the request that enqueued the job
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_transfer_jobs_status_run_after', 'status', 'run_after'),
+        Index('ix_transfer_jobs_status_scheduled_at', 'status', 'scheduled_at'),
+    )
+
+
+class PaymentVolumeHourly(Base):
+    """
+    Payment count and USD volume per creation hour, chain pair and current
+    status. Kept in step by create_payment/update_payment in the same
+    transaction; rebuild_volume_rollups recomputes it from payments.
+    """
+    __tablename__ = 'payment_volume_hourly'
+    
+    bucket_start = Column(DateTime, primary_key=True)  # UTC hour the payments were created in
+    source_chain = Column(String, primary_key=True)
+    dest_chain = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    payment_count = Column(Integer, default=0, nullable=False)
+    volume_usd = Column(Float, default=0, nullable=False)
+
+
+class WebhookEndpoint(Base):
+    __tablename__ = 'webhook_endpoints'
+    
+    endpoint_id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey('users.user_id'), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    secret = Column(String, nullable=False)  # HMAC key for X-Webhook-Signature
+    events = Column(Text)  # JSON list of payment statuses to deliver; null means all
+    enabled = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class WebhookDelivery(Base):
+    """
+    Outbox row: the latest snapshot of one payment owed to one endpoint.
+    Written in the same transaction as the status change; while a row is
+    still pending, later transitions overwrite its payload (coalescing).
+    """
+    __tablename__ = 'webhook_deliveries'
+    
+    delivery_id = Column(Integer, primary_key=True, autoincrement=True)
+    endpoint_id = Column(String, ForeignKey('webhook_endpoints.endpoint_id'), nullable=False, index=True)
+    payment_id = Column(String, nullable=False)
+    status = Column(String, default='pending', nullable=False)  # 'pending', 'sending', 'delivered', 'dead'
+    payload = Column(Text, nullable=False)  # JSON payment snapshot
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=8, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String)
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_webhook_deliveries_status_run_after', 'status', 'run_after'),
+        Index('ix_webhook_deliveries_endpoint_payment', 'endpoint_id', 'payment_id', 'status'),
+    )
+
+
 # Database connection
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///payments.db')
 
@@ -86,6 +198,47 @@ else:
 
 SessionLocal = sessionmaker(bind=engine)
 
+SLOW_QUERY_LOG_MAX_CHARS = 500
+
+
+def _span_name(statement):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'QUERY'
+    return f'db {operation}'
+
+
+# Query instrumentation: per-request counts/time (see query_stats) and a slow-query log
+@event.listens_for(engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append((time.perf_counter(), time.time_ns()))
+
+
+@event.listens_for(engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started, started_ns = conn.info['query_start'].pop()
+    duration = time.perf_counter() - started
+    query_stats.record_query(duration)
+    tracing.record_span(_span_name(statement), started_ns, time.time_ns(), kind='client',
+                        **{'db.system': conn.dialect.name, 'db.statement': statement[:SLOW_QUERY_LOG_MAX_CHARS]})
+    if duration * 1000 >= query_stats.SLOW_QUERY_MS:
+        sql = ' '.join(statement.split())[:SLOW_QUERY_LOG_MAX_CHARS]
+        print(f"[DB] Slow query ({duration * 1000:.0f}ms): {sql} | params={query_stats.redact_params(parameters)}")
+
+
+@event.listens_for(engine, 'handle_error')
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        started, started_ns = conn.info['query_start'].pop()
+        query_stats.record_query(time.perf_counter() - started)
+        tracing.record_span(_span_name(exception_context.statement or ''), started_ns, time.time_ns(),
+                            kind='client', error=exception_context.original_exception,
+                            **{'db.system': conn.dialect.name})
+
+
+@event.listens_for(engine, 'commit')
+def _commit(conn):
+    query_stats.record_commit()
+
 
 def get_db():
     """Get database session."""
@@ -98,7 +251,37 @@ def get_db():
 
 def init_db():
     """Initialize database tables."""
+    had_rollups = inspect(engine).has_table(PaymentVolumeHourly.__tablename__)
     Base.metadata.create_all(bind=engine)
+    _migrate_schema()
+    if not had_rollups:
+        # New rollup table on an existing database: backfill it once
+        rebuild_volume_rollups()
+
+
+def _migrate_schema():
+    """
+    Add nullable columns and indexes introduced after a table was first created.
+    create_all() only creates missing tables, so existing databases would
+    otherwise never see them.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+            
+            existing_indexes = {idx['name'] for idx in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
 
 
 # User operations
@@ -137,6 +320,85 @@ def create_user(email, name=None, picture=None, oauth_provider=None, oauth_id=No
         db.close()
 
 
+# email -> user_id; a user's ID never changes, so this only goes stale if a user is deleted
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+_user_ids = VersionCache(ttl=USER_CACHE_TTL)
+
+
+def upsert_user_and_log_login(email, name=None, picture=None, oauth_provider=None, oauth_id=None,
+                              ip_address=None, user_agent=None):
+    """
+    Create or refresh a user and record the login in one transaction:
+    a single INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING, then
+    one audit insert ('login', plus 'user_created' for new users).
+    Returns (user_id, created).
+    """
+    import uuid
+    db = SessionLocal()
+    try:
+        new_user_id = str(uuid.uuid4())
+        insert = pg_insert if _is_postgres() else sqlite_insert
+        stmt = insert(User).values(
+            user_id=new_user_id,
+            email=email,
+            name=name,
+            picture=picture,
+            oauth_provider=oauth_provider,
+            oauth_id=oauth_id,
+            tier='standard'
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={
+                # Keep what we have when the provider omits a field
+                'name': func.coalesce(stmt.excluded.name, User.name),
+                'picture': func.coalesce(stmt.excluded.picture, User.picture),
+                'oauth_id': func.coalesce(User.oauth_id, stmt.excluded.oauth_id),
+                'updated_at': func.now()
+            }
+        ).returning(User.user_id)
+        user_id = db.execute(stmt).scalar_one()
+        created = user_id == new_user_id
+        
+        # Audit log: both rows go out as one executemany INSERT
+        audit = {'user_id': user_id, 'resource_type': 'user', 'resource_id': user_id,
+                 'ip_address': ip_address, 'user_agent': user_agent}
+        audit_rows = [dict(audit, action='login', details=None)]
+        if created:
+            audit_rows.insert(0, dict(audit, action='user_created', details=json.dumps({
+                'email': email, 'oauth_provider': oauth_provider
+            })))
+        # Best effort, like log_audit: a failed audit write must not fail the login
+        try:
+            with db.begin_nested():
+                db.execute(AuditLog.__table__.insert(), audit_rows)
+        except Exception as e:
+            print(f"Audit logging failed: {e}")
+        db.commit()
+        
+        _user_ids.set(email, user_id)
+        return user_id, created
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def get_user_id_by_email(email):
+    """user_id for an email, served from a TTL cache when possible."""
+    user_id = _user_ids.get(email)
+    if user_id is None:
+        db = SessionLocal()
+        try:
+            user_id = db.query(User.user_id).filter(User.email == email).scalar()
+        finally:
+            db.close()
+        if user_id:
+            _user_ids.set(email, user_id)
+    return user_id
+
+
 def get_user_by_email(email):
     """Get user by email."""
     db = SessionLocal()
@@ -146,7 +408,8 @@ def get_user_by_email(email):
             'user_id': user.user_id,
             'email': user.email,
             'name': user.name,
-            'picture': user.picture
+            'picture': user.picture,
+            'tier': user.tier or 'standard'
         } if user else None
     finally:
         db.close()
@@ -161,7 +424,8 @@ def get_user_by_id(user_id):
             'user_id': user.user_id,
             'email': user.email,
             'name': user.name,
-            'picture': user.picture
+            'picture': user.picture,
+            'tier': user.tier or 'standard'
         } if user else None
     finally:
         db.close()
@@ -172,6 +436,7 @@ def create_payment(payment_id, amount, source_chain, dest_chain, sender, recipie
     """Insert new payment record with audit trail."""
     db = SessionLocal()
     try:
+        created_at = datetime.utcnow()
         payment = Payment(
             payment_id=payment_id,
             user_id=user_id or 'anonymous',
@@ -180,11 +445,16 @@ def create_payment(payment_id, amount, source_chain, dest_chain, sender, recipie
             dest_chain=dest_chain,
             sender_address=sender,
             recipient_address=recipient,
-            status='pending'
+            status='pending',
+            created_at=created_at,
+            stage_timestamps=stage_timing.dump({'pending': created_at}),
+            version=1
         )
         db.add(payment)
+        _bump_volume(db, created_at, source_chain, dest_chain, 'pending', 1, float(amount))
         db.commit()
         db.refresh(payment)
+        invalidate_payment(payment_id, payment.user_id)
         
         # Audit log
         log_audit(
@@ -211,20 +481,56 @@ def update_payment(payment_id, user_id=None, **kwargs):
     """Update payment fields dynamically with audit trail."""
     db = SessionLocal()
     try:
-        payment = db.query(Payment).filter(Payment.payment_id == payment_id).first()
-        if not payment:
+        # Bump the version before reading: the UPDATE holds the row lock
+        # (PostgreSQL) or the write lock (SQLite) until commit, so concurrent
+        # updates see each other's old status and the rollup bumps stay exact
+        version = db.execute(
+            update(Payment)
+            .where(Payment.payment_id == payment_id)
+            .values(version=func.coalesce(Payment.version, 1) + 1)
+            .returning(Payment.version)
+        ).scalar()
+        if version is None:
             return False
+        payment = db.query(Payment).filter(Payment.payment_id == payment_id).first()
+        
+        new_status = kwargs.get('status')
+        status_changed = bool(new_status) and new_status != payment.status
+        if status_changed:
+            payment.stage_timestamps = stage_timing.record_transition(
+                payment.stage_timestamps, payment.status, new_status,
+                payment.source_chain, payment.dest_chain
+            )
+            # Move the payment between status rows of its creation-hour rollup
+            if payment.created_at:
+                _bump_volume(db, payment.created_at, payment.source_chain, payment.dest_chain,
+                             payment.status, -1, -payment.amount_usd)
+                _bump_volume(db, payment.created_at, payment.source_chain, payment.dest_chain,
+                             new_status, 1, payment.amount_usd)
         
         # Track changes
         changes = {}
         for key, value in kwargs.items():
+            if key == 'metadata':
+                # 'metadata' is reserved by SQLAlchemy; the column is payment_metadata
+                key = 'payment_metadata'
             if hasattr(payment, key):
                 old_value = getattr(payment, key)
                 setattr(payment, key, value)
                 changes[key] = {'old': str(old_value), 'new': str(value)}
         
         payment.updated_at = datetime.utcnow()
+        # Snapshot before commit expires the instance, so publishing costs no extra query
+        event = _payment_to_dict(payment) if payment_events.has_subscribers(payment_id) else None
+        owner_id = payment.user_id
+        if status_changed:
+            # Outbox: deliveries commit (or roll back) with the status change
+            _enqueue_webhooks(db, payment.user_id, event or _payment_to_dict(payment))
         db.commit()
+        invalidate_payment(payment_id, owner_id)
+        
+        if event:
+            payment_events.publish(payment_id, event)
         
         # Audit log
         log_audit(
@@ -243,32 +549,79 @@ def update_payment(payment_id, user_id=None, **kwargs):
         db.close()
 
 
+def _payment_to_dict(payment):
+    return {
+        'payment_id': payment.payment_id,
+        'user_id': payment.user_id,
+        'amount_usd': payment.amount_usd,
+        'source_chain': payment.source_chain,
+        'dest_chain': payment.dest_chain,
+        'sender_address': payment.sender_address,
+        'recipient_address': payment.recipient_address,
+        'burn_tx_hash': payment.burn_tx_hash,
+        'mint_tx_hash': payment.mint_tx_hash,
+        'status': payment.status,
+        'created_at': payment.created_at.isoformat() if payment.created_at else None,
+        'updated_at': payment.updated_at.isoformat() if payment.updated_at else None,
+        'metadata': payment.payment_metadata,
+        'stage_timestamps': json.loads(payment.stage_timestamps) if payment.stage_timestamps else None,
+        'version': payment.version
+    }
+
+
 def get_payment(payment_id):
     """Fetch payment by ID."""
     db = SessionLocal()
     try:
         payment = db.query(Payment).filter(Payment.payment_id == payment_id).first()
         if payment:
-            return {
-                'payment_id': payment.payment_id,
-                'user_id': payment.user_id,
-                'amount_usd': payment.amount_usd,
-                'source_chain': payment.source_chain,
-                'dest_chain': payment.dest_chain,
-                'sender_address': payment.sender_address,
-                'recipient_address': payment.recipient_address,
-                'burn_tx_hash': payment.burn_tx_hash,
-                'mint_tx_hash': payment.mint_tx_hash,
-                'status': payment.status,
-                'created_at': payment.created_at.isoformat() if payment.created_at else None,
-                'updated_at': payment.updated_at.isoformat() if payment.updated_at else None,
-                'metadata': payment.payment_metadata
-            }
+            return _payment_to_dict(payment)
         return None
     finally:
         db.close()
 
 
+def get_payments_by_ids(payment_ids, user_id=None, since=None):
+    """
+    Fetch many payments in one IN (...) query, optionally restricted to an
+    owner and to payments updated after `since`. IDs that don't match are
+    simply absent from the result.
+    """
+    if not payment_ids:
+        return []
+    db = SessionLocal()
+    try:
+        query = db.query(Payment).filter(Payment.payment_id.in_(payment_ids))
+        if user_id:
+            query = query.filter(Payment.user_id == user_id)
+        if since:
+            query = query.filter(Payment.updated_at > since)
+        return [_payment_to_dict(p) for p in query.all()]
+    finally:
+        db.close()
+
+
+def get_active_payments(limit=25):
+    """
+    Get in-flight payments for the sweeper, least recently advanced first.
+    Skips payments a transfer worker currently holds a lease on.
+    """
+    db = SessionLocal()
+    try:
+        leased = db.query(TransferJob.job_id).filter(
+            TransferJob.payment_id == Payment.payment_id,
+            TransferJob.status == 'running'
+        ).exists()
+        payments = (db.query(Payment)
+                    .filter(Payment.status.in_(ACTIVE_PAYMENT_STATUSES), ~leased)
+                    .order_by(Payment.updated_at)
+                    .limit(limit)
+                    .all())
+        return [_payment_to_dict(p) for p in payments]
+    finally:
+        db.close()
+
+
 def get_recent_payments(limit=50, user_id=None):
     """Get most recent payments, optionally filtered by user."""
     db = SessionLocal()
@@ -278,25 +631,152 @@ def get_recent_payments(limit=50, user_id=None):
             query = query.filter(Payment.user_id == user_id)
         payments = query.order_by(Payment.created_at.desc()).limit(limit).all()
         
-        return [{
-            'payment_id': p.payment_id,
-            'user_id': p.user_id,
-            'amount_usd': p.amount_usd,
-            'source_chain': p.source_chain,
-            'dest_chain': p.dest_chain,
-            'sender_address': p.sender_address,
-            'recipient_address': p.recipient_address,
-            'burn_tx_hash': p.burn_tx_hash,
-            'mint_tx_hash': p.mint_tx_hash,
-            'status': p.status,
-            'created_at': p.created_at.isoformat() if p.created_at else None,
-            'updated_at': p.updated_at.isoformat() if p.updated_at else None,
-            'metadata': p.payment_metadata
-        } for p in payments]
+        return [_payment_to_dict(p) for p in payments]
+    finally:
+        db.close()
+
+
+def get_payments_version(user_id=None):
+    """
+    Cheap change marker for a payment list: (count, latest updated_at).
+    Any insert or update moves one of the two, so it can back an ETag.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(func.count(Payment.payment_id), func.max(Payment.updated_at))
+        if user_id:
+            query = query.filter(Payment.user_id == user_id)
+        count, latest = query.one()
+        return count, latest.isoformat() if latest else None
+    finally:
+        db.close()
+
+
+STAGE_STATS_MAX_ROWS = int(os.getenv('STAGE_STATS_MAX_ROWS', '5000'))
+
+
+def get_stage_timing_stats(since, source_chain=None, dest_chain=None, limit=STAGE_STATS_MAX_ROWS):
+    """Time-in-stage stats per chain pair for payments created since `since` (newest `limit`)."""
+    db = SessionLocal()
+    try:
+        query = db.query(Payment.source_chain, Payment.dest_chain, Payment.stage_timestamps).filter(
+            Payment.created_at >= since, Payment.stage_timestamps.isnot(None)
+        )
+        if source_chain:
+            query = query.filter(Payment.source_chain == source_chain)
+        if dest_chain:
+            query = query.filter(Payment.dest_chain == dest_chain)
+        rows = query.order_by(Payment.created_at.desc()).limit(limit).all()
+        return stage_timing.summarize(rows)
+    finally:
+        db.close()
+
+
+# Volume rollups
+def _hour(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _bump_volume(db, created_at, source_chain, dest_chain, status, count, amount):
+    """Add count/amount to one hourly rollup row inside the caller's transaction."""
+    insert = pg_insert if _is_postgres() else sqlite_insert
+    stmt = insert(PaymentVolumeHourly).values(
+        bucket_start=_hour(created_at),
+        source_chain=source_chain,
+        dest_chain=dest_chain,
+        status=status,
+        payment_count=count,
+        volume_usd=amount
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['bucket_start', 'source_chain', 'dest_chain', 'status'],
+        set_={
+            'payment_count': PaymentVolumeHourly.payment_count + stmt.excluded.payment_count,
+            'volume_usd': PaymentVolumeHourly.volume_usd + stmt.excluded.volume_usd
+        }
+    ))
+
+
+def rebuild_volume_rollups(since=None):
+    """
+    Recompute hourly rollups from payments (all hours, or those from `since`),
+    e.g. after writes that bypassed create_payment/update_payment.
+    Returns the number of rollup rows written.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Payment.created_at, Payment.source_chain, Payment.dest_chain,
+                         Payment.status, Payment.amount_usd).filter(Payment.created_at.isnot(None))
+        rollup_delete = db.query(PaymentVolumeHourly)
+        if since:
+            query = query.filter(Payment.created_at >= _hour(since))
+            rollup_delete = rollup_delete.filter(PaymentVolumeHourly.bucket_start >= _hour(since))
+        
+        totals = {}
+        for created_at, source_chain, dest_chain, status, amount in query.yield_per(1000):
+            key = (_hour(created_at), source_chain, dest_chain, status or 'pending')
+            count, volume = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, volume + (amount or 0))
+        
+        rollup_delete.delete(synchronize_session=False)
+        if totals:
+            db.execute(PaymentVolumeHourly.__table__.insert(), [
+                {'bucket_start': key[0], 'source_chain': key[1], 'dest_chain': key[2], 'status': key[3],
+                 'payment_count': count, 'volume_usd': volume}
+                for key, (count, volume) in totals.items()
+            ])
+        db.commit()
+        return len(totals)
+    except Exception as e:
+        db.rollback()
+        raise e
     finally:
         db.close()
 
 
+def get_payment_volume(start, end, group_by=('hour',)):
+    """
+    Payment count and USD volume for payments created in [start, end),
+    answered from the hourly rollups. group_by holds any of hour or day,
+    source_chain, dest_chain and status.
+    """
+    dims = [f for f in ('source_chain', 'dest_chain', 'status') if f in group_by]
+    by_time = 'hour' in group_by or 'day' in group_by
+    columns = [getattr(PaymentVolumeHourly, f) for f in dims]
+    if by_time:
+        columns.insert(0, PaymentVolumeHourly.bucket_start)
+    
+    db = SessionLocal()
+    try:
+        rows = (db.query(*columns,
+                         func.sum(PaymentVolumeHourly.payment_count),
+                         func.sum(PaymentVolumeHourly.volume_usd))
+                .filter(PaymentVolumeHourly.bucket_start >= _hour(start),
+                        PaymentVolumeHourly.bucket_start < end)
+                .group_by(*columns)
+                .all())
+    finally:
+        db.close()
+    
+    # Fold hours into days here; the rollup table only knows hours
+    groups = {}
+    for row in rows:
+        values = list(row[:-2])
+        if by_time:
+            bucket = values.pop(0)
+            period = bucket.replace(hour=0) if 'hour' not in group_by else bucket
+            values.insert(0, period.isoformat())
+        count, volume = groups.get(tuple(values), (0, 0.0))
+        groups[tuple(values)] = (count + (row[-2] or 0), volume + (row[-1] or 0))
+    
+    keys = (['hour' if 'hour' in group_by else 'day'] if by_time else []) + dims
+    return [
+        dict(zip(keys, values), payment_count=count, volume_usd=round(volume, 2))
+        for values, (count, volume) in sorted(groups.items())
+        if count
+    ]
+
+
 # Audit trail operations
 def log_audit(user_id=None, action=None, resource_type=None, resource_id=None, 
               details=None, ip_address=None, user_agent=None):
@@ -351,5 +831,524 @@ def get_audit_logs(limit=100, user_id=None, action=None, resource_type=None):
         db.close()
 
 
+# Transfer job queue operations
+def _is_postgres():
+    return engine.dialect.name == 'postgresql'
+
+
+def _job_to_dict(job):
+    return {
+        'job_id': job.job_id,
+        'payment_id': job.payment_id,
+        'user_id': job.user_id,
+        'burn_tx_hash': job.burn_tx_hash,
+        'source_chain': job.source_chain,
+        'dest_chain': job.dest_chain,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'last_error': job.last_error,
+        'priority_class': job.priority_class,
+        'scheduled_at': job.scheduled_at,
+        'run_after': job.run_after,
+        'traceparent': job.traceparent
+    }
+
+
+def enqueue_transfer_job(payment_id, burn_tx_hash, source_chain, dest_chain, user_id=None, max_attempts=5):
+    """
+    Add a transfer job to the durable queue. Returns job_id.
+    The job is scheduled by payment amount, payment age and the owner's tier.
+    """
+    db = SessionLocal()
+    try:
+        payment = db.query(Payment.amount_usd, Payment.created_at).filter(
+            Payment.payment_id == payment_id).first()
+        tier = db.query(User.tier).filter(User.user_id == user_id).scalar() if user_id else None
+        amount = payment.amount_usd if payment else 0
+        created_at = (payment.created_at if payment else None) or datetime.utcnow()
+        
+        job = TransferJob(
+            payment_id=payment_id,
+            user_id=user_id,
+            burn_tx_hash=burn_tx_hash,
+            source_chain=source_chain,
+            dest_chain=dest_chain,
+            max_attempts=max_attempts,
+            scheduled_at=schedule_key(created_at, amount, tier),
+            priority_class=priority_class(amount, tier),
+            traceparent=tracing.current_traceparent()
+        )
+        db.add(job)
+        db.commit()
+        
+        log_audit(
+            user_id=user_id,
+            action='enqueue_transfer',
+            resource_type='payment',
+            resource_id=payment_id,
+            details=json.dumps({'job_id': job.job_id, 'burn_tx_hash': burn_tx_hash})
+        )
+        
+        return job.job_id
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def count_pending_transfer_jobs():
+    """Count jobs that are queued or running."""
+    db = SessionLocal()
+    try:
+        return db.query(TransferJob).filter(TransferJob.status.in_(['queued', 'running'])).count()
+    finally:
+        db.close()
+
+
+def _claimable(now):
+    # Due queued jobs, or running jobs whose worker lost its lease
+    return or_(
+        and_(TransferJob.status == 'queued', TransferJob.run_after <= now),
+        and_(
+            TransferJob.status == 'running',
+            TransferJob.lease_expires_at < now,
+            TransferJob.attempts < TransferJob.max_attempts
+        )
+    )
+
+
+def claim_transfer_jobs(worker_id, limit=1, lease_seconds=60):
+    """
+    Claim up to `limit` due jobs for a worker and lease them, highest
+    priority (earliest scheduled_at) first.
+    
+    PostgreSQL uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never
+    block on or double-claim the same rows. SQLite has no row locks, so each
+    candidate is claimed with a conditional UPDATE and skipped if another
+    worker got there first.
+    """
+    if limit <= 0:
+        return []
+    
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=lease_seconds)
+        query = (db.query(TransferJob)
+                 .filter(_claimable(now))
+                 .order_by(TransferJob.scheduled_at, TransferJob.job_id)
+                 .limit(limit))
+        
+        claimed = []
+        if _is_postgres():
+            for job in query.with_for_update(skip_locked=True).all():
+                job.status = 'running'
+                job.locked_by = worker_id
+                job.lease_expires_at = lease
+                job.attempts += 1
+                claimed.append(_job_to_dict(job))
+            db.commit()
+        else:
+            for (job_id,) in query.with_entities(TransferJob.job_id).all():
+                result = db.execute(
+                    update(TransferJob)
+                    .where(TransferJob.job_id == job_id, _claimable(now))
+                    .values(
+                        status='running',
+                        locked_by=worker_id,
+                        lease_expires_at=lease,
+                        attempts=TransferJob.attempts + 1,
+                        updated_at=now
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    claimed.append(_job_to_dict(db.get(TransferJob, job_id)))
+        
+        return claimed
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def renew_transfer_job_leases(worker_id, job_ids, lease_seconds=60):
+    """Extend the leases of jobs this worker is still running. Returns rows renewed."""
+    if not job_ids:
+        return 0
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(TransferJob)
+            .where(
+                TransferJob.job_id.in_(list(job_ids)),
+                TransferJob.locked_by == worker_id,
+                TransferJob.status == 'running'
+            )
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        )
+        db.commit()
+        return result.rowcount
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def complete_transfer_job(job_id, worker_id):
+    """Mark a leased job as done."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(TransferJob)
+            .where(TransferJob.job_id == job_id, TransferJob.locked_by == worker_id)
+            .values(status='done', lease_expires_at=None, updated_at=datetime.utcnow())
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def fail_transfer_job(job_id, worker_id, error, backoff_base=5, backoff_max=600, permanent=False):
+    """
+    Record a failed attempt. Requeues with exponential backoff (plus jitter) until
+    max_attempts is reached, then dead-letters the job; a permanent error
+    dead-letters it at once. Returns 'retry', 'dead',
+    or 'lost' when the lease expired and the job is no longer ours to fail.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(TransferJob, job_id)
+        if not job or job.locked_by != worker_id:
+            return 'lost'
+        
+        job.last_error = str(error)
+        job.lease_expires_at = None
+        job.locked_by = None
+        if permanent or job.attempts >= job.max_attempts:
+            job.status = 'dead'
+        else:
+            delay = min(backoff_base * (2 ** (job.attempts - 1)), backoff_max)
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        outcome = 'retry' if job.status == 'queued' else 'dead'
+        db.commit()
+        return outcome
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def reap_expired_transfer_jobs():
+    """Dead-letter running jobs whose lease expired on their final attempt. Returns them."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        jobs = db.query(TransferJob).filter(
+            TransferJob.status == 'running',
+            TransferJob.lease_expires_at < now,
+            TransferJob.attempts >= TransferJob.max_attempts
+        ).all()
+        for job in jobs:
+            job.status = 'dead'
+            job.last_error = job.last_error or 'Lease expired on final attempt'
+            job.locked_by = None
+        dead = [_job_to_dict(job) for job in jobs]
+        db.commit()
+        return dead
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+# Webhook operations
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '8'))  # Before a delivery is dead-lettered
+
+
+def _endpoint_to_dict(endpoint, include_secret=False):
+    data = {
+        'endpoint_id': endpoint.endpoint_id,
+        'url': endpoint.url,
+        'events': json.loads(endpoint.events) if endpoint.events else None,
+        'enabled': endpoint.enabled,
+        'created_at': endpoint.created_at.isoformat() if endpoint.created_at else None
+    }
+    if include_secret:
+        data['secret'] = endpoint.secret
+    return data
+
+
+def _delivery_to_dict(delivery):
+    return {
+        'delivery_id': delivery.delivery_id,
+        'endpoint_id': delivery.endpoint_id,
+        'payment_id': delivery.payment_id,
+        'status': delivery.status,
+        'attempts': delivery.attempts,
+        'last_error': delivery.last_error,
+        'run_after': delivery.run_after.isoformat() if delivery.run_after else None,
+        'updated_at': delivery.updated_at.isoformat() if delivery.updated_at else None
+    }
+
+
+def create_webhook_endpoint(user_id, url, secret, events=None):
+    """Register a webhook endpoint. The returned dict is the only one that includes the secret."""
+    import uuid
+    db = SessionLocal()
+    try:
+        endpoint = WebhookEndpoint(
+            endpoint_id=str(uuid.uuid4()),
+            user_id=user_id,
+            url=url,
+            secret=secret,
+            events=json.dumps(list(events)) if events else None
+        )
+        db.add(endpoint)
+        db.commit()
+        
+        log_audit(
+            user_id=user_id,
+            action='create_webhook',
+            resource_type='webhook',
+            resource_id=endpoint.endpoint_id,
+            details=json.dumps({'url': url, 'events': events})
+        )
+        return _endpoint_to_dict(endpoint, include_secret=True)
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def get_webhook_endpoints(user_id):
+    db = SessionLocal()
+    try:
+        endpoints = (db.query(WebhookEndpoint)
+                     .filter(WebhookEndpoint.user_id == user_id)
+                     .order_by(WebhookEndpoint.created_at)
+                     .all())
+        return [_endpoint_to_dict(e) for e in endpoints]
+    finally:
+        db.close()
+
+
+def delete_webhook_endpoint(endpoint_id, user_id):
+    """Delete one of the user's endpoints and its delivery history. Returns False if not found."""
+    db = SessionLocal()
+    try:
+        endpoint = db.query(WebhookEndpoint).filter(
+            WebhookEndpoint.endpoint_id == endpoint_id, WebhookEndpoint.user_id == user_id).first()
+        if not endpoint:
+            return False
+        db.query(WebhookDelivery).filter(WebhookDelivery.endpoint_id == endpoint_id).delete(
+            synchronize_session=False)
+        db.delete(endpoint)
+        db.commit()
+        
+        log_audit(user_id=user_id, action='delete_webhook', resource_type='webhook', resource_id=endpoint_id)
+        return True
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def _enqueue_webhooks(db, user_id, snapshot):
+    """
+    Queue a payment snapshot for each of the owner's endpoints, inside the
+    caller's transaction. A delivery still pending for the same payment is
+    overwritten rather than duplicated, so bursts of transitions coalesce.
+    One already being sent is not, so a retried older row can arrive after
+    a newer one; receivers order events by the snapshot's `version`.
+    """
+    endpoints = db.query(WebhookEndpoint.endpoint_id, WebhookEndpoint.events).filter(
+        WebhookEndpoint.user_id == user_id, WebhookEndpoint.enabled.is_(True)).all()
+    if not endpoints:
+        return
+    payload = json.dumps(snapshot)
+    now = datetime.utcnow()
+    for endpoint_id, events in endpoints:
+        if events and snapshot['status'] not in json.loads(events):
+            continue
+        result = db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.endpoint_id == endpoint_id,
+                   WebhookDelivery.payment_id == snapshot['payment_id'],
+                   WebhookDelivery.status == 'pending')
+            .values(payload=payload, updated_at=now)
+        )
+        if result.rowcount == 0:
+            db.add(WebhookDelivery(endpoint_id=endpoint_id, payment_id=snapshot['payment_id'],
+                                   payload=payload, run_after=now, max_attempts=WEBHOOK_MAX_ATTEMPTS))
+
+
+def _claimable_delivery(now):
+    return or_(
+        and_(WebhookDelivery.status == 'pending', WebhookDelivery.run_after <= now),
+        and_(WebhookDelivery.status == 'sending', WebhookDelivery.lease_expires_at < now,
+             WebhookDelivery.attempts < WebhookDelivery.max_attempts)
+    )
+
+
+def claim_webhook_deliveries(worker_id, limit=100, lease_seconds=60):
+    """
+    Lease up to `limit` due deliveries, oldest first, with their endpoint's
+    url and secret. Same locking scheme as claim_transfer_jobs: SKIP LOCKED
+    on PostgreSQL, one conditional UPDATE on SQLite (single writer).
+    """
+    if limit <= 0:
+        return []
+    
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=lease_seconds)
+        # Leases that lapsed on the final attempt are dead-lettered first
+        db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.status == 'sending', WebhookDelivery.lease_expires_at < now,
+                   WebhookDelivery.attempts >= WebhookDelivery.max_attempts)
+            .values(status='dead', locked_by=None,
+                    last_error=func.coalesce(WebhookDelivery.last_error, 'Lease expired on final attempt'))
+        )
+        query = (db.query(WebhookDelivery.delivery_id)
+                 .filter(_claimable_delivery(now))
+                 .order_by(WebhookDelivery.run_after, WebhookDelivery.delivery_id)
+                 .limit(limit))
+        if _is_postgres():
+            query = query.with_for_update(skip_locked=True)
+        ids = [delivery_id for (delivery_id,) in query.all()]
+        if ids:
+            db.execute(
+                update(WebhookDelivery)
+                .where(WebhookDelivery.delivery_id.in_(ids), _claimable_delivery(now))
+                .values(status='sending', locked_by=worker_id, lease_expires_at=lease,
+                        attempts=WebhookDelivery.attempts + 1, updated_at=now)
+            )
+        db.commit()
+        if not ids:
+            return []
+        
+        rows = (db.query(WebhookDelivery, WebhookEndpoint.url, WebhookEndpoint.secret)
+                .join(WebhookEndpoint, WebhookEndpoint.endpoint_id == WebhookDelivery.endpoint_id)
+                .filter(WebhookDelivery.delivery_id.in_(ids),
+                        WebhookDelivery.locked_by == worker_id,
+                        WebhookDelivery.lease_expires_at == lease)
+                .all())
+        claimed = []
+        for delivery, url, secret in rows:
+            data = _delivery_to_dict(delivery)
+            data.update(url=url, secret=secret, payload=delivery.payload)
+            claimed.append(data)
+        return claimed
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def complete_webhook_deliveries(delivery_ids, worker_id):
+    """Mark leased deliveries as delivered."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.delivery_id.in_(list(delivery_ids)), WebhookDelivery.locked_by == worker_id)
+            .values(status='delivered', lease_expires_at=None, last_error=None, updated_at=datetime.utcnow())
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def fail_webhook_deliveries(delivery_ids, worker_id, error, backoff_base=10, backoff_max=3600):
+    """
+    Record a failed attempt for a batch. Each delivery backs off exponentially
+    (plus jitter) until max_attempts, then is dead-lettered. Returns the number dead-lettered.
+    """
+    db = SessionLocal()
+    try:
+        deliveries = db.query(WebhookDelivery).filter(
+            WebhookDelivery.delivery_id.in_(list(delivery_ids)), WebhookDelivery.locked_by == worker_id).all()
+        now = datetime.utcnow()
+        dead = 0
+        for delivery in deliveries:
+            delivery.last_error = str(error)[:1000]
+            delivery.lease_expires_at = None
+            delivery.locked_by = None
+            if delivery.attempts >= delivery.max_attempts:
+                delivery.status = 'dead'
+                dead += 1
+            else:
+                delay = min(backoff_base * (2 ** (delivery.attempts - 1)), backoff_max)
+                delivery.status = 'pending'
+                delivery.run_after = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        db.commit()
+        return dead
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def get_webhook_deliveries(endpoint_id, user_id, status=None, limit=50):
+    """Recent deliveries for one of the user's endpoints, or None if it isn't theirs."""
+    db = SessionLocal()
+    try:
+        owned = db.query(WebhookEndpoint.endpoint_id).filter(
+            WebhookEndpoint.endpoint_id == endpoint_id, WebhookEndpoint.user_id == user_id).first()
+        if not owned:
+            return None
+        query = db.query(WebhookDelivery).filter(WebhookDelivery.endpoint_id == endpoint_id)
+        if status:
+            query = query.filter(WebhookDelivery.status == status)
+        deliveries = query.order_by(WebhookDelivery.delivery_id.desc()).limit(limit).all()
+        return [_delivery_to_dict(d) for d in deliveries]
+    finally:
+        db.close()
+
+
+def retry_webhook_delivery(delivery_id, endpoint_id, user_id):
+    """Requeue a dead-lettered delivery with a fresh attempt budget. Returns False if not found."""
+    db = SessionLocal()
+    try:
+        owned = db.query(WebhookEndpoint.endpoint_id).filter(
+            WebhookEndpoint.endpoint_id == endpoint_id, WebhookEndpoint.user_id == user_id).first()
+        if not owned:
+            return False
+        result = db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.delivery_id == delivery_id,
+                   WebhookDelivery.endpoint_id == endpoint_id,
+                   WebhookDelivery.status == 'dead')
+            .values(status='pending', attempts=0, run_after=datetime.utcnow(), updated_at=datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount == 1
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
 # Initialize DB on import
 init_db()
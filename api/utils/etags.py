@@ -0,0 +1,123 @@
+"""
+Strong ETags and conditional GET support for polled endpoints.
+
+A payment's ETag derives from its updated_at and status; a user's payment
+list ETag derives from the number of payments and their latest updated_at.
+Versions are cached in-process so If-None-Match can be answered with 304
+before touching the database or the JSON serializer. Local writes clear the
+cache immediately; writes from other processes show up within ETAG_CACHE_TTL.
+
+parse_batch_status_request validates the batch status body for both the dev
+server and the Netlify check_status function.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from flask import Response, jsonify
+
+ETAG_CACHE_TTL = float(os.getenv('ETAG_CACHE_TTL', '10'))
+ETAG_CACHE_SIZE = 10000
+BATCH_STATUS_MAX_IDS = int(os.getenv('BATCH_STATUS_MAX_IDS', '100'))
+
+
+class VersionCache:
+    """Small TTL map of key -> version, safe to share between threads."""
+
+    def __init__(self, ttl=ETAG_CACHE_TTL, max_size=ETAG_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()  # Cheap bound; entries are rebuilt on demand
+            self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# payment_id -> (owner user_id, etag)
+payment_etags = VersionCache()
+# user_id -> (payment count, latest updated_at)
+user_versions = VersionCache()
+
+
+def _make_etag(*parts):
+    digest = hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def payment_etag(payment):
+    """Strong ETag for a payment dict."""
+    return _make_etag(payment['payment_id'], payment['updated_at'], payment['status'])
+
+
+def payments_list_etag(user_id, version, *params):
+    """Strong ETag for a user's payment list, given its (count, max updated_at) version."""
+    return _make_etag(user_id, *version, *params)
+
+
+def invalidate_payment(payment_id, user_id=None):
+    """Forget cached versions after a local write."""
+    payment_etags.invalidate(payment_id)
+    user_versions.invalidate(user_id)
+    user_versions.invalidate(None)  # Unfiltered list
+
+
+def etag_matches(if_none_match, etag):
+    """Compare an If-None-Match header against an ETag (weak comparison, RFC 9110)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def _cache_headers(response, etag):
+    response.headers['ETag'] = etag
+    # Per-user data: browsers may cache but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag):
+    """Empty 304 response carrying the current ETag."""
+    return _cache_headers(Response(status=304), etag)
+
+
+def json_with_etag(payload, etag, status=200):
+    """jsonify payload and attach the ETag."""
+    return _cache_headers(jsonify(payload), etag), status
+
+
+def parse_batch_status_request(data):
+    """(payment_ids, since) from a POST /api/check_status body; raises ValueError if invalid."""
+    data = data if isinstance(data, dict) else {}
+    payment_ids = data.get('payment_ids')
+    if not isinstance(payment_ids, list) or not all(isinstance(p, str) for p in payment_ids):
+        raise ValueError('payment_ids must be a list of strings')
+    if len(payment_ids) > BATCH_STATUS_MAX_IDS:
+        raise ValueError(f'At most {BATCH_STATUS_MAX_IDS} payment_ids per request')
+    
+    since = None
+    if data.get('since'):
+        try:
+            since = datetime.fromisoformat(data['since'])
+        except (TypeError, ValueError):
+            raise ValueError('since must be an ISO 8601 timestamp')
+    return list(set(payment_ids)), since
@@ -0,0 +1,60 @@
+"""
+In-process pub/sub for payment status transitions.
+
+update_payment publishes each committed change; the Server-Sent Events
+endpoint subscribes per payment, so one status change fans out to every
+open stream without any polling.
+"""
+
+import queue
+import threading
+
+# Statuses after which a payment never changes again
+TERMINAL_STATUSES = ('completed', 'failed')
+# Statuses after which the backend makes no further transitions: the mint on
+# the destination chain is signed in the user's wallet, so streams end here
+STREAM_END_STATUSES = TERMINAL_STATUSES + ('ready_to_mint',)
+
+
+class PaymentEventBus:
+    """Fans out payment updates to per-payment subscriber queues."""
+
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}  # payment_id -> set of queue.Queue
+
+    def subscribe(self, payment_id):
+        """Return a queue that receives every published update for payment_id."""
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(payment_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, payment_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(payment_id)
+            if subscribers:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[payment_id]
+
+    def has_subscribers(self, payment_id):
+        return payment_id in self._subscribers
+
+    def publish(self, payment_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(payment_id, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its oldest update, the newest one matters
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+payment_events = PaymentEventBus()
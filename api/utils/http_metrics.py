@@ -0,0 +1,97 @@
+"""
+Per-route HTTP request metrics.
+
+Installed on every app by create_app. Records latency histograms, status
+counters and in-flight gauges labelled by route and method, and exposes
+them through the shared metrics registry (see /api/metrics). Database work
+done while handling the request (see query_stats) is reported as a
+Server-Timing header and a queries-per-request histogram.
+
+Routes are labelled by view name rather than URL so that path parameters
+(payment ids) and the several URL aliases a Netlify function answers on
+collapse into one series per endpoint.
+"""
+
+import time
+from flask import g, request
+from .metrics import counter, gauge, histogram
+from . import query_stats
+
+# Finer than DEFAULT_BUCKETS at the low end, where API requests live
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+request_duration = histogram(
+    'http_request_duration_seconds', 'HTTP request latency until the response is returned',
+    ('route', 'method'), buckets=HTTP_BUCKETS
+)
+requests_total = counter(
+    'http_requests_total', 'HTTP requests by route, method and status code',
+    ('route', 'method', 'status')
+)
+requests_in_flight = gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled', ('route',)
+)
+request_db_queries = histogram(
+    'http_request_db_queries', 'SQL statements issued per HTTP request', ('route',),
+    buckets=QUERY_COUNT_BUCKETS
+)
+request_db_duration = histogram(
+    'http_request_db_duration_seconds', 'Time spent in the database per HTTP request', ('route',),
+    buckets=HTTP_BUCKETS
+)
+
+
+def _route():
+    endpoint = request.endpoint
+    if not endpoint:
+        return UNMATCHED_ROUTE
+    # Blueprint endpoints are '<blueprint>.<view>'; keep the view name
+    return endpoint.rpartition('.')[2]
+
+
+def _start():
+    g._http_metrics = (time.perf_counter(), _route(), query_stats.begin())
+    requests_in_flight.inc(route=g._http_metrics[1])
+
+
+def _record(response):
+    state = g.pop('_http_metrics', None)
+    if state is not None:
+        started, route, stats = state
+        elapsed = time.perf_counter() - started
+        request_duration.observe(elapsed, route=route, method=request.method)
+        requests_total.inc(route=route, method=request.method, status=response.status_code)
+        request_db_queries.observe(stats.queries, route=route)
+        request_db_duration.observe(stats.duration, route=route)
+        if query_stats.SERVER_TIMING:
+            response.headers['Server-Timing'] = query_stats.server_timing(stats, elapsed)
+        g._http_metrics_route = route
+    return response
+
+
+def _finish(exc):
+    # Normally _record already ran; an exception escaping the error handlers skips it
+    state = g.pop('_http_metrics', None)
+    if state is not None:
+        started, route, _ = state
+        request_duration.observe(time.perf_counter() - started, route=route, method=request.method)
+        requests_total.inc(route=route, method=request.method, status=500)
+    else:
+        route = g.pop('_http_metrics_route', None)
+        if route is None:
+            return
+    query_stats.end()
+    requests_in_flight.dec(route=route)
+
+
+def init_http_metrics(app):
+    """Time every request on app. Runs ahead of other before_request hooks
+    so requests rejected there (e.g. rate limited) are still counted."""
+    app.before_request_funcs.setdefault(None, []).insert(0, _start)
+    app.after_request(_record)
+    app.teardown_request(_finish)
+    return app
@@ -0,0 +1,248 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are kept per process and rendered on demand
+by the /api/metrics endpoint, or by start_metrics_server in processes that
+serve no Flask app (standalone workers). Label values are passed as keyword
+arguments.
+"""
+
+import hmac
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer token for scrapes; unset = loopback only
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at render time."""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn):
+        """Read the (unlabelled) value from fn() whenever metrics are rendered."""
+        self._function = fn
+
+    def _samples(self):
+        if self._function is not None:
+            return [f'{self.name} {_format_value(self._function())}']
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (e.g. latencies in seconds)."""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts followed by sum and count
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self, **labels):
+        """Return {'count', 'sum', 'buckets': [(le, cumulative)]} for one label set."""
+        with self._lock:
+            state = list(self._values.get(self._key(labels)) or [0] * len(self.buckets) + [0.0, 0])
+        cumulative, total = [], 0
+        for bound, count in zip(self.buckets, state):
+            total += count
+            cumulative.append((bound, total))
+        return {'count': state[-1], 'sum': state[-2], 'buckets': cumulative}
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile from bucket boundaries (upper bound of the bucket)."""
+        snap = self.snapshot(**labels)
+        if not snap['count']:
+            return None
+        target = q * snap['count']
+        for bound, cumulative in snap['buckets']:
+            if cumulative >= target:
+                return bound
+        return None
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{labels} {state[-1]}')
+        return lines
+
+
+class Registry:
+    """Named collection of metrics. Re-registering a name returns the existing metric."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(m.render() for m in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def render_prometheus():
+    """Render every registered metric in Prometheus text format."""
+    return REGISTRY.render()
+
+
+def scrape_allowed(authorization, remote_addr):
+    """
+    Whether a scrape may read metrics: bearer METRICS_TOKEN when one is set,
+    otherwise loopback clients only. Returns (allowed, status, error).
+    """
+    if METRICS_TOKEN:
+        if hmac.compare_digest(authorization or '', f'Bearer {METRICS_TOKEN}'):
+            return True, 200, None
+        return False, 401, 'Authentication required'
+    if remote_addr in ('127.0.0.1', '::1'):
+        return True, 200, None
+    return False, 403, 'Set METRICS_TOKEN to scrape metrics remotely'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/api/metrics'):
+            return self._reply(404, b'Not found\n', 'text/plain')
+        allowed, status, error = scrape_allowed(self.headers.get('Authorization'), self.client_address[0])
+        if not allowed:
+            return self._reply(status, f'{error}\n'.encode(), 'text/plain')
+        self._reply(200, render_prometheus().encode(), PROMETHEUS_CONTENT_TYPE)
+
+    def _reply(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve GET /metrics from a daemon thread. Returns the server (call shutdown to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    print(f"[METRICS] Serving /metrics on http://{host}:{server.server_address[1]}")
+    return server
@@ -0,0 +1,102 @@
+"""
+Cached OpenID Connect discovery metadata and JWKS.
+
+authlib resolves the provider's metadata (and later its signing keys) once
+per process. On serverless every cold start pays for those fetches before
+the first login can proceed. This module keeps both in memory and in a
+small JSON file (/tmp survives warm invocations on Netlify/Lambda) with a
+TTL, and seeds the authlib client with them so id_tokens are validated
+locally without touching the network.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import requests
+
+OIDC_CACHE_TTL = int(os.getenv('OIDC_CACHE_TTL', str(24 * 3600)))  # Seconds
+OIDC_CACHE_FILE = os.getenv(
+    'OIDC_CACHE_FILE', os.path.join(tempfile.gettempdir(), 'usdc_gateway_oidc.json')
+)
+OIDC_FETCH_TIMEOUT = 5
+
+_lock = threading.Lock()
+_memory = {}  # metadata_url -> metadata dict (with '_loaded_at' and 'jwks')
+
+
+def _read_file():
+    try:
+        with open(OIDC_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_file(metadata_url, metadata):
+    """Best-effort atomic write; a read-only filesystem just means no file cache."""
+    try:
+        cached = _read_file()
+        cached[metadata_url] = metadata
+        directory = os.path.dirname(OIDC_CACHE_FILE) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.oidc-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cached, f)
+        os.replace(tmp_path, OIDC_CACHE_FILE)
+    except OSError as e:
+        print(f"[OIDC] Could not write cache file: {e}")
+
+
+def _fresh(metadata):
+    return bool(metadata) and 'jwks' in metadata and time.time() - metadata.get('_loaded_at', 0) < OIDC_CACHE_TTL
+
+
+def _fetch(metadata_url):
+    metadata = requests.get(metadata_url, timeout=OIDC_FETCH_TIMEOUT).json()
+    metadata['jwks'] = requests.get(metadata['jwks_uri'], timeout=OIDC_FETCH_TIMEOUT).json()
+    metadata['_loaded_at'] = time.time()
+    return metadata
+
+
+def get_metadata(metadata_url):
+    """Discovery metadata plus 'jwks', from memory, then file, then network."""
+    with _lock:
+        metadata = _memory.get(metadata_url)
+        if _fresh(metadata):
+            return metadata
+        metadata = _read_file().get(metadata_url)
+        if not _fresh(metadata):
+            metadata = _fetch(metadata_url)
+            _write_file(metadata_url, metadata)
+        _memory[metadata_url] = metadata
+        return metadata
+
+
+def prime_client(client):
+    """
+    Seed an authlib client's server_metadata from the cache. authlib skips
+    its own fetches once '_loaded_at' and 'jwks' are present. Cheap to call
+    per request: it only does work when the cached copy has expired.
+    """
+    metadata_url = client._server_metadata_url
+    if not metadata_url or _fresh(client.server_metadata):
+        return client
+    client.server_metadata.update(get_metadata(metadata_url))
+    return client
+
+
+def remember_client_keys(client):
+    """
+    Persist the client's JWKS if authlib re-fetched it (key rotation:
+    an unknown 'kid' makes authlib refresh the key set in-place).
+    """
+    metadata_url = client._server_metadata_url
+    jwks = client.server_metadata.get('jwks')
+    with _lock:
+        cached = _memory.get(metadata_url)
+        if not metadata_url or not jwks or (cached and cached.get('jwks') == jwks):
+            return
+        metadata = dict(client.server_metadata, _loaded_at=time.time())
+        _memory[metadata_url] = metadata
+    _write_file(metadata_url, metadata)
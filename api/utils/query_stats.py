@@ -0,0 +1,73 @@
+"""
+Per-request database statistics.
+
+db.py's engine hooks report every statement and commit here. While a
+request is being handled (see http_metrics) they are accumulated into a
+QueryStats for that request, which ends up in a Server-Timing header and a
+queries-per-request histogram. Kept free of SQLAlchemy imports so functions
+that never touch the database don't pay for it.
+"""
+
+import os
+from contextvars import ContextVar
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+
+_current = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Statement count, commit count and total time spent in the database."""
+    __slots__ = ('queries', 'commits', 'duration')
+
+    def __init__(self):
+        self.queries = 0
+        self.commits = 0
+        self.duration = 0.0
+
+
+def begin():
+    """Start collecting for the current request; returns the new QueryStats."""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def end():
+    _current.set(None)
+
+
+def record_query(duration):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.duration += duration
+
+
+def record_commit():
+    stats = _current.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def redact_params(parameters):
+    """Replace bound values with their type names so slow-query logs never carry user data."""
+    if isinstance(parameters, dict):
+        return {k: f'<{type(v).__name__}>' for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: one parameter set per row
+            return f'<{len(parameters)} rows of {redact_params(parameters[0])}>'
+        return tuple(f'<{type(v).__name__}>' for v in parameters)
+    return parameters
+
+
+def server_timing(stats, total=None):
+    """Server-Timing header value, e.g. 'db;dur=4.1;desc="3 queries, 1 commit", app;dur=9.8'."""
+    queries = f"{stats.queries} quer{'y' if stats.queries == 1 else 'ies'}"
+    commits = f"{stats.commits} commit{'' if stats.commits == 1 else 's'}"
+    value = f'db;dur={stats.duration * 1000:.1f};desc="{queries}, {commits}"'
+    if total is not None:
+        value += f', app;dur={total * 1000:.1f}'
+    return value
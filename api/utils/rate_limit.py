@@ -0,0 +1,168 @@
+"""
+Rate limiter storage and keys shared across worker processes.
+
+SQLiteStorage is a `limits` storage backend (scheme `sqlite://`) that keeps
+counters in a local SQLite file, so every gunicorn worker on a host enforces
+one shared limit and counters survive restarts, without running Redis.
+It supports the fixed-window and moving-window (sliding log) strategies;
+each check is a single BEGIN IMMEDIATE transaction, which makes
+check-and-acquire atomic across processes.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+from flask import session
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage, MovingWindowSupport
+
+RATE_LIMIT_STORAGE_URI = os.getenv(
+    'RATE_LIMIT_STORAGE_URI',
+    'sqlite:///' + os.path.join(tempfile.gettempdir(), 'usdc_gateway_ratelimit.db')
+)
+RATE_LIMIT_STRATEGY = os.getenv('RATE_LIMIT_STRATEGY', 'moving-window')
+PURGE_EVERY = 1000  # Operations between sweeps of expired rows
+
+
+def rate_limit_key():
+    """Limit signed-in users per account and everyone else per IP."""
+    user_id = session.get('user_id')
+    if user_id:
+        return f'user:{user_id}'
+    return f'ip:{get_remote_address()}'
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """limits storage backed by a SQLite file shared by all local processes."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri)
+        # sqlite:///relative.db and sqlite:////abs/path.db, as in SQLAlchemy
+        self.path = (parsed.netloc + parsed.path)[1:] if parsed.path else ':memory:'
+        self.timeout = float(options.get('timeout', 5))
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._ops = 0
+        self._max_expiry = 0
+        self._init_schema()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        if self._pid != os.getpid():
+            # Forked (gunicorn preload): never reuse the parent's SQLite handles
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS rl_counters '
+                     '(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS rl_entries (key TEXT NOT NULL, ts REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_rl_entries_key_ts ON rl_entries (key, ts)')
+
+    def _transaction(self, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')  # Takes the write lock up front: no lost updates
+        try:
+            result = fn(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_purge()
+        return result
+
+    def _maybe_purge(self):
+        self._ops += 1
+        if self._ops % PURGE_EVERY:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute('DELETE FROM rl_counters WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM rl_entries WHERE ts <= ?', (now - self._max_expiry,))
+
+    # Fixed window
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        # elastic_expiry is passed by limits < 4 (fixed-window-elastic-expiry)
+        def op(conn):
+            now = time.time()
+            conn.execute(
+                'INSERT INTO rl_counters (key, count, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                'count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, '
+                'expires_at = CASE WHEN expires_at <= ? OR ? THEN excluded.expires_at ELSE expires_at END',
+                (key, amount, now + expiry, now, now, bool(elastic_expiry))
+            )
+            return conn.execute('SELECT count FROM rl_counters WHERE key = ?', (key,)).fetchone()[0]
+        return self._transaction(op)
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT count FROM rl_counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute('SELECT expires_at FROM rl_counters WHERE key = ?', (key,)).fetchone()
+        return row[0] if row and row[0] > time.time() else time.time()
+
+    # Moving window (sliding log)
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        self._max_expiry = max(self._max_expiry, expiry)
+
+        def op(conn):
+            now = time.time()
+            conn.execute('DELETE FROM rl_entries WHERE key = ? AND ts <= ?', (key, now - expiry))
+            count = conn.execute('SELECT COUNT(*) FROM rl_entries WHERE key = ?', (key,)).fetchone()[0]
+            if count + amount > limit:
+                return False
+            conn.executemany('INSERT INTO rl_entries (key, ts) VALUES (?, ?)', [(key, now)] * amount)
+            return True
+        return self._transaction(op)
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._conn().execute(
+            'SELECT MIN(ts), COUNT(*) FROM rl_entries WHERE key = ? AND ts > ?', (key, now - expiry)
+        ).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+    # Housekeeping
+    def check(self):
+        try:
+            self._conn().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        def op(conn):
+            removed = conn.execute('DELETE FROM rl_counters').rowcount
+            return removed + conn.execute('DELETE FROM rl_entries').rowcount
+        return self._transaction(op)
+
+    def clear(self, key):
+        def op(conn):
+            conn.execute('DELETE FROM rl_counters WHERE key = ?', (key,))
+            conn.execute('DELETE FROM rl_entries WHERE key = ?', (key,))
+        self._transaction(op)
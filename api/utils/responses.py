@@ -0,0 +1,117 @@
+"""
+Response layer: fast JSON encoding and negotiated compression.
+
+init_responses(app) swaps Flask's JSON provider for orjson (when installed),
+which serializes datetimes natively and encodes large payment lists several
+times faster than the stdlib encoder. It also compresses responses above
+COMPRESS_MIN_SIZE with brotli (optional dependency) or gzip, depending on
+the client's Accept-Encoding.
+"""
+
+import gzip
+import os
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Stdlib encoder still works, just slower
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # Bytes
+COMPRESS_LEVEL_GZIP = int(os.getenv('COMPRESS_LEVEL_GZIP', '3'))  # Level 3 is ~2x faster than 6 for ~10% more bytes
+COMPRESS_LEVEL_BROTLI = int(os.getenv('COMPRESS_LEVEL_BROTLI', '4'))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; falls back to Flask's default hook for odd types."""
+
+    _options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand orjson's bytes straight to the response, skipping a decode/encode round-trip
+        body = orjson.dumps(obj, default=self.default, option=self._options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _accepted_encodings():
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def _choose_encoding():
+    accepted = _accepted_encodings()
+    if brotli and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request hook: compress eligible bodies for clients that accept it."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = _choose_encoding()
+    if not encoding:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=COMPRESS_LEVEL_BROTLI)
+    else:
+        compressed = gzip.compress(body, compresslevel=COMPRESS_LEVEL_GZIP)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity representation, so a strong
+    # validator would be wrong; If-None-Match compares weakly and still matches
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = f'W/{etag}'
+    return response
+
+
+def init_responses(app):
+    """
+    Install the fast JSON provider and compression hook.
+    Call right after creating the app so compression runs after every other
+    after_request hook (Flask runs them in reverse registration order).
+    """
+    if orjson:
+        app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
+    return app
@@ -0,0 +1,128 @@
+"""
+Session configuration shared by the dev server and the Netlify auth functions.
+
+SESSION_MODE=token (default) keeps the whole session in a compact signed
+cookie, optionally encrypted, carrying user_id, email and an expiry claim.
+Loading a session is an in-memory signature check: no disk I/O per request,
+nothing to clean up, and any instance can serve any user.
+
+SESSION_MODE=filesystem keeps the previous Flask-Session behaviour.
+"""
+
+import os
+import time
+from flask.sessions import SessionInterface, SecureCookieSession, session_json_serializer
+from itsdangerous import URLSafeSerializer, BadSignature
+
+SESSION_MODE = os.getenv('SESSION_MODE', 'token')
+SESSION_TOKEN_TTL = int(os.getenv('SESSION_TOKEN_TTL', str(7 * 24 * 3600)))  # Seconds
+# Optional Fernet key (base64, 32 bytes) - encrypts tokens so their contents
+# can't be read client-side; signing alone already prevents tampering
+SESSION_ENCRYPTION_KEY = os.getenv('SESSION_ENCRYPTION_KEY')
+SESSION_COOKIE_NAME = 'usdc_gateway_session'
+MAX_COOKIE_SIZE = 4093
+
+
+class TokenSessionInterface(SessionInterface):
+    """Stateless sessions stored in a signed (optionally encrypted) cookie token."""
+
+    salt = 'usdc-gateway-session'
+
+    def __init__(self, ttl=SESSION_TOKEN_TTL, encryption_key=SESSION_ENCRYPTION_KEY):
+        self.ttl = ttl
+        self._fernet = None
+        if encryption_key:
+            from cryptography.fernet import Fernet
+            self._fernet = Fernet(encryption_key.encode() if isinstance(encryption_key, str) else encryption_key)
+
+    def _signer(self, app):
+        return URLSafeSerializer(app.secret_key, salt=self.salt, serializer=session_json_serializer)
+
+    def encode(self, app, data):
+        """Serialize session data plus an expiry claim into a cookie token."""
+        payload = dict(data, exp=int(time.time()) + self.ttl)
+        if self._fernet:
+            # Fernet authenticates as well as encrypts, so no separate signature
+            return self._fernet.encrypt(session_json_serializer.dumps(payload).encode()).decode()
+        return self._signer(app).dumps(payload)
+
+    def decode(self, app, token):
+        """Verify a token. Returns its payload, or None if invalid or expired."""
+        try:
+            if self._fernet:
+                from cryptography.fernet import InvalidToken
+                try:
+                    payload = session_json_serializer.loads(self._fernet.decrypt(token.encode()).decode())
+                except InvalidToken:
+                    return None
+            else:
+                payload = self._signer(app).loads(token)
+        except (BadSignature, ValueError):
+            return None
+        if not isinstance(payload, dict) or payload.get('exp', 0) < time.time():
+            return None
+        return payload
+
+    def open_session(self, app, request):
+        if not app.secret_key and not self._fernet:
+            return None
+        token = request.cookies.get(self.get_cookie_name(app))
+        if not token:
+            return SecureCookieSession()
+        payload = self.decode(app, token)
+        if payload is None:
+            return SecureCookieSession()
+        session = SecureCookieSession(payload)
+        # Dropped on save; re-added with a fresh value whenever the token is reissued
+        session.pop('exp', None)
+        session.modified = False
+        # Sliding expiry: reissue once less than half the lifetime remains
+        session.refresh_due = payload['exp'] - time.time() < self.ttl / 2
+        return session
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if not (session.modified or getattr(session, 'refresh_due', False)):
+            return
+
+        token = self.encode(app, session)
+        if len(token) > MAX_COOKIE_SIZE:
+            print(f"[SESSION] Token is {len(token)} bytes; browsers may drop cookies over {MAX_COOKIE_SIZE}")
+        response.set_cookie(
+            name, token, max_age=self.ttl, domain=domain, path=path,
+            secure=secure, samesite=samesite, httponly=httponly
+        )
+
+
+def configure_sessions(app, secure=False):
+    """Apply the shared session cookie settings and install the session backend."""
+    app.config['SESSION_PERMANENT'] = True
+    app.config['SESSION_COOKIE_NAME'] = SESSION_COOKIE_NAME
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    app.config['SESSION_COOKIE_SECURE'] = secure  # True in production (HTTPS required)
+    app.config['SESSION_COOKIE_HTTPONLY'] = True
+    app.config['SESSION_COOKIE_PATH'] = '/'
+    app.config['SESSION_COOKIE_DOMAIN'] = None  # Let Flask handle domain automatically
+
+    if SESSION_MODE == 'filesystem':
+        from flask_session import Session
+        app.config['SESSION_TYPE'] = 'filesystem'
+        Session(app)
+    else:
+        app.session_interface = TokenSessionInterface()
+    return app
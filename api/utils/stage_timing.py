@@ -0,0 +1,114 @@
+"""
+Transfer pipeline stage timing.
+
+Each payment carries a stage_timestamps JSON object mapping status to the
+UTC time it last entered that status. update_payment calls
+record_transition on every status change, which stamps the new status and
+observes how long the payment spent in the one it left, per
+(source_chain, dest_chain). summarize turns stored timestamps into
+time-in-stage statistics for the analytics API.
+"""
+
+import json
+from datetime import datetime
+from .metrics import histogram
+
+# Attestations take minutes, so buckets reach well past the HTTP range
+STAGE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 900, 1200, 1800, 3600, 7200)
+
+# Analytics window (hours) accepted by /api/analytics/stages
+STAGE_STATS_DEFAULT_HOURS = 24
+STAGE_STATS_MAX_HOURS = 24 * 30
+
+# Statuses that end the pipeline's time budget for settlement
+SETTLED_STATUSES = ('ready_to_mint', 'completed')
+
+stage_duration = histogram(
+    'transfer_stage_duration_seconds', 'Time a payment spent in a pipeline stage',
+    ('stage', 'source_chain', 'dest_chain'), buckets=STAGE_BUCKETS
+)
+settlement_duration = histogram(
+    'transfer_settlement_seconds', 'Time from payment creation to settlement or failure',
+    ('source_chain', 'dest_chain', 'outcome'), buckets=STAGE_BUCKETS
+)
+
+
+def load(stage_timestamps):
+    """Parse the stored JSON into {status: datetime}; bad or missing data yields {}."""
+    if not stage_timestamps:
+        return {}
+    try:
+        return {status: datetime.fromisoformat(ts) for status, ts in json.loads(stage_timestamps).items()}
+    except (TypeError, ValueError, AttributeError):
+        return {}
+
+
+def dump(stages):
+    return json.dumps({status: ts.isoformat() for status, ts in stages.items()})
+
+
+def record_transition(stage_timestamps, old_status, new_status, source_chain, dest_chain, now=None):
+    """
+    Stamp new_status, observe the time spent in old_status and, on settlement
+    or failure, the end-to-end time. Returns the updated JSON to store.
+    """
+    now = now or datetime.utcnow()
+    stages = load(stage_timestamps)
+    entered = stages.get(old_status)
+    if entered is not None:
+        stage_duration.observe((now - entered).total_seconds(), stage=old_status,
+                               source_chain=source_chain, dest_chain=dest_chain)
+
+    created = stages.get('pending')
+    if created is not None and new_status in SETTLED_STATUSES + ('failed',) and not any(
+            s in stages for s in SETTLED_STATUSES + ('failed',)):
+        outcome = 'failed' if new_status == 'failed' else 'settled'
+        settlement_duration.observe((now - created).total_seconds(), source_chain=source_chain,
+                                    dest_chain=dest_chain, outcome=outcome)
+
+    stages[new_status] = now
+    return dump(stages)
+
+
+def stage_durations(stages):
+    """[(stage, seconds)] between consecutive stamped statuses, in time order."""
+    ordered = sorted(stages.items(), key=lambda item: item[1])
+    return [(status, (ordered[i + 1][1] - entered).total_seconds())
+            for i, (status, entered) in enumerate(ordered[:-1])]
+
+
+def _percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(rows):
+    """
+    Aggregate (source_chain, dest_chain, stage_timestamps) rows into
+    time-in-stage stats per chain pair. The 'settlement' stage is creation
+    to ready_to_mint/completed.
+    """
+    samples = {}
+    for source_chain, dest_chain, stage_timestamps in rows:
+        stages = load(stage_timestamps)
+        for stage, seconds in stage_durations(stages):
+            samples.setdefault((source_chain, dest_chain, stage), []).append(seconds)
+        settled = [stages[s] for s in SETTLED_STATUSES if s in stages]
+        if 'pending' in stages and settled:
+            seconds = (min(settled) - stages['pending']).total_seconds()
+            samples.setdefault((source_chain, dest_chain, 'settlement'), []).append(seconds)
+
+    stats = []
+    for (source_chain, dest_chain, stage), values in sorted(samples.items()):
+        values.sort()
+        stats.append({
+            'source_chain': source_chain,
+            'dest_chain': dest_chain,
+            'stage': stage,
+            'count': len(values),
+            'avg_seconds': round(sum(values) / len(values), 3),
+            'p50_seconds': round(_percentile(values, 0.5), 3),
+            'p95_seconds': round(_percentile(values, 0.95), 3),
+            'max_seconds': round(values[-1], 3),
+        })
+    return stats
@@ -0,0 +1,276 @@
+"""
+Lightweight span tracing with W3C trace-context propagation.
+
+Spans follow the OpenTelemetry data model (trace/span ids, parent, kind,
+start/end in unix nanoseconds, attributes, status) and are written one JSON
+object per line to stdout or a file, so they can be inspected with jq or
+shipped to a collector. The current span lives in a contextvar:
+
+- HTTP requests open a server span, continuing an incoming `traceparent`.
+- DB statements, web3 RPC calls and Iris polls become child spans, but only
+  inside an existing trace, so background pollers don't emit orphan spans.
+- TransferPool tasks run in the submitter's context, and transfer jobs
+  store the enqueuing request's traceparent, so the worker's spans for a
+  payment join the trace of the request that started it, even in another
+  process.
+
+Disabled (TRACE_EXPORTER=none, the default) every helper is close to free.
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none').lower()  # none | stdout | file
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(tempfile.gettempdir(), 'usdc_gateway_traces.jsonl'))
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))  # For new root traces
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'usdc-gateway')
+ENABLED = TRACE_EXPORTER in ('stdout', 'file')
+
+_current = ContextVar('current_span', default=None)
+_export_lock = threading.Lock()
+_file = None
+_file_pid = None
+
+
+class Span:
+    """One timed operation. Use span() rather than constructing these directly."""
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'sampled', 'name', 'kind',
+                 'start_ns', 'end_ns', 'attributes', 'status', 'error')
+
+    def __init__(self, name, trace_id, parent_id, sampled, kind='internal', attributes=None, start_ns=None):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = 'UNSET'
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = 'ERROR'
+        self.error = f'{type(exc).__name__}: {exc}'
+
+    def end(self, end_ns=None):
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            if self.sampled:
+                _export(self)
+
+
+class _NoopSpan:
+    """Stand-in when tracing is disabled, so call sites need no checks."""
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self, end_ns=None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def parse_traceparent(header):
+    """(trace_id, parent span_id, sampled) from a W3C traceparent, or None if malformed."""
+    if not header:
+        return None
+    parts = header.strip().split('-')
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3][:2], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def current_span():
+    return _current.get()
+
+
+def current_traceparent():
+    """traceparent of the active span, to hand to work that runs elsewhere."""
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+def start_span(name, kind='internal', traceparent=None, root=True, start_ns=None, **attributes):
+    """
+    Create (but don't activate) a span under the current one, or under
+    `traceparent` when given. With root=False nothing is created outside a
+    trace. Returns NOOP_SPAN when tracing is off or nothing should be recorded.
+    """
+    if not ENABLED:
+        return NOOP_SPAN
+    parent = _current.get()
+    remote = parse_traceparent(traceparent) if traceparent else None
+    if remote:
+        trace_id, parent_id, sampled = remote
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    elif root:
+        trace_id, parent_id = '%032x' % random.getrandbits(128), None
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    else:
+        return NOOP_SPAN
+    return Span(name, trace_id, parent_id, sampled, kind=kind, attributes=attributes, start_ns=start_ns)
+
+
+def activate(span):
+    """Make span current; returns a token for deactivate()."""
+    if span is NOOP_SPAN:
+        return None
+    return _current.set(span)
+
+
+def deactivate(token):
+    if token is not None:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, kind='internal', traceparent=None, root=True, **attributes):
+    """Run a block inside a span; exceptions mark it as an error and propagate."""
+    s = start_span(name, kind=kind, traceparent=traceparent, root=root, **attributes)
+    token = activate(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        raise
+    finally:
+        deactivate(token)
+        s.end()
+
+
+def record_span(name, start_ns, end_ns, kind='internal', error=None, **attributes):
+    """Emit an already-finished child span (e.g. a timed DB statement) under the current span."""
+    if not ENABLED or _current.get() is None:
+        return
+    s = start_span(name, kind=kind, root=False, start_ns=start_ns, **attributes)
+    if error is not None:
+        s.record_exception(error)
+    s.end(end_ns)
+
+
+def bind(fn):
+    """Wrap fn to run in the caller's context (current span included), for thread handoff."""
+    if not ENABLED or _current.get() is None:
+        return fn
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def web3_middleware(chain_name):
+    """web3 middleware that wraps each JSON-RPC call in a client span."""
+    def middleware(make_request, w3):
+        def traced_request(method, params):
+            if not ENABLED or _current.get() is None:
+                return make_request(method, params)
+            with span(f'rpc {method}', kind='client', root=False,
+                      **{'rpc.system': 'jsonrpc', 'rpc.method': method, 'chain': chain_name}) as s:
+                response = make_request(method, params)
+                if isinstance(response, dict) and 'error' in response:
+                    s.status = 'ERROR'
+                    s.error = str(response['error'])
+                return response
+        return traced_request
+    return middleware
+
+
+def init_tracing(app):
+    """Open a server span per request, continuing an incoming traceparent."""
+    if not ENABLED:
+        return app
+    from flask import g, request
+
+    def start():
+        s = start_span(
+            f'{request.method} {request.url_rule.rule if request.url_rule else request.path}',
+            kind='server', traceparent=request.headers.get('traceparent'),
+            **{'http.method': request.method, 'http.target': request.path}
+        )
+        g._trace = (s, activate(s))
+
+    def finish_response(response):
+        state = g.get('_trace')
+        if state is not None:
+            state[0].set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                state[0].status = 'ERROR'
+            response.headers['traceresponse'] = state[0].traceparent
+        return response
+
+    def finish(exc):
+        state = g.pop('_trace', None)
+        if state is not None:
+            s, token = state
+            if exc is not None:
+                s.record_exception(exc)
+            deactivate(token)
+            s.end()
+
+    app.before_request_funcs.setdefault(None, []).insert(0, start)
+    app.after_request(finish_response)
+    app.teardown_request(finish)
+    return app
+
+
+def _to_record(s):
+    record = {
+        'traceId': s.trace_id,
+        'spanId': s.span_id,
+        'parentSpanId': s.parent_id,
+        'name': s.name,
+        'kind': s.kind.upper(),
+        'startTimeUnixNano': s.start_ns,
+        'endTimeUnixNano': s.end_ns,
+        'durationMs': round((s.end_ns - s.start_ns) / 1e6, 3),
+        'attributes': s.attributes,
+        'status': {'code': s.status},
+        'resource': {'service.name': TRACE_SERVICE_NAME, 'process.pid': os.getpid()},
+    }
+    if s.error:
+        record['status']['message'] = s.error
+    return record
+
+
+def _export(s):
+    line = json.dumps(_to_record(s), default=str)
+    global _file, _file_pid
+    with _export_lock:
+        if TRACE_EXPORTER == 'stdout':
+            print(line, flush=True)
+            return
+        try:
+            # Reopen after fork so workers don't share a file position
+            if _file is None or _file_pid != os.getpid():
+                _file = open(TRACE_FILE, 'a', buffering=1)
+                _file_pid = os.getpid()
+            _file.write(line + '\n')
+        except OSError as e:
+            print(f"[TRACE] Could not write span: {e}")
@@ -0,0 +1,128 @@
+"""
+Bounded worker pool for background transfer processing.
+
+A fixed number of worker threads drain a bounded priority queue. When the
+queue is full, submit() raises PoolFull so the API can answer 429 with
+Retry-After instead of spawning one thread per request.
+"""
+
+import itertools
+import math
+import os
+import queue
+import threading
+import time
+from .metrics import counter, gauge, histogram
+from . import tracing
+
+TRANSFER_WORKERS = int(os.getenv('TRANSFER_WORKERS', '8'))
+TRANSFER_QUEUE_SIZE = int(os.getenv('TRANSFER_QUEUE_SIZE', '100'))
+
+queue_depth = gauge('transfer_queue_depth', 'Transfers waiting for a worker')
+active_workers = gauge('transfer_active_workers', 'Transfer workers currently busy')
+queue_wait = histogram('transfer_queue_wait_seconds', 'Time a transfer waited in the queue', ['priority_class'])
+run_time = histogram('transfer_run_seconds', 'Time a worker spent processing a transfer')
+rejected = counter('transfer_rejected_total', 'Transfers rejected because the queue was full')
+
+
+class PoolFull(Exception):
+    """Raised when the transfer queue is at capacity."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Transfer queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TransferPool:
+    """Fixed-size thread pool with a bounded queue, served lowest sort_key first."""
+
+    def __init__(self, workers=TRANSFER_WORKERS, queue_size=TRANSFER_QUEUE_SIZE, name='transfer'):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.name = name
+        self._queue = queue.PriorityQueue(maxsize=queue_size)
+        self._sequence = itertools.count()  # FIFO tie-break for equal sort keys
+        self._lock = threading.Lock()
+        self._threads = []
+        self._active = 0
+        self._avg_run_time = 30.0  # EWMA seed, roughly one attestation wait
+
+    def submit(self, fn, *args, sort_key=None, priority_class='normal'):
+        """
+        Queue fn(*args) for a worker. Lower sort_key runs first (default: FIFO
+        by submission time). Raises PoolFull when saturated.
+        """
+        self._ensure_started()
+        if sort_key is None:
+            sort_key = time.time()
+        # Run in the submitter's trace context
+        item = (sort_key, next(self._sequence), time.monotonic(), priority_class, tracing.bind(fn), args)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            rejected.inc()
+            raise PoolFull(self.retry_after())
+
+    def retry_after(self, backlog=None):
+        """Seconds until a queue slot is likely to free up (for Retry-After)."""
+        if backlog is None:
+            backlog = self._queue.qsize() + 1
+        estimate = self._avg_run_time * backlog / max(self.workers, 1)
+        return max(1, min(int(math.ceil(estimate)), 300))
+
+    def available_slots(self):
+        """Workers that would pick up a new task immediately."""
+        with self._lock:
+            return max(self.workers - self._active - self._queue.qsize(), 0)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'active_workers': self._active,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self.queue_size
+        }
+
+    def _ensure_started(self):
+        # Threads start lazily so importing the module never spawns them
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'{self.name}-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, enqueued_at, priority_class, fn, args = self._queue.get()
+            started = time.monotonic()
+            queue_wait.observe(started - enqueued_at, priority_class=priority_class)
+            with self._lock:
+                self._active += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[POOL] {self.name} task failed: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                run_time.observe(elapsed)
+                with self._lock:
+                    self._active -= 1
+                    self._avg_run_time = 0.8 * self._avg_run_time + 0.2 * elapsed
+                self._queue.task_done()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_transfer_pool():
+    """Get the process-wide transfer pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TransferPool()
+            queue_depth.set_function(lambda: _pool._queue.qsize())
+            active_workers.set_function(lambda: _pool._active)
+        return _pool
@@ -0,0 +1,346 @@
+"""
+Transfer pipeline and durable job worker.
+
+initiate_transfer enqueues a row in transfer_jobs; a TransferWorker (embedded
+in the dev server or run standalone via `python -m api.worker`) claims due
+jobs in priority order (see utils.priority), runs the pipeline on a bounded
+TransferPool, renews leases while jobs run and retries failures with backoff.
+Web and worker capacity scale independently because the queue lives in the
+database.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from .db import (
+    get_payment, update_payment, enqueue_transfer_job, count_pending_transfer_jobs,
+    claim_transfer_jobs, renew_transfer_job_leases, complete_transfer_job,
+    fail_transfer_job, reap_expired_transfer_jobs, get_active_payments
+)
+from .metrics import counter, histogram
+from . import tracing
+from .transfer_pool import get_transfer_pool, PoolFull
+
+TRANSFER_MAX_PENDING_JOBS = int(os.getenv('TRANSFER_MAX_PENDING_JOBS', '1000'))
+TRANSFER_MAX_ATTEMPTS = int(os.getenv('TRANSFER_MAX_ATTEMPTS', '5'))
+JOB_LEASE_SECONDS = int(os.getenv('TRANSFER_JOB_LEASE_SECONDS', '60'))
+JOB_POLL_INTERVAL = float(os.getenv('TRANSFER_JOB_POLL_INTERVAL', '2'))
+STAGE_TIMEOUT = int(os.getenv('TRANSFER_STAGE_TIMEOUT', '3600'))  # Fail payments stuck this long
+SWEEP_BATCH_SIZE = int(os.getenv('SWEEP_BATCH_SIZE', '25'))
+SWEEP_TIME_BUDGET = float(os.getenv('SWEEP_TIME_BUDGET', '20'))  # Netlify scheduled functions get 30s
+SWEEP_CONCURRENCY = int(os.getenv('SWEEP_CONCURRENCY', '8'))
+SWEEPER_ID = 'sweeper'
+
+jobs_finished = counter('transfer_jobs_total', 'Transfer jobs finished by outcome', ['outcome'])
+job_queue_latency = histogram(
+    'transfer_job_queue_latency_seconds',
+    'Time from a transfer job becoming due to a worker starting it',
+    ['priority_class']
+)
+
+
+def process_transfer_async(payment_id, burn_tx_hash, source_chain, dest_chain, user_id=None):
+    """
+    Fetch attestation and move the payment to ready_to_mint.
+    Runs on a transfer worker; raises on failure so the job can be retried.
+    A retry resumes from the payment's current status rather than starting over.
+    """
+    from .cctp_handler import CCTPHandler  # web3 loads only where transfers actually run
+    payment = get_payment(payment_id) or {}
+    status = payment.get('status', 'pending')
+    if status in ('ready_to_mint', 'completed', 'failed'):
+        return  # Finished by an earlier attempt or the sweeper
+    handler = CCTPHandler(source_chain, dest_chain)
+
+    # Wait for burn confirmation, so time in 'burning' is the on-chain wait
+    if status == 'pending':
+        update_payment(payment_id, user_id=user_id, status='burning', burn_tx_hash=burn_tx_hash)
+    message_hash = _stored_message_hash(payment) if status == 'fetching_attestation' else None
+    if not message_hash:
+        message_hash = handler.wait_for_burn(burn_tx_hash)
+
+    # Fetch attestation from Circle
+    if status != 'fetching_attestation':
+        update_payment(payment_id, user_id=user_id, status='fetching_attestation',
+                       metadata=json.dumps({'message_hash': message_hash}))
+    attestation = handler.fetch_attestation(burn_tx_hash, message_hash=message_hash)
+
+    # Mark as ready for minting
+    update_payment(
+        payment_id,
+        user_id=user_id,
+        status='ready_to_mint',
+        metadata=str(attestation)
+    )
+
+
+def advance_transfer(payment):
+    """
+    Advance an in-flight payment by at most one step without blocking:
+    burning -> fetching_attestation once the burn is mined, and
+    fetching_attestation -> ready_to_mint once Circle has attested.
+    Progress is persisted, so the next call resumes where this one stopped.
+    Returns the payment's status after the step.
+    """
+    with tracing.span('transfer.advance', **{'payment.id': payment['payment_id'],
+                                              'payment.status': payment['status']}):
+        return _advance_transfer(payment)
+
+
+def _advance_transfer(payment):
+    status = payment['status']
+    updated_at = datetime.fromisoformat(payment['updated_at']) if payment.get('updated_at') else None
+    if updated_at and (datetime.utcnow() - updated_at).total_seconds() > STAGE_TIMEOUT:
+        update_payment(payment['payment_id'], status='failed', metadata=f'Timed out in {status}')
+        return 'failed'
+
+    from .cctp_handler import CCTPHandler
+    handler = CCTPHandler(payment['source_chain'], payment['dest_chain'])
+    try:
+        if status == 'burning':
+            # Receipt check: one lookup, then served by the block-head tracker
+            message_hash = handler.get_burn_message_hash(payment['burn_tx_hash'])
+            if not message_hash:
+                return status
+            update_payment(
+                payment['payment_id'],
+                status='fetching_attestation',
+                metadata=json.dumps({'message_hash': message_hash})
+            )
+            return 'fetching_attestation'
+
+        if status == 'fetching_attestation':
+            message_hash = _stored_message_hash(payment)
+            if not message_hash:
+                message_hash = handler.get_burn_message_hash(payment['burn_tx_hash'])
+                if not message_hash:
+                    return status
+            # Attestation check: a single Iris request
+            attestation = handler.check_attestation(message_hash)
+            if not attestation:
+                return status
+            update_payment(payment['payment_id'], status='ready_to_mint', metadata=str(attestation))
+            return 'ready_to_mint'
+    except ValueError as e:
+        # Reverted burn or attestation error status - no point retrying
+        update_payment(payment['payment_id'], status='failed', metadata=str(e))
+        return 'failed'
+
+    return status
+
+
+def _stored_message_hash(payment):
+    try:
+        return json.loads(payment.get('metadata') or '{}').get('message_hash')
+    except (ValueError, AttributeError):
+        return None
+
+
+def sweep_payments(batch_size=SWEEP_BATCH_SIZE, time_budget=SWEEP_TIME_BUDGET,
+                   concurrency=SWEEP_CONCURRENCY):
+    """
+    One sweeper pass for deployments without long-running workers.
+
+    Hands queued transfer jobs over to the step machine, then advances a
+    bounded batch of in-flight payments one step each, stopping when the
+    time budget runs out. Returns counts for logging.
+    """
+    deadline = time.monotonic() + time_budget
+    summary = {'handed_off': 0, 'checked': 0, 'advanced': 0, 'failed': 0, 'skipped': 0}
+
+    # Queued jobs: record the burn and let the step machine take it from here
+    for job in claim_transfer_jobs(SWEEPER_ID, limit=batch_size, lease_seconds=int(time_budget) + 30):
+        update_payment(job['payment_id'], user_id=job['user_id'], status='burning',
+                       burn_tx_hash=job['burn_tx_hash'])
+        complete_transfer_job(job['job_id'], SWEEPER_ID)
+        summary['handed_off'] += 1
+
+    payments = get_active_payments(limit=batch_size)
+    if not payments:
+        return summary
+
+    with tracing.span('transfer.sweep', **{'sweep.payments': len(payments)}):
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = {executor.submit(tracing.bind(advance_transfer), p): p for p in payments}
+        done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        # Don't wait past the budget; steps are idempotent, so anything cut off
+        # is simply retried on the next sweep
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary['skipped'] = len(not_done)
+    for future in done:
+        summary['checked'] += 1
+        try:
+            new_status = future.result()
+        except Exception as e:
+            # RPC/Iris hiccup - try again on the next sweep
+            print(f"[SWEEP] {futures[future]['payment_id']}: {e}")
+            continue
+        if new_status == 'failed':
+            summary['failed'] += 1
+        elif new_status != futures[future]['status']:
+            summary['advanced'] += 1
+    return summary
+
+
+def submit_transfer(payment_id, burn_tx_hash, source_chain, dest_chain, user_id=None):
+    """
+    Enqueue a transfer job. Raises PoolFull when the durable backlog is at
+    TRANSFER_MAX_PENDING_JOBS so the API can answer 429.
+    """
+    pending = count_pending_transfer_jobs()
+    if pending >= TRANSFER_MAX_PENDING_JOBS:
+        raise PoolFull(get_transfer_pool().retry_after(backlog=pending))
+
+    job_id = enqueue_transfer_job(
+        payment_id, burn_tx_hash, source_chain, dest_chain,
+        user_id=user_id, max_attempts=TRANSFER_MAX_ATTEMPTS
+    )
+    if _embedded_worker:
+        _embedded_worker.wake()
+    return job_id
+
+
+class TransferWorker:
+    """Claims transfer jobs from the database and runs them on a TransferPool."""
+
+    def __init__(self, pool=None, worker_id=None, poll_interval=JOB_POLL_INTERVAL,
+                 lease_seconds=JOB_LEASE_SECONDS):
+        self.pool = pool or get_transfer_pool()
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._last_renewal = time.monotonic()
+        self._thread = None
+
+    def wake(self):
+        """Claim immediately instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    def start(self):
+        """Run the claim loop in a background thread (embedded mode)."""
+        self._thread = threading.Thread(target=self.run_forever, name='transfer-job-worker', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def inflight(self):
+        with self._lock:
+            return len(self._inflight)
+
+    def drain(self, timeout=None):
+        """Wait for in-flight jobs to finish. Returns True if all finished."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.inflight():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def run_forever(self):
+        print(f"[WORKER] {self.worker_id} started")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Database hiccups shouldn't kill the worker
+                print(f"[WORKER] Claim loop error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+        print(f"[WORKER] {self.worker_id} stopped")
+
+    def run_once(self):
+        """Renew leases, reap dead jobs and claim what the pool can start now."""
+        self._renew_leases()
+
+        for job in reap_expired_transfer_jobs():
+            jobs_finished.inc(outcome='dead')
+            update_payment(job['payment_id'], user_id=job['user_id'], status='failed',
+                           metadata=job['last_error'])
+
+        jobs = claim_transfer_jobs(self.worker_id, limit=self.pool.available_slots(),
+                                   lease_seconds=self.lease_seconds)
+        for job in jobs:
+            with self._lock:
+                self._inflight.add(job['job_id'])
+            scheduled_at = job['scheduled_at'] or job['run_after']
+            try:
+                self.pool.submit(
+                    self._run_job, job,
+                    sort_key=scheduled_at.timestamp(),
+                    priority_class=job['priority_class'] or 'normal'
+                )
+            except PoolFull:
+                # Lease will lapse and another worker (or we) will pick it up
+                with self._lock:
+                    self._inflight.discard(job['job_id'])
+        return len(jobs)
+
+    def _renew_leases(self):
+        if time.monotonic() - self._last_renewal < self.lease_seconds / 3:
+            return
+        with self._lock:
+            job_ids = list(self._inflight)
+        renew_transfer_job_leases(self.worker_id, job_ids, self.lease_seconds)
+        self._last_renewal = time.monotonic()
+
+    def _run_job(self, job):
+        job_queue_latency.observe(
+            max((datetime.utcnow() - job['run_after']).total_seconds(), 0),
+            priority_class=job['priority_class'] or 'normal'
+        )
+        # Continue the trace of the request that enqueued the job
+        span = tracing.start_span(
+            'transfer.job', kind='consumer', traceparent=job.get('traceparent'),
+            **{'payment.id': job['payment_id'], 'job.id': job['job_id'], 'job.attempt': job['attempts'],
+               'chain.source': job['source_chain'], 'chain.dest': job['dest_chain']}
+        )
+        token = tracing.activate(span)
+        try:
+            process_transfer_async(
+                job['payment_id'], job['burn_tx_hash'],
+                job['source_chain'], job['dest_chain'], job['user_id']
+            )
+            complete_transfer_job(job['job_id'], self.worker_id)
+            jobs_finished.inc(outcome='done')
+        except Exception as e:
+            span.record_exception(e)
+            # ValueError means a reverted or misrouted burn or an Iris error
+            # status: retrying can't help, so fail at once like advance_transfer
+            outcome = fail_transfer_job(job['job_id'], self.worker_id, e, permanent=isinstance(e, ValueError))
+            jobs_finished.inc(outcome=outcome)
+            if outcome == 'retry':
+                print(f"[WORKER] Job {job['job_id']} attempt {job['attempts']} failed, will retry: {e}")
+            elif outcome == 'dead':
+                update_payment(job['payment_id'], user_id=job['user_id'], status='failed', metadata=str(e))
+            else:
+                # Lease lapsed and another worker holds the job; the payment is its to finish
+                print(f"[WORKER] Job {job['job_id']} failed after losing its lease: {e}")
+        finally:
+            tracing.deactivate(token)
+            span.end()
+            with self._lock:
+                self._inflight.discard(job['job_id'])
+
+
+_embedded_worker = None
+
+
+def start_embedded_worker():
+    """Start a TransferWorker inside this process (dev server / single node)."""
+    global _embedded_worker
+    if _embedded_worker is None:
+        _embedded_worker = TransferWorker().start()
+    return _embedded_worker
@@ -0,0 +1,254 @@
+"""
+Webhook delivery for payment status changes.
+
+update_payment writes a webhook_deliveries row (outbox) for each of the
+owner's endpoints in the same transaction as the status change; repeated
+transitions of a payment coalesce into its pending row. A WebhookDispatcher
+(embedded next to the transfer worker, in `python -m api.worker`, or one
+pass per run of the Netlify sweeper) leases due rows, groups them per
+endpoint and POSTs batches of up to WEBHOOK_BATCH_SIZE events over a pooled
+HTTP session. Failed batches back off exponentially and are dead-lettered
+after WEBHOOK_MAX_ATTEMPTS (see db.py); dead deliveries can be retried via the API.
+
+Each request is signed: X-Webhook-Signature: t=<unix time>,v1=<hex HMAC-SHA256
+of "<t>.<body>" keyed with the endpoint secret>. verify_signature() is the
+reference check (see api/webhook_sink.py).
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from .db import (
+    claim_webhook_deliveries, complete_webhook_deliveries, fail_webhook_deliveries
+)
+from .metrics import counter, histogram
+from . import tracing
+
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '50'))  # Events per POST
+WEBHOOK_CONCURRENCY = int(os.getenv('WEBHOOK_CONCURRENCY', '8'))  # Endpoints posted to in parallel
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '5'))
+WEBHOOK_BACKOFF_BASE = int(os.getenv('WEBHOOK_BACKOFF_BASE', '10'))
+WEBHOOK_BACKOFF_MAX = int(os.getenv('WEBHOOK_BACKOFF_MAX', '3600'))
+WEBHOOK_POLL_INTERVAL = float(os.getenv('WEBHOOK_POLL_INTERVAL', '1'))
+WEBHOOK_MAX_ENDPOINTS = int(os.getenv('WEBHOOK_MAX_ENDPOINTS', '5'))  # Per user
+# Seconds the Netlify sweeper spends on webhooks after advancing transfers
+WEBHOOK_SWEEP_BUDGET = float(os.getenv('WEBHOOK_SWEEP_BUDGET', '3'))
+# Private/loopback targets are refused unless allowed (local sink testing)
+WEBHOOK_ALLOW_PRIVATE_URLS = os.getenv('WEBHOOK_ALLOW_PRIVATE_URLS', 'false').lower() == 'true'
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+SIGNATURE_TOLERANCE = 300  # Seconds a signed timestamp stays valid
+
+PAYMENT_STATUSES = ('burning', 'fetching_attestation', 'ready_to_mint', 'completed', 'failed')
+LEASE_SECONDS = int(WEBHOOK_TIMEOUT * 2 + 30)
+
+deliveries_total = counter('webhook_deliveries_total', 'Webhook events by delivery outcome', ['outcome'])
+request_seconds = histogram('webhook_request_seconds', 'Time to POST one webhook batch')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def generate_secret():
+    return 'whsec_' + secrets.token_hex(24)
+
+
+def sign(secret, body, timestamp=None):
+    """Signature header value for a request body (bytes)."""
+    timestamp = int(timestamp or time.time())
+    mac = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={mac}'
+
+
+def verify_signature(secret, body, header, tolerance=SIGNATURE_TOLERANCE):
+    """True if header is a valid, fresh signature of body under secret."""
+    try:
+        parts = dict(item.split('=', 1) for item in (header or '').split(','))
+        timestamp = int(parts['t'])
+    except (ValueError, KeyError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    expected = sign(secret, body, timestamp).split('v1=', 1)[1]
+    return hmac.compare_digest(expected, parts.get('v1', ''))
+
+
+def validate_url(url):
+    """Raise ValueError unless url is an http(s) URL we are willing to POST to."""
+    parsed = urlparse(url or '')
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('Webhook url must be an absolute http(s) URL')
+    if WEBHOOK_ALLOW_PRIVATE_URLS:
+        return
+    if parsed.scheme != 'https':
+        raise ValueError('Webhook url must use https')
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or 443)}
+    except socket.gaierror:
+        raise ValueError(f'Cannot resolve {parsed.hostname}')
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast:
+            raise ValueError('Webhook url must resolve to a public address')
+
+
+def parse_endpoint_request(data):
+    """(url, events) from a POST /api/webhooks body; raises ValueError if invalid."""
+    if not isinstance(data, dict) or not isinstance(data.get('url'), str):
+        raise ValueError('Missing required field: url')
+    events = data.get('events')
+    if events is not None:
+        if not isinstance(events, list) or not events:
+            raise ValueError('events must be a non-empty list of payment statuses')
+        unknown = sorted(set(events) - set(PAYMENT_STATUSES))
+        if unknown:
+            raise ValueError(f"Unknown event(s): {', '.join(map(str, unknown))}")
+    url = data['url'].strip()
+    validate_url(url)
+    return url, events
+
+
+def get_session():
+    """Process-wide HTTP session: keep-alive connections are reused across batches."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=WEBHOOK_CONCURRENCY * 2,
+                                  pool_maxsize=WEBHOOK_CONCURRENCY * 2, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'usdc-gateway-webhooks/1'
+            _session = session
+    return _session
+
+
+def build_body(deliveries):
+    """Batch body: one event per delivery, newest payment snapshot each."""
+    return json.dumps({
+        'id': str(uuid.uuid4()),
+        'type': 'payment.status.batch',
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'events': [{
+            'id': d['delivery_id'],
+            'type': 'payment.status',
+            'attempt': d['attempts'],
+            'payment': json.loads(d['payload'])
+        } for d in deliveries]
+    }, separators=(',', ':')).encode()
+
+
+def post_batch(url, secret, deliveries):
+    """POST one signed batch. Raises on network errors and non-2xx responses."""
+    validate_url(url)  # Re-checked at send time: DNS may have changed since registration
+    body = build_body(deliveries)
+    started = time.monotonic()
+    with tracing.span('webhook.post', kind='client', root=False, **{'http.url': url, 'webhook.events': len(deliveries)}) as span:
+        response = get_session().post(url, data=body, timeout=WEBHOOK_TIMEOUT, allow_redirects=False, headers={
+            'Content-Type': 'application/json',
+            SIGNATURE_HEADER: sign(secret, body)
+        })
+        span.set_attribute('http.status_code', response.status_code)
+    request_seconds.observe(time.monotonic() - started)
+    if not 200 <= response.status_code < 300:
+        raise RuntimeError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+
+class WebhookDispatcher:
+    """Leases due deliveries and sends them as per-endpoint batches."""
+
+    def __init__(self, worker_id=None, poll_interval=WEBHOOK_POLL_INTERVAL,
+                 batch_size=WEBHOOK_BATCH_SIZE, concurrency=WEBHOOK_CONCURRENCY):
+        self.worker_id = worker_id or f'webhooks:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='webhook')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='webhook-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        print(f"[WEBHOOK] {self.worker_id} started")
+        while not self._stop.is_set():
+            try:
+                sent = self.run_once()
+            except Exception as e:
+                print(f"[WEBHOOK] Dispatch loop error: {e}")
+                sent = 0
+            if not sent:
+                self._stop.wait(self.poll_interval)
+        print(f"[WEBHOOK] {self.worker_id} stopped")
+
+    def run_once(self):
+        """Send one round of batches. Returns the number of events attempted."""
+        deliveries = claim_webhook_deliveries(self.worker_id, limit=self.batch_size * self.concurrency,
+                                              lease_seconds=LEASE_SECONDS)
+        if not deliveries:
+            return 0
+        by_endpoint = {}
+        for delivery in deliveries:
+            by_endpoint.setdefault(delivery['endpoint_id'], []).append(delivery)
+        batches = [group[i:i + self.batch_size]
+                   for group in by_endpoint.values()
+                   for i in range(0, len(group), self.batch_size)]
+        for future in [self._executor.submit(self._send, batch) for batch in batches]:
+            future.result()
+        return len(deliveries)
+
+    def _send(self, batch):
+        ids = [d['delivery_id'] for d in batch]
+        try:
+            post_batch(batch[0]['url'], batch[0]['secret'], batch)
+        except Exception as e:
+            dead = fail_webhook_deliveries(ids, self.worker_id, e, backoff_base=WEBHOOK_BACKOFF_BASE,
+                                           backoff_max=WEBHOOK_BACKOFF_MAX)
+            deliveries_total.inc(len(ids) - dead, outcome='retry')
+            deliveries_total.inc(dead, outcome='dead')
+            print(f"[WEBHOOK] Batch of {len(ids)} to {batch[0]['url']} failed ({dead} dead-lettered): {e}")
+            return
+        complete_webhook_deliveries(ids, self.worker_id)
+        deliveries_total.inc(len(ids), outcome='delivered')
+
+
+def dispatch_webhooks(time_budget=WEBHOOK_SWEEP_BUDGET):
+    """Send due webhooks until none are left or time_budget seconds pass (serverless sweeper)."""
+    # Unique per run: overlapping sweeper runs must not complete each other's leases
+    dispatcher = WebhookDispatcher(worker_id=f'sweeper-webhooks:{uuid.uuid4().hex[:8]}', concurrency=4)
+    deadline = time.monotonic() + time_budget
+    sent = 0
+    while time.monotonic() < deadline:
+        count = dispatcher.run_once()
+        if not count:
+            break
+        sent += count
+    return sent
+
+
+_embedded_dispatcher = None
+
+
+def start_embedded_dispatcher():
+    """Run a WebhookDispatcher inside this process (dev server / gunicorn background process)."""
+    global _embedded_dispatcher
+    if _embedded_dispatcher is None:
+        _embedded_dispatcher = WebhookDispatcher().start()
+    return _embedded_dispatcher
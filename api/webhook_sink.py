@@ -0,0 +1,78 @@
+"""
+Local webhook receiver for development and testing.
+
+Verifies X-Webhook-Signature, prints each event and answers 200, or a
+configurable share of 500s to exercise retries and dead-lettering:
+
+    python api/webhook_sink.py --secret whsec_... --port 9000 --fail-rate 0.3
+
+Register it with WEBHOOK_ALLOW_PRIVATE_URLS=true set on the server:
+
+    POST /api/webhooks {"url": "http://127.0.0.1:9000/hook"}
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.webhooks import verify_signature, SIGNATURE_HEADER  # noqa: E402
+
+
+def make_handler(secret, fail_rate, received):
+    class SinkHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if secret and not verify_signature(secret, body, self.headers.get(SIGNATURE_HEADER)):
+                print('[SINK] Rejected: bad signature')
+                return self._reply(401)
+            if random.random() < fail_rate:
+                print('[SINK] Failing batch on purpose')
+                return self._reply(500)
+            batch = json.loads(body)
+            received.append(batch)
+            for event in batch['events']:
+                payment = event['payment']
+                print(f"[SINK] event {event['id']} (attempt {event['attempt']}): "
+                      f"{payment['payment_id']} -> {payment['status']}")
+            self._reply(200)
+
+        def _reply(self, code):
+            self.send_response(code)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return SinkHandler
+
+
+def serve(port=9000, secret=None, fail_rate=0.0, received=None):
+    """Start the sink; returns the server (call serve_forever or run it in a thread)."""
+    received = received if received is not None else []
+    return ThreadingHTTPServer(('127.0.0.1', port), make_handler(secret, fail_rate, received))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local webhook sink')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--secret', help='Endpoint secret; signatures are checked when given')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of batches answered with 500')
+    args = parser.parse_args(argv)
+
+    server = serve(args.port, args.secret, args.fail_rate)
+    print(f"[SINK] Listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
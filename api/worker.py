@@ -0,0 +1,82 @@
+"""
+Standalone transfer worker.
+
+Claims jobs from the transfer_jobs table and runs the transfer pipeline.
+Run as many workers as needed, on any node that can reach the database:
+
+    python -m api.worker --concurrency 8
+
+Each worker also delivers queued webhooks unless started with --no-webhooks.
+With --metrics-port (or WORKER_METRICS_PORT) it serves its job, stage and
+webhook metrics at GET /metrics for Prometheus:
+
+    python -m api.worker --metrics-port 9101 --metrics-host 0.0.0.0
+"""
+
+import argparse
+import os
+import signal
+import sys
+from dotenv import load_dotenv
+
+# Add api directory to path so utils resolves like in server.py
+sys.path.insert(0, os.path.dirname(__file__))
+
+load_dotenv()
+
+from utils.transfer_pool import TransferPool, TRANSFER_WORKERS
+from utils.transfers import TransferWorker, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS
+from utils.webhooks import WebhookDispatcher
+from utils.metrics import start_metrics_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='USDC gateway transfer worker')
+    parser.add_argument('--concurrency', type=int, default=TRANSFER_WORKERS,
+                        help='Transfers processed in parallel')
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+                        help='Seconds between queue polls when idle')
+    parser.add_argument('--lease', type=int, default=JOB_LEASE_SECONDS,
+                        help='Job lease in seconds (renewed while running)')
+    parser.add_argument('--drain-timeout', type=float, default=30,
+                        help='Seconds to wait for in-flight jobs on shutdown')
+    parser.add_argument('--worker-id', help='Worker identifier (default: host:pid:random)')
+    parser.add_argument('--no-webhooks', action='store_true',
+                        help="Don't deliver webhooks from this worker")
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('WORKER_METRICS_PORT', '0')),
+                        help='Serve GET /metrics on this port (0 = off)')
+    parser.add_argument('--metrics-host', default=os.getenv('WORKER_METRICS_HOST', '127.0.0.1'),
+                        help='Address for the metrics listener; set METRICS_TOKEN when not loopback')
+    args = parser.parse_args(argv)
+
+    pool = TransferPool(workers=args.concurrency, queue_size=args.concurrency, name='worker')
+    worker = TransferWorker(
+        pool=pool,
+        worker_id=args.worker_id,
+        poll_interval=args.poll_interval,
+        lease_seconds=args.lease
+    )
+
+    dispatcher = None if args.no_webhooks else WebhookDispatcher().start()
+    metrics_server = start_metrics_server(args.metrics_port, args.metrics_host) if args.metrics_port else None
+
+    def shutdown(signum, frame):
+        print(f"[WORKER] Received signal {signum}, finishing in-flight jobs...")
+        worker.stop()
+        if dispatcher:
+            dispatcher.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    worker.run_forever()
+    if not worker.drain(args.drain_timeout):
+        # Unfinished jobs keep their lease until it expires, then get reclaimed
+        print(f"[WORKER] {worker.inflight()} job(s) still running, leaving them to lease expiry")
+    if metrics_server:
+        metrics_server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Production WSGI entry point.
+
+    cd api && gunicorn -c gunicorn.conf.py wsgi:app
+
+server.py's `app.run()` is only for local development. Under a pre-forking
+server every worker process gets the same app, so process-level state needs
+care (the hooks in gunicorn.conf.py call into this module):
+
+- after_fork(): drops database connections inherited from the master, so
+  each worker opens its own pool instead of sharing sockets.
+- start_background_services(): the embedded transfer worker (job claim
+  loop, attestation polling, block-head trackers) and the webhook
+  dispatcher run in exactly one process per host, chosen by an exclusive
+  file lock. The other workers keep retrying the lock, so if that process
+  dies another takes over. That process also serves GET /metrics on
+  BACKGROUND_METRICS_PORT: the job, stage and webhook series are recorded
+  only there, and an /api/metrics scrape lands on a random worker.
+- stop_background_services(): lets in-flight transfer jobs finish on
+  shutdown; anything left is reclaimed when its lease expires.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from server import app  # noqa: E402
+
+EMBEDDED_TRANSFER_WORKER = os.getenv('EMBEDDED_TRANSFER_WORKER', 'true').lower() == 'true'
+BACKGROUND_LOCK_FILE = os.getenv(
+    'BACKGROUND_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'usdc_gateway_background.lock')
+)
+BACKGROUND_LOCK_RETRY = 5  # Seconds between attempts by processes that don't hold the lock
+BACKGROUND_METRICS_PORT = int(os.getenv('BACKGROUND_METRICS_PORT', '9101'))  # 0 = off
+BACKGROUND_METRICS_HOST = os.getenv('BACKGROUND_METRICS_HOST', '127.0.0.1')
+DRAIN_TIMEOUT = 20
+
+application = app
+
+_lock_fd = None
+_lock_thread = None
+_worker = None
+
+
+def after_fork():
+    """Discard pooled DB connections copied from the parent process."""
+    from utils.db import engine
+    # close=False leaves the parent's sockets alone; the child just forgets them
+    engine.dispose(close=False)
+
+
+def _try_lock():
+    global _lock_fd
+    import fcntl
+    fd = os.open(BACKGROUND_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _lock_fd = fd  # Held until the process exits
+    return True
+
+
+def _start_worker():
+    global _worker
+    from utils.transfers import start_embedded_worker
+    from utils.webhooks import start_embedded_dispatcher
+    from utils.metrics import start_metrics_server
+    print(f"[WSGI] Process {os.getpid()} runs background services")
+    _worker = start_embedded_worker()
+    start_embedded_dispatcher()
+    if BACKGROUND_METRICS_PORT:
+        try:
+            start_metrics_server(BACKGROUND_METRICS_PORT, BACKGROUND_METRICS_HOST)
+        except OSError as e:
+            print(f"[WSGI] Cannot serve metrics on port {BACKGROUND_METRICS_PORT}: {e}")
+
+
+def _wait_for_lock():
+    while not _try_lock():
+        time.sleep(BACKGROUND_LOCK_RETRY)
+    _start_worker()
+
+
+def start_background_services():
+    """Run background pollers here if this process wins (or later inherits) the host lock."""
+    global _lock_thread
+    if not EMBEDDED_TRANSFER_WORKER or _lock_thread is not None or _worker is not None:
+        return
+    if _try_lock():
+        _start_worker()
+        return
+    _lock_thread = threading.Thread(target=_wait_for_lock, name='background-lock', daemon=True)
+    _lock_thread.start()
+
+
+def stop_background_services(timeout=DRAIN_TIMEOUT):
+    if _worker is None:
+        return
+    _worker.stop()
+    if not _worker.drain(timeout):
+        print(f"[WSGI] {_worker.inflight()} transfer job(s) left to lease expiry")
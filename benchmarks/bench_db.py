@@ -0,0 +1,237 @@
+"""
+Benchmark the utils.db hot paths at several table sizes.
+
+Seeds the payments and audit_logs tables up to each size in turn (1k, 100k,
+1M rows by default), then times create_payment, update_payment,
+get_payment, get_recent_payments, log_audit and get_audit_logs, and reports
+ops/s, p50 and p99. Results can be saved as a JSON baseline and compared
+against a previous one, so changes to api/utils/db.py come with numbers.
+
+Runs against a throwaway SQLite file unless DATABASE_URL is set, in which
+case it writes to that database (use a scratch PostgreSQL instance).
+
+Usage:
+    python benchmarks/bench_db.py [--sizes 1000,100000,1000000] [--iterations 500]
+    python benchmarks/bench_db.py --save benchmarks/baseline-sqlite.json
+    python benchmarks/bench_db.py --compare benchmarks/baseline-sqlite.json [--threshold 0.2]
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if not os.getenv('DATABASE_URL'):
+    _tmp_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp_dir, 'bench_db.db')
+# Seeding and large scans would otherwise flood stdout with slow-query lines
+os.environ.setdefault('SLOW_QUERY_MS', '60000')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import sqlalchemy  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from utils import db  # noqa: E402
+
+USERS = 1000
+STATUSES = ('pending', 'burning', 'fetching_attestation', 'ready_to_mint', 'completed', 'failed')
+CHAINS = ('sepolia', 'base_sepolia', 'arbitrum_sepolia')
+SEED_CHUNK = 10000
+WARMUP = 50
+
+
+def user_id(i):
+    return f'bench-user-{i:04d}'
+
+
+def payment_id(i):
+    return f'bench-{i:09d}'
+
+
+def count_rows():
+    session = db.SessionLocal()
+    try:
+        total = session.query(func.count(db.Payment.payment_id)).scalar()
+        bench = session.query(func.count(db.Payment.payment_id)).filter(
+            db.Payment.payment_id.like('bench-0%')).scalar()  # Seeded rows only, not bench-new-*
+        return total, bench
+    finally:
+        session.close()
+
+
+def seed_users():
+    rows = [{'user_id': user_id(i), 'email': f'{user_id(i)}@bench.invalid', 'tier': 'standard'}
+            for i in range(USERS)]
+    insert = db.pg_insert if db._is_postgres() else db.sqlite_insert
+    with db.engine.begin() as conn:
+        conn.execute(insert(db.User.__table__).on_conflict_do_nothing(index_elements=['user_id']), rows)
+
+
+def seed_to(size):
+    """Top payments (and as many audit rows) up to `size`. Returns the number of bench payments."""
+    total, bench = count_rows()
+    missing = max(size - total, 0)
+    now = datetime.utcnow()
+    rng = random.Random(bench)
+    started = time.perf_counter()
+    for offset in range(0, missing, SEED_CHUNK):
+        payments, audits = [], []
+        for i in range(bench + offset, bench + min(offset + SEED_CHUNK, missing)):
+            created = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            owner = user_id(rng.randrange(USERS))
+            source = rng.choice(CHAINS)
+            payments.append({
+                'payment_id': payment_id(i), 'user_id': owner,
+                'amount_usd': round(rng.uniform(1, 5000), 2),
+                # CCTP transfers always cross chains
+                'source_chain': source, 'dest_chain': rng.choice([c for c in CHAINS if c != source]),
+                'sender_address': '0x' + '1' * 40, 'recipient_address': '0x' + '2' * 40,
+                'status': rng.choice(STATUSES), 'created_at': created, 'updated_at': created
+            })
+            audits.append({
+                'user_id': owner, 'action': 'create_payment', 'resource_type': 'payment',
+                'resource_id': payment_id(i), 'created_at': created
+            })
+        with db.engine.begin() as conn:
+            conn.execute(db.Payment.__table__.insert(), payments)
+            conn.execute(db.AuditLog.__table__.insert(), audits)
+    if missing:
+        print(f"  seeded {missing} payments in {time.perf_counter() - started:.1f}s")
+    return bench + missing
+
+
+def time_op(fn, iterations):
+    for _ in range(min(WARMUP, iterations)):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'ops_per_sec': round(len(timings) / sum(timings), 1),
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3)
+    }
+
+
+def build_ops(bench_payments):
+    rng = random.Random(42)
+    created = iter(range(10 ** 9))
+    statuses = ('burning', 'fetching_attestation')
+
+    def create():
+        db.create_payment(f'bench-new-{os.getpid()}-{time.time_ns()}-{next(created)}', 25.0,
+                          'sepolia', 'base_sepolia', '0x' + '1' * 40, '0x' + '2' * 40,
+                          user_id=user_id(rng.randrange(USERS)))
+
+    def update():
+        db.update_payment(payment_id(rng.randrange(bench_payments)), status=rng.choice(statuses))
+
+    return [
+        ('create_payment', create),
+        ('update_payment', update),
+        ('get_payment', lambda: db.get_payment(payment_id(rng.randrange(bench_payments)))),
+        ('get_recent_payments', lambda: db.get_recent_payments(limit=50)),
+        ('get_recent_payments(user)', lambda: db.get_recent_payments(limit=50, user_id=user_id(rng.randrange(USERS)))),
+        ('log_audit', lambda: db.log_audit(user_id=user_id(rng.randrange(USERS)), action='bench',
+                                           resource_type='payment', details='{}')),
+        ('get_audit_logs(user)', lambda: db.get_audit_logs(limit=100, user_id=user_id(rng.randrange(USERS)))),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print per-op change against a saved baseline. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline['meta']['dialect'] != results['meta']['dialect']:
+        print(f"\nWarning: baseline ran on {baseline['meta']['dialect']}, this run on {results['meta']['dialect']}")
+    regressions = 0
+    print(f"\n{'size':>8} {'operation':<26} {'ops/s':>10} {'base':>10} {'change':>8} {'p99 ms':>9} {'base':>9}")
+    for size, ops in results['results'].items():
+        for name, now in ops.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if not before:
+                continue
+            change = now['ops_per_sec'] / before['ops_per_sec'] - 1
+            flag = ''
+            if change < -threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print(f"{size:>8} {name:<26} {now['ops_per_sec']:>10.1f} {before['ops_per_sec']:>10.1f} "
+                  f"{change:>+7.0%} {now['p99_ms']:>9.3f} {before['p99_ms']:>9.3f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='Comma-separated payments table sizes')
+    parser.add_argument('--iterations', type=int, default=500, help='Timed calls per operation and size')
+    parser.add_argument('--save', help='Write results as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare against a JSON baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='ops/s drop (fraction) counted as a regression in --compare')
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    url = make_url(db.DATABASE_URL)
+    print(f"Database: {url.render_as_string(hide_password=True)}")
+    results = {
+        'meta': {
+            'dialect': db.engine.dialect.name,
+            'iterations': args.iterations,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'platform': platform.platform(),
+            'commit': git_commit(),
+            'created_at': datetime.utcnow().isoformat() + 'Z'
+        },
+        'results': {}
+    }
+
+    seed_users()
+    for size in sizes:
+        print(f"\n{size} payments")
+        bench_payments = seed_to(size)
+        if not bench_payments:
+            print('  no bench payments to read (table already larger than this size?), skipping')
+            continue
+        results['results'][str(size)] = {}
+        print(f"  {'operation':<26} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for name, fn in build_ops(bench_payments):
+            stats = time_op(fn, args.iterations)
+            results['results'][str(size)][name] = stats
+            print(f"  {name:<26} {stats['ops_per_sec']:>10.1f} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark the rate limiter's own overhead per request.
+
+Times a trivial Flask route with no limiter and with each storage/strategy
+combination, and reports p50/p99 latency plus the p50 overhead over the
+unlimited baseline.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [--requests 5000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from flask import Flask
+from flask_limiter import Limiter
+import utils.rate_limit  # noqa: F401 - registers the sqlite:// storage scheme
+
+
+def build_app(storage_uri=None, strategy=None):
+    app = Flask(__name__)
+
+    @app.route('/ping')
+    def ping():
+        return 'ok'
+
+    if storage_uri:
+        Limiter(
+            app=app,
+            key_func=lambda: 'bench-client',
+            default_limits=['1000000 per hour'],  # Never trips: we measure bookkeeping only
+            storage_uri=storage_uri,
+            strategy=strategy
+        )
+    return app
+
+
+def run_case(app, requests):
+    client = app.test_client()
+    for _ in range(min(200, requests)):  # Warm up
+        client.get('/ping')
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get('/ping')
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings) * 1e6, timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_ratelimit.db')
+    cases = [
+        ('no limiter', None, None),
+        ('memory fixed', 'memory://', 'fixed-window'),
+        ('memory moving', 'memory://', 'moving-window'),
+        ('sqlite fixed', f'sqlite:///{db_path}', 'fixed-window'),
+        ('sqlite moving', f'sqlite:///{db_path}', 'moving-window'),
+    ]
+
+    baseline = None
+    print(f"{'case':<16} {'p50 us':>9} {'p99 us':>9} {'overhead p50 us':>16}")
+    for name, uri, strategy in cases:
+        p50, p99 = run_case(build_app(uri, strategy), args.requests)
+        if baseline is None:
+            baseline = p50
+        print(f"{name:<16} {p50:>9.1f} {p99:>9.1f} {p50 - baseline:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark JSON serialization and compression for list endpoints.
+
+Serves 50/500/5000 payment rows (the shape returned by recent_payments)
+through the Flask test client with each response configuration and
+reports p50/p99 latency and bytes on the wire.
+
+Usage:
+    python benchmarks/bench_responses.py [--iterations 200] [--sizes 50,500,5000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from flask import Flask, jsonify
+from utils import responses
+from utils.responses import OrjsonProvider, compress_response
+
+
+def make_rows(count):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        created = now - timedelta(minutes=i)
+        rows.append({
+            'payment_id': str(uuid.uuid4()),
+            'user_id': str(uuid.uuid4()),
+            'amount_usd': round(1 + i * 1.37, 2),
+            'source_chain': 'sepolia',
+            'dest_chain': 'base_sepolia',
+            'sender_address': '0x' + '1' * 40,
+            'recipient_address': '0x' + '2' * 40,
+            'burn_tx_hash': '0x' + uuid.uuid4().hex * 2,
+            'mint_tx_hash': None,
+            'status': 'completed' if i % 3 else 'fetching_attestation',
+            'created_at': created.isoformat(),
+            'updated_at': (created + timedelta(seconds=90)).isoformat(),
+            'metadata': None
+        })
+    return rows
+
+
+def build_app(rows, fast_json, compress):
+    app = Flask(__name__)
+    if fast_json:
+        app.json = OrjsonProvider(app)
+    if compress:
+        app.after_request(compress_response)
+
+    @app.route('/rows')
+    def serve_rows():
+        return jsonify({'payments': rows}), 200
+
+    return app
+
+
+def run_case(rows, fast_json, compress, accept_encoding, iterations):
+    client = build_app(rows, fast_json, compress).test_client()
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get('/rows', headers=headers)
+        size = len(response.get_data())
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p99_index = min(len(timings) - 1, int(len(timings) * 0.99))
+    return statistics.median(timings) * 1000, timings[p99_index] * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sizes', default='50,500,5000')
+    args = parser.parse_args()
+
+    cases = [('stdlib json', False, False, None)]
+    if responses.orjson:
+        cases.append(('orjson', True, False, None))
+        cases.append(('orjson + gzip', True, True, 'gzip'))
+        if responses.brotli:
+            cases.append(('orjson + br', True, True, 'br, gzip'))
+    else:
+        print('orjson not installed - only the stdlib baseline will run')
+        cases.append(('stdlib + gzip', False, True, 'gzip'))
+
+    print(f"{'rows':>6}  {'case':<16} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>10}")
+    for count in (int(s) for s in args.sizes.split(',')):
+        rows = make_rows(count)
+        # Fewer iterations for big payloads keeps the run short without hurting p99 much
+        iterations = max(20, args.iterations * 50 // max(count, 50))
+        for name, fast_json, compress, accept in cases:
+            p50, p99, size = run_case(rows, fast_json, compress, accept, iterations)
+            print(f"{count:>6}  {name:<16} {p50:>8.2f} {p99:>8.2f} {size:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Import-time budget check for Netlify functions (cold-start regressions).
+
+Imports each netlify/functions/<name>/index.py in a fresh interpreter under
+`python -X importtime`, sums the reported import time, and fails if a
+function exceeds its budget or pulls in a heavy module it shouldn't need at
+import time (web3 anywhere; authlib/SQLAlchemy in session-only functions).
+
+Usage:
+    python benchmarks/import_budget.py [--scale 1.5] [--function auth_user]
+
+Exits non-zero on any violation, so it can run in CI. Budgets are in
+milliseconds on a typical laptop; use --scale (or IMPORT_BUDGET_SCALE) on
+slower machines.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FUNCTIONS_DIR = os.path.join(ROOT, 'netlify', 'functions')
+
+# Milliseconds of total import time allowed per function
+BUDGETS = {
+    'auth_user': 400,
+    'auth_logout': 400,
+    'auth_login': 700,
+    'auth_callback': 1200,
+    'check_status': 900,
+    'recent_payments': 900,
+    'create_payment': 900,
+    'initiate_transfer': 900,
+    'transfer_sweeper': 900,
+    'analytics': 900,
+    'webhooks': 900,
+}
+DEFAULT_BUDGET = 900
+
+# Top-level packages that must not be imported when the module loads
+ALWAYS_FORBIDDEN = ('web3', 'eth_account')
+FORBIDDEN = {
+    'auth_user': ('authlib', 'sqlalchemy'),
+    'auth_logout': ('authlib', 'sqlalchemy'),
+    'auth_login': ('sqlalchemy',),
+    'check_status': ('authlib',),
+    'recent_payments': ('authlib',),
+    'create_payment': ('authlib',),
+    'initiate_transfer': ('authlib',),
+    'transfer_sweeper': ('authlib',),
+    'analytics': ('authlib',),
+    'webhooks': ('authlib',),
+}
+
+
+def measure(function_dir):
+    """Return (total import ms, set of top-level modules imported)."""
+    env = dict(os.environ)
+    env.setdefault('FLASK_SECRET_KEY', 'import-budget-check')
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    code = f"import sys; sys.path.insert(0, {function_dir!r}); import index"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=function_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'import failed')
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=float(os.getenv('IMPORT_BUDGET_SCALE', '1')))
+    parser.add_argument('--function', action='append', help='Only check these functions')
+    args = parser.parse_args()
+
+    names = args.function or sorted(
+        name for name in os.listdir(FUNCTIONS_DIR)
+        if os.path.exists(os.path.join(FUNCTIONS_DIR, name, 'index.py'))
+    )
+
+    failures = []
+    print(f"{'function':<20} {'import ms':>10} {'budget ms':>10}  heavy modules")
+    for name in names:
+        budget = BUDGETS.get(name, DEFAULT_BUDGET) * args.scale
+        try:
+            total_ms, modules = measure(os.path.join(FUNCTIONS_DIR, name))
+        except RuntimeError as e:
+            failures.append(f'{name}: {e}')
+            continue
+        forbidden = sorted(m for m in ALWAYS_FORBIDDEN + FORBIDDEN.get(name, ()) if m in modules)
+        heavy = sorted(m for m in ('web3', 'authlib', 'sqlalchemy') if m in modules)
+        print(f"{name:<20} {total_ms:>10.0f} {budget:>10.0f}  {', '.join(heavy) or '-'}")
+        if total_ms > budget:
+            failures.append(f'{name}: {total_ms:.0f}ms exceeds budget {budget:.0f}ms')
+        if forbidden:
+            failures.append(f"{name}: imports {', '.join(forbidden)} at module load")
+
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('\nAll functions within budget.')
+
+
+if __name__ == '__main__':
+    main()
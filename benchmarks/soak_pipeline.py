@@ -0,0 +1,248 @@
+"""
+Soak the transfer pipeline with N transfers in flight.
+
+Injects N payments with synthetic burns on load_test/fake_chain.py (started
+in-process), enqueues a transfer job for each, and lets a real
+TransferWorker run process_transfer_async / CCTPHandler.fetch_attestation
+against the fake RPC and Iris until every payment reaches ready_to_mint or
+fails. Reports completions/s, end-to-end (created -> ready_to_mint) and
+service (burning -> ready_to_mint) p50/p99, peak thread count, peak RSS,
+DB commits and the RPC/Iris calls made per transfer.
+
+Runs on a throwaway SQLite file unless DATABASE_URL is set. No network or
+testnet access is needed.
+
+Usage:
+    python benchmarks/soak_pipeline.py [--transfers 500] [--concurrency 64]
+    python benchmarks/soak_pipeline.py --transfers 2000 --concurrency 256 \\
+        --rpc-latency 0.05 --iris-latency 0.15 --attestation-delay 20 --json soak.json
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+sys.path.insert(0, os.path.join(ROOT, 'load_test'))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transfers', type=int, default=500, help='Payments injected at once')
+    parser.add_argument('--concurrency', type=int, default=64, help='TransferPool worker threads')
+    parser.add_argument('--poll-interval', type=float, default=None,
+                        help='Job queue poll interval (default: TRANSFER_JOB_POLL_INTERVAL)')
+    parser.add_argument('--rpc-latency', type=float, default=0.05, help='Seconds per fake RPC answer')
+    parser.add_argument('--iris-latency', type=float, default=0.1, help='Seconds per fake Iris answer')
+    parser.add_argument('--block-time', type=float, default=1.0, help='Fake chain seconds per block')
+    parser.add_argument('--attestation-delay', type=float, default=10.0,
+                        help='Seconds after mining until Iris reports complete')
+    parser.add_argument('--revert-rate', type=float, default=0.0, help='Share of burns that revert')
+    parser.add_argument('--iris-error-rate', type=float, default=0.0, help='Share of Iris requests answered 500')
+    parser.add_argument('--timeout', type=float, default=900, help='Give up after this many seconds')
+    parser.add_argument('--port', type=int, default=8546, help='Port for the fake chain/Iris server')
+    parser.add_argument('--json', help='Write the report to this path')
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, tmp_dir):
+    """utils modules read their settings at import, so set them first."""
+    if not os.getenv('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp_dir, 'soak.db')
+    os.environ['CHAIN_CONFIG_FILE'] = os.path.join(tmp_dir, 'fake_chains.json')
+    os.environ['CIRCLE_IRIS_URL'] = f'http://127.0.0.1:{args.port}'
+    os.environ['TRANSFER_MAX_PENDING_JOBS'] = str(args.transfers + 1)
+    os.environ.setdefault('BLOCK_POLL_INTERVAL', str(max(args.block_time, 0.5)))
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+class Sampler:
+    """Tracks the peak thread count while the soak runs."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak_threads = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='soak-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+    configure_environment(args, tmp_dir)
+
+    from sqlalchemy import event, func
+    import fake_chain
+    from utils import db, stage_timing
+    from utils.chain_config import get_registry
+    from utils.transfer_pool import TransferPool
+    from utils.transfers import TransferWorker, submit_transfer, JOB_POLL_INTERVAL
+
+    with open(os.environ['CHAIN_CONFIG_FILE'], 'w') as f:
+        json.dump(fake_chain.chain_config(os.environ['CIRCLE_IRIS_URL']), f)
+    server, chain = fake_chain.serve(
+        args.port, block_time=args.block_time, attestation_delay=args.attestation_delay,
+        revert_rate=args.revert_rate, iris_error_rate=args.iris_error_rate,
+        rpc_latency=args.rpc_latency, iris_latency=args.iris_latency
+    )
+    threading.Thread(target=server.serve_forever, name='fake-chain', daemon=True).start()
+
+    commits = [0]
+    commit_lock = threading.Lock()
+
+    @event.listens_for(db.engine, 'commit')
+    def count_commit(conn):
+        with commit_lock:
+            commits[0] += 1
+
+    user_id, _ = db.upsert_user_and_log_login(email=f'soak-{os.getpid()}@loadtest.invalid', oauth_provider='test')
+    routes = sorted(get_registry().routes)
+    rng = random.Random(7)
+
+    print(f"Injecting {args.transfers} transfers...")
+    started = time.monotonic()
+    for i in range(args.transfers):
+        source, dest = rng.choice(routes)
+        payment_id = f'soak-{os.getpid()}-{i:06d}'
+        amount = round(rng.uniform(1, 500), 2)
+        db.create_payment(payment_id, amount, source, dest, '0x' + '1' * 40, '0x' + '2' * 40, user_id=user_id)
+        burn = chain.add_burn(source, dest, amount)
+        submit_transfer(payment_id, burn['tx_hash'], source, dest, user_id)
+    inject_seconds = time.monotonic() - started
+    print(f"  injected in {inject_seconds:.1f}s")
+
+    def status_counts():
+        session = db.SessionLocal()
+        try:
+            return dict(session.query(db.Payment.status, func.count(db.Payment.payment_id))
+                        .filter(db.Payment.user_id == user_id)
+                        .group_by(db.Payment.status).all())
+        finally:
+            session.close()
+
+    sampler = Sampler().start()
+    commits_before = commits[0]
+    pool = TransferPool(workers=args.concurrency, queue_size=args.concurrency, name='soak')
+    worker = TransferWorker(pool=pool, worker_id='soak',
+                            poll_interval=args.poll_interval or JOB_POLL_INTERVAL).start()
+    run_started = time.monotonic()
+    last_report = 0
+    while True:
+        counts = status_counts()
+        done = counts.get('ready_to_mint', 0) + counts.get('completed', 0)
+        failed = counts.get('failed', 0)
+        elapsed = time.monotonic() - run_started
+        if elapsed - last_report >= 5:
+            last_report = elapsed
+            print(f"  {elapsed:6.0f}s  done {done:>6}  failed {failed:>5}  in flight {pool.stats()['active_workers']:>4}"
+                  f"  threads {threading.active_count():>4}  rss {peak_rss_mb():.0f} MB")
+        if done + failed >= args.transfers or elapsed >= args.timeout:
+            break
+        time.sleep(0.5)
+    run_seconds = time.monotonic() - run_started
+    worker.stop()
+    worker.drain(30)
+    sampler.stop()
+    run_commits = commits[0] - commits_before
+
+    session = db.SessionLocal()
+    try:
+        rows = session.query(db.Payment.status, db.Payment.stage_timestamps).filter(
+            db.Payment.user_id == user_id).all()
+    finally:
+        session.close()
+    end_to_end, service, finished_at = [], [], []
+    for status, stamps in rows:
+        stages = stage_timing.load(stamps)
+        ready = stages.get('ready_to_mint')
+        if not ready:
+            continue
+        end_to_end.append((ready - stages['pending']).total_seconds())
+        if stages.get('burning'):
+            service.append((ready - stages['burning']).total_seconds())
+        finished_at.append(ready)
+    end_to_end.sort()
+    service.sort()
+
+    completed = len(end_to_end)
+    # Completion rate over the span in which transfers actually finished
+    span = (max(finished_at) - min(finished_at)).total_seconds() if len(finished_at) > 1 else run_seconds
+    requests = dict(chain.counts)
+    report = {
+        'transfers': args.transfers,
+        'completed': completed,
+        'failed': counts.get('failed', 0),
+        'unfinished': args.transfers - completed - counts.get('failed', 0),
+        'concurrency': args.concurrency,
+        'run_seconds': round(run_seconds, 1),
+        'completions_per_sec': round(completed / span, 2) if span else None,
+        'end_to_end_p50_s': percentile(end_to_end, 0.5),
+        'end_to_end_p99_s': percentile(end_to_end, 0.99),
+        'service_p50_s': percentile(service, 0.5),
+        'service_p99_s': percentile(service, 0.99),
+        'peak_threads': sampler.peak_threads,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'db_commits': run_commits,
+        'db_commits_per_sec': round(run_commits / run_seconds, 1),
+        'db_commits_per_transfer': round(run_commits / max(args.transfers, 1), 1),
+        'rpc_calls_per_transfer': round(sum(v for k, v in requests.items() if k.startswith('rpc'))
+                                        / max(args.transfers, 1), 2),
+        'iris_calls_per_transfer': round(requests.get('iris', 0) / max(args.transfers, 1), 2),
+        'fake_chain_requests': requests,
+        'settings': {k: v for k, v in vars(args).items() if k != 'json'},
+        'dialect': db.engine.dialect.name
+    }
+
+    print()
+    for key in ('transfers', 'completed', 'failed', 'unfinished', 'run_seconds', 'completions_per_sec',
+                'end_to_end_p50_s', 'end_to_end_p99_s', 'service_p50_s', 'service_p99_s',
+                'peak_threads', 'peak_rss_mb', 'db_commits', 'db_commits_per_sec',
+                'db_commits_per_transfer', 'rpc_calls_per_transfer', 'iris_calls_per_transfer'):
+        value = report[key]
+        print(f"{key:<26} {value:.2f}" if isinstance(value, float) else f"{key:<26} {value}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.json}")
+
+    server.shutdown()
+    return 0 if report['unfinished'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Throughput comparison: Flask dev server vs gunicorn (gthread, gevent).
+
+Starts each server configuration in turn, drives it with locustfile.py
+headless, and prints requests/s, latency percentiles and failures side by
+side.
+
+Usage (from the repo root, with locust and gunicorn installed):
+    python load_test/compare_servers.py --users 100 --run-time 60s
+    python load_test/compare_servers.py --modes gthread gevent --workers 4
+
+Every mode uses the same DATABASE_URL and environment as this shell. Use a
+scratch database: the scenarios create payments. Servers run with
+TEST_AUTH_MODE=true against load_test/fake_chain.py, which this script
+starts, so the transfer scenario runs end to end.
+"""
+
+import argparse
+import csv
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+API_DIR = os.path.join(ROOT, 'api')
+LOCUSTFILE = os.path.join(ROOT, 'load_test', 'locustfile.py')
+FAKE_CHAIN = os.path.join(ROOT, 'load_test', 'fake_chain.py')
+
+MODES = ('dev', 'gthread', 'gevent')
+
+
+def server_command(mode, port, workers, threads):
+    if mode == 'dev':
+        # Same background services as the gunicorn modes start in post_worker_init
+        code = (
+            "import os\n"
+            "from server import app\n"
+            "if os.getenv('EMBEDDED_TRANSFER_WORKER', 'true').lower() == 'true':\n"
+            "    from utils.transfers import start_embedded_worker\n"
+            "    from utils.webhooks import start_embedded_dispatcher\n"
+            "    start_embedded_worker()\n"
+            "    start_embedded_dispatcher()\n"
+            f"app.run(port={port}, threaded=True)\n"
+        )
+        return [sys.executable, '-c', code], {}
+    env = {
+        'PORT': str(port),
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_WORKER_CLASS': mode,
+        'GUNICORN_ACCESS_LOG': '/dev/null',
+    }
+    return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], env
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.25)
+    return False
+
+
+def run_locust(host, users, spawn_rate, run_time, csv_prefix, fake_chain_url):
+    subprocess.run([
+        sys.executable, '-m', 'locust', '-f', LOCUSTFILE, '--headless', '--only-summary',
+        '--host', host, '--users', str(users), '--spawn-rate', str(spawn_rate),
+        '--run-time', run_time, '--csv', csv_prefix
+    ], check=True, stdout=subprocess.DEVNULL, env=dict(os.environ, FAKE_CHAIN_URL=fake_chain_url))
+    with open(f'{csv_prefix}_stats.csv') as f:
+        rows = list(csv.DictReader(f))
+    aggregated = next((row for row in rows if row['Name'] == 'Aggregated'), None)
+    if aggregated is None:
+        raise RuntimeError('locust wrote no aggregated stats')
+    # End-to-end transfers (TransferUser), reported next to the HTTP numbers
+    aggregated['transfer'] = next((row for row in rows if row['Type'] == 'TRANSFER'), None)
+    return aggregated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--spawn-rate', type=int, default=20)
+    parser.add_argument('--run-time', default='60s')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--fake-chain-port', type=int, default=8545)
+    args = parser.parse_args()
+
+    host = f'http://127.0.0.1:{args.port}'
+    fake_chain_url = f'http://127.0.0.1:{args.fake_chain_port}'
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        chain_config = os.path.join(tmp, 'fake_chains.json')
+        fake_chain = subprocess.Popen([sys.executable, FAKE_CHAIN, '--port', str(args.fake_chain_port),
+                                       '--write-chain-config', chain_config], stdout=subprocess.DEVNULL)
+        if not wait_until_up(f'{fake_chain_url}/stats'):
+            fake_chain.kill()
+            sys.exit('fake_chain.py did not start')
+        for mode in args.modes:
+            command, extra_env = server_command(mode, args.port, args.workers, args.threads)
+            # Fresh rate-limit counters per run so one mode's traffic doesn't throttle the next
+            env = dict(os.environ, RATE_LIMIT_STORAGE_URI='memory://', TEST_AUTH_MODE='true',
+                       CHAIN_CONFIG_FILE=chain_config, CIRCLE_IRIS_URL=fake_chain_url, **extra_env)
+            server = subprocess.Popen(command, cwd=API_DIR, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                if not wait_until_up(f'{host}/api/health'):
+                    print(f'{mode}: server did not start (is gunicorn/gevent installed?)')
+                    continue
+                print(f'{mode}: running {args.users} users for {args.run_time}...')
+                results.append((mode, run_locust(host, args.users, args.spawn_rate, args.run_time,
+                                                 os.path.join(tmp, mode), fake_chain_url)))
+            finally:
+                server.send_signal(signal.SIGTERM)
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        fake_chain.terminate()
+
+    print(f"\n{'mode':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'requests':>9} {'failures':>9}"
+          f" {'transfers':>9} {'e2e p50 s':>9} {'e2e p95 s':>9}")
+    for mode, row in results:
+        transfer = row['transfer'] or {'Request Count': 0, '50%': 0, '95%': 0}
+        print(f"{mode:<10} {float(row['Requests/s']):>8.1f} {row['50%']:>8} {row['95%']:>8} "
+              f"{row['99%']:>8} {row['Request Count']:>9} {row['Failure Count']:>9} "
+              f"{transfer['Request Count']:>9} {float(transfer['50%']) / 1000:>9.1f} {float(transfer['95%']) / 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Local stand-in for the chains' JSON-RPC endpoints and Circle's Iris API.
+
+Lets the full transfer pipeline (block-head tracker, attestation polling,
+job worker) run under load without testnet funds or rate-limited public
+RPCs. One HTTP server answers:
+
+    POST /rpc/<chain>                 eth_blockNumber, eth_getTransactionReceipt,
+                                      eth_getLogs, eth_chainId
+    GET  /v1/attestations/<hash>      Iris: pending, then complete after
+                                      --attestation-delay seconds
+    POST /burns                       {"source_chain", "dest_chain", "amount"} ->
+                                      {"tx_hash"}: a depositForBurn mined
+                                      --confirmations blocks from now
+    GET  /stats                       request counts per RPC method / Iris
+
+Blocks advance every --block-time seconds. --rpc-latency and --iris-latency
+add a delay (+/-50% jitter) to every answer. Point the gateway at it with the
+chain config this script writes and CIRCLE_IRIS_URL:
+
+    python load_test/fake_chain.py --write-chain-config /tmp/fake_chains.json
+    CHAIN_CONFIG_FILE=/tmp/fake_chains.json CIRCLE_IRIS_URL=http://127.0.0.1:8545 \\
+        TEST_AUTH_MODE=true FLASK_ENV=development python api/server.py
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from eth_abi import encode
+from web3 import Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from utils.chain_config import CHAINS  # noqa: E402
+from utils.block_tracker import MESSAGE_SENT_TOPIC  # noqa: E402
+
+ZERO_BLOOM = '0x' + '00' * 256
+SENDER = '0x' + '11' * 20
+
+
+def block_hash(chain, number):
+    return Web3.keccak(text=f'{chain}:{number}').hex()
+
+
+def cctp_message(source_domain, dest_domain, nonce, amount):
+    """CCTP v1 message: version, source/dest domain, nonce, sender, recipient, caller, burn body."""
+    header = (
+        (0).to_bytes(4, 'big') + source_domain.to_bytes(4, 'big') + dest_domain.to_bytes(4, 'big')
+        + nonce.to_bytes(8, 'big') + b'\x00' * 32 * 3
+    )
+    body = (0).to_bytes(4, 'big') + b'\x00' * 32 * 3 + int(amount * 1_000_000).to_bytes(32, 'big')
+    return header + body
+
+
+class FakeChains:
+    """Shared state: a block clock and the burns submitted to each chain."""
+
+    def __init__(self, chains, block_time=1.0, confirmations=2, attestation_delay=10.0,
+                 revert_rate=0.0, iris_error_rate=0.0, rpc_latency=0.0, iris_latency=0.0):
+        self.chains = chains
+        self.block_time = block_time
+        self.confirmations = confirmations
+        self.attestation_delay = attestation_delay
+        self.revert_rate = revert_rate
+        self.iris_error_rate = iris_error_rate
+        self.rpc_latency = rpc_latency
+        self.iris_latency = iris_latency
+        self.started = time.time()
+        self.burns = {}  # tx_hash -> burn
+        self.by_message = {}  # message_hash -> burn
+        self.counts = Counter()
+        self._nonce = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _delay(seconds):
+        if seconds > 0:
+            time.sleep(seconds * random.uniform(0.5, 1.5))
+
+    def head(self):
+        return int((time.time() - self.started) / self.block_time) + 1
+
+    def mined_at(self, block):
+        return self.started + (block - 1) * self.block_time
+
+    def add_burn(self, source_chain, dest_chain, amount):
+        source, dest = self.chains[source_chain], self.chains[dest_chain]
+        with self._lock:
+            self._nonce += 1
+            nonce = self._nonce
+        message = cctp_message(source['domain'], dest['domain'], nonce, amount)
+        burn = {
+            'tx_hash': '0x' + uuid.uuid4().hex + uuid.uuid4().hex,
+            'chain': source_chain,
+            'block': self.head() + self.confirmations,
+            'message': message,
+            'message_hash': Web3.keccak(message).hex(),
+            'success': random.random() >= self.revert_rate
+        }
+        with self._lock:
+            self.burns[burn['tx_hash']] = burn
+            self.by_message[burn['message_hash']] = burn
+        return burn
+
+    def _log(self, burn):
+        return {
+            'address': self.chains[burn['chain']]['message_transmitter'],
+            'topics': [MESSAGE_SENT_TOPIC],
+            'data': '0x' + encode(['bytes'], [burn['message']]).hex(),
+            'blockNumber': hex(burn['block']),
+            'blockHash': block_hash(burn['chain'], burn['block']),
+            'transactionHash': burn['tx_hash'],
+            'transactionIndex': '0x0',
+            'logIndex': '0x0',
+            'removed': False
+        }
+
+    def rpc(self, chain, method, params):
+        with self._lock:
+            self.counts[f'rpc {method}'] += 1
+        self._delay(self.rpc_latency)
+        if method == 'eth_blockNumber':
+            return hex(self.head())
+        if method == 'eth_chainId':
+            return hex(self.chains[chain]['chain_id'])
+        if method == 'eth_getTransactionReceipt':
+            burn = self.burns.get(params[0].lower())
+            if not burn or burn['chain'] != chain or burn['block'] > self.head():
+                return None
+            return {
+                'transactionHash': burn['tx_hash'],
+                'transactionIndex': '0x0',
+                'blockHash': block_hash(chain, burn['block']),
+                'blockNumber': hex(burn['block']),
+                'from': SENDER,
+                'to': self.chains[chain]['token_messenger'],
+                'cumulativeGasUsed': '0x30d40',
+                'gasUsed': '0x30d40',
+                'effectiveGasPrice': '0x3b9aca00',
+                'contractAddress': None,
+                'logs': [self._log(burn)] if burn['success'] else [],
+                'logsBloom': ZERO_BLOOM,
+                'status': '0x1' if burn['success'] else '0x0',
+                'type': '0x2'
+            }
+        if method == 'eth_getLogs':
+            query = params[0]
+            from_block, to_block = int(query['fromBlock'], 16), int(query['toBlock'], 16)
+            head = self.head()
+            with self._lock:
+                burns = list(self.burns.values())
+            return [self._log(b) for b in burns
+                    if b['chain'] == chain and b['success'] and from_block <= b['block'] <= min(to_block, head)]
+        raise ValueError(f'Method {method} not supported by fake_chain')
+
+    def attestation(self, message_hash):
+        """(status code, body) for an Iris attestation lookup."""
+        with self._lock:
+            self.counts['iris'] += 1
+        self._delay(self.iris_latency)
+        if random.random() < self.iris_error_rate:
+            return 500, {'error': 'injected failure'}
+        burn = self.by_message.get(message_hash.lower())
+        if not burn or burn['block'] > self.head():
+            return 404, {'error': 'Message hash not found'}
+        if time.time() < self.mined_at(burn['block']) + self.attestation_delay:
+            return 200, {'status': 'pending', 'attestation': None}
+        return 200, {
+            'status': 'complete',
+            'attestation': '0x' + Web3.keccak(burn['message']).hex()[2:] * 2 + '1b',
+            'message': '0x' + burn['message'].hex()
+        }
+
+
+def make_handler(state):
+    class FakeChainHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like real RPC endpoints
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self.path.startswith('/rpc/'):
+                chain = self.path[len('/rpc/'):]
+                if chain not in state.chains:
+                    return self._reply(404, {'error': f'Unknown chain {chain}'})
+                try:
+                    result = state.rpc(chain, body['method'], body.get('params') or [])
+                    return self._reply(200, {'jsonrpc': '2.0', 'id': body.get('id'), 'result': result})
+                except Exception as e:
+                    return self._reply(200, {'jsonrpc': '2.0', 'id': body.get('id'),
+                                             'error': {'code': -32601, 'message': str(e)}})
+            if self.path == '/burns':
+                try:
+                    burn = state.add_burn(body['source_chain'], body['dest_chain'], float(body.get('amount', 1)))
+                except (KeyError, ValueError) as e:
+                    return self._reply(400, {'error': f'Bad burn request: {e}'})
+                return self._reply(201, {'tx_hash': burn['tx_hash'], 'block_number': burn['block'],
+                                         'message_hash': burn['message_hash']})
+            self._reply(404, {'error': 'Not found'})
+
+        def do_GET(self):
+            if self.path.startswith('/v1/attestations/'):
+                return self._reply(*state.attestation(self.path.rsplit('/', 1)[1]))
+            if self.path == '/stats':
+                return self._reply(200, {'head': state.head(), 'burns': len(state.burns),
+                                         'requests': dict(state.counts)})
+            self._reply(404, {'error': 'Not found'})
+
+        def _reply(self, code, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeChainHandler
+
+
+def chain_config(base_url):
+    """The built-in chains with every rpc_url pointed at this server."""
+    return {'chains': {name: dict(config, rpc_url=f'{base_url}/rpc/{name}') for name, config in CHAINS.items()}}
+
+
+def serve(port=8545, **options):
+    """Start the fake chain; returns (server, state). Call serve_forever or run it in a thread."""
+    state = FakeChains(CHAINS, **options)
+    return ThreadingHTTPServer(('127.0.0.1', port), make_handler(state)), state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--block-time', type=float, default=1.0, help='Seconds per block')
+    parser.add_argument('--confirmations', type=int, default=2, help='Blocks until a burn is mined')
+    parser.add_argument('--attestation-delay', type=float, default=10.0,
+                        help='Seconds after mining until Iris reports the attestation complete')
+    parser.add_argument('--revert-rate', type=float, default=0.0, help='Share of burns that revert')
+    parser.add_argument('--iris-error-rate', type=float, default=0.0, help='Share of Iris requests answered 500')
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help='Seconds added to each RPC answer')
+    parser.add_argument('--iris-latency', type=float, default=0.0, help='Seconds added to each Iris answer')
+    parser.add_argument('--write-chain-config', metavar='PATH', help='Write a CHAIN_CONFIG_FILE pointing here')
+    args = parser.parse_args(argv)
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    if args.write_chain_config:
+        with open(args.write_chain_config, 'w') as f:
+            json.dump(chain_config(base_url), f, indent=2)
+        print(f"[FAKE] Wrote chain config to {args.write_chain_config}")
+
+    server, _ = serve(args.port, block_time=args.block_time, confirmations=args.confirmations,
+                      attestation_delay=args.attestation_delay, revert_rate=args.revert_rate,
+                      iris_error_rate=args.iris_error_rate, rpc_latency=args.rpc_latency,
+                      iris_latency=args.iris_latency)
+    print(f"[FAKE] Chains and Iris on {base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
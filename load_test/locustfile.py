@@ -2,116 +2,197 @@
 Load testing configuration for USDC Payment Gateway.
 
 Tests:
-- 100+ transactions per hour
+- 100+ transactions per hour, end to end (create -> burn -> initiate -> ready_to_mint)
 - Concurrent user load
 - API endpoint performance
 - Database query performance
+
+Users sign in through POST /api/test/login, so the server must run with
+TEST_AUTH_MODE=true (never in production). TransferUser also needs
+load_test/fake_chain.py running and the server pointed at it (see README):
+
+    FAKE_CHAIN_URL=http://127.0.0.1:8545 locust -f load_test/locustfile.py --host http://localhost:5001
 """
 
 from locust import HttpUser, task, between
+import os
 import random
-import json
+import time
+import uuid
 
 # Test data
 CHAINS = ['sepolia', 'base_sepolia', 'avalanche_fuji', 'polygon_amoy', 'arbitrum_sepolia']
+FAKE_CHAIN_URL = os.getenv('FAKE_CHAIN_URL', 'http://127.0.0.1:8545')
+TRANSFER_TIMEOUT = float(os.getenv('TRANSFER_TIMEOUT', '180'))  # Seconds to reach ready_to_mint
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', '2'))
 
 
-class PaymentGatewayUser(HttpUser):
-    """Simulates a user interacting with the payment gateway."""
-    
-    wait_time = between(1, 3)  # Wait 1-3 seconds between tasks
-    
+def random_address():
+    return f"0x{''.join(random.choices('0123456789abcdef', k=40))}"
+
+
+def payment_payload(min_amount, max_amount):
+    source_chain = random.choice(CHAINS)
+    dest_chain = random.choice([c for c in CHAINS if c != source_chain])
+    return {
+        "amount": round(random.uniform(min_amount, max_amount), 2),
+        "source_chain": source_chain,
+        "dest_chain": dest_chain,
+        "sender_address": random_address(),
+        "recipient_address": random_address()
+    }
+
+
+class AuthenticatedUser(HttpUser):
+    """Base class: signs in as a fresh synthetic user through the test login."""
+
+    abstract = True
+    # Requests per identity before signing in as a new user. The gateway's
+    # per-user limits (150/hour) would otherwise turn long runs into 429s.
+    requests_per_identity = None
+
     def on_start(self):
-        """Called when a user starts. Simulate login."""
-        # In real scenario, would authenticate here
-        # For load testing, we'll use mock authentication
-        self.user_id = f"test_user_{random.randint(1000, 9999)}"
+        self.login()
+
+    def login(self):
+        self.email = f"loadtest-{uuid.uuid4().hex[:12]}@loadtest.invalid"
+        self.client.cookies.clear()
+        with self.client.post("/api/test/login", json={"email": self.email},
+                              name="/api/test/login", catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"Test login failed ({response.status_code}); is TEST_AUTH_MODE=true set?")
+                return
+            self.user_id = response.json()["user_id"]
         self.payment_ids = []
-    
+        self.requests_made = 0
+
+    def count_request(self):
+        self.requests_made += 1
+        if self.requests_per_identity and self.requests_made >= self.requests_per_identity:
+            self.login()
+
+
+class PaymentGatewayUser(AuthenticatedUser):
+    """Simulates a user interacting with the payment gateway."""
+
+    wait_time = between(1, 3)  # Wait 1-3 seconds between tasks
+    requests_per_identity = 100
+
     @task(3)
     def check_health(self):
         """Check health endpoint - most frequent operation."""
         self.client.get("/api/health")
-    
+
     @task(2)
     def get_recent_payments(self):
         """Get recent payments - common operation."""
-        self.client.get(
-            "/api/recent_payments",
-            headers={"Authorization": f"Bearer mock_token_{self.user_id}"}
-        )
-    
+        self.client.get("/api/recent_payments")
+        self.count_request()
+
     @task(1)
     def create_payment(self):
         """Create a payment - less frequent but important."""
-        source_chain = random.choice(CHAINS)
-        dest_chain = random.choice([c for c in CHAINS if c != source_chain])
-        
-        payload = {
-            "amount": round(random.uniform(1.0, 100.0), 2),
-            "source_chain": source_chain,
-            "dest_chain": dest_chain,
-            "sender_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}",
-            "recipient_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}"
-        }
-        
-        response = self.client.post(
-            "/api/create_payment",
-            json=payload,
-            headers={"Authorization": f"Bearer mock_token_{self.user_id}"}
-        )
-        
+        response = self.client.post("/api/create_payment", json=payment_payload(1.0, 100.0))
+
         if response.status_code == 201:
             data = response.json()
             if 'payment_id' in data:
                 self.payment_ids.append(data['payment_id'])
-    
+        self.count_request()
+
     @task(1)
     def check_payment_status(self):
         """Check status of a payment."""
         if self.payment_ids:
             payment_id = random.choice(self.payment_ids)
-            self.client.get(
-                f"/api/check_status/{payment_id}",
-                headers={"Authorization": f"Bearer mock_token_{self.user_id}"}
-            )
-    
+            self.client.get(f"/api/check_status/{payment_id}", name="/api/check_status/[id]")
+            self.count_request()
+
     @task(1)
     def get_audit_logs(self):
         """Get audit logs."""
-        self.client.get(
-            "/api/audit_logs",
-            headers={"Authorization": f"Bearer mock_token_{self.user_id}"}
+        self.client.get("/api/audit_logs")
+        self.count_request()
+
+
+class TransferUser(AuthenticatedUser):
+    """
+    Full transfer: create a payment, burn on the fake chain, initiate the
+    transfer and poll check_status until the worker reaches ready_to_mint.
+    Reports the end-to-end time as a "TRANSFER" entry in the stats.
+    """
+
+    wait_time = between(5, 15)
+
+    @task
+    def transfer(self):
+        # Fresh identity per transfer keeps each one under the per-user rate limits
+        self.login()
+        started = time.monotonic()
+        payload = payment_payload(1.0, 500.0)
+
+        response = self.client.post("/api/create_payment", json=payload)
+        if response.status_code != 201:
+            return self._report(started, f"create_payment returned {response.status_code}")
+        payment_id = response.json()['payment_id']
+
+        burn = self.client.post(f"{FAKE_CHAIN_URL}/burns", name="fake_chain /burns", json={
+            "source_chain": payload["source_chain"],
+            "dest_chain": payload["dest_chain"],
+            "amount": payload["amount"]
+        })
+        if burn.status_code != 201:
+            return self._report(started, f"fake chain burn returned {burn.status_code}")
+
+        response = self.client.post("/api/initiate_transfer", json={
+            "payment_id": payment_id,
+            "burn_tx_hash": burn.json()["tx_hash"]
+        })
+        if response.status_code != 202:
+            return self._report(started, f"initiate_transfer returned {response.status_code}")
+
+        etag = None
+        while time.monotonic() - started < TRANSFER_TIMEOUT:
+            time.sleep(POLL_INTERVAL)
+            headers = {"If-None-Match": etag} if etag else {}
+            response = self.client.get(f"/api/check_status/{payment_id}", headers=headers,
+                                       name="/api/check_status/[id]")
+            if response.status_code == 304:
+                continue
+            if response.status_code != 200:
+                return self._report(started, f"check_status returned {response.status_code}")
+            etag = response.headers.get("ETag")
+            status = response.json().get("status")
+            if status in ("ready_to_mint", "completed"):
+                return self._report(started)
+            if status == "failed":
+                return self._report(started, "payment failed")
+        self._report(started, f"not ready_to_mint within {TRANSFER_TIMEOUT:.0f}s")
+
+    def _report(self, started, error=None):
+        self.environment.events.request.fire(
+            request_type="TRANSFER",
+            name="create -> ready_to_mint",
+            response_time=(time.monotonic() - started) * 1000,
+            response_length=0,
+            exception=RuntimeError(error) if error else None,
+            context={}
         )
 
 
-class HighLoadUser(HttpUser):
+class HighLoadUser(AuthenticatedUser):
     """Simulates high-load scenario - 100+ transactions/hour."""
-    
+
     wait_time = between(0.1, 0.5)  # Very fast requests
-    
+    requests_per_identity = 25  # Stays under create_payment's 30/minute per user
+
     @task(10)
     def rapid_health_checks(self):
         """Rapid health checks for monitoring."""
         self.client.get("/api/health")
-    
+
     @task(5)
     def rapid_payment_creation(self):
         """Rapid payment creation for load testing."""
-        source_chain = random.choice(CHAINS)
-        dest_chain = random.choice([c for c in CHAINS if c != source_chain])
-        
-        payload = {
-            "amount": round(random.uniform(0.1, 10.0), 2),
-            "source_chain": source_chain,
-            "dest_chain": dest_chain,
-            "sender_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}",
-            "recipient_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}"
-        }
-        
-        self.client.post(
-            "/api/create_payment",
-            json=payload,
-            headers={"Authorization": "Bearer mock_token"}
-        )
-
+        self.client.post("/api/create_payment", json=payment_payload(0.1, 10.0))
+        self.count_request()
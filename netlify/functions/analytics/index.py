@@ -0,0 +1,74 @@
+"""
+Netlify serverless function for pipeline analytics.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add parent directory to path to import utils
+# From netlify/functions/analytics/index.py, go up 3 levels to reach api/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
+
+from flask import Blueprint, request, jsonify
+from utils.auth import admin_required
+from utils.db import get_stage_timing_stats, get_payment_volume
+from utils.analytics import parse_volume_query
+from utils.stage_timing import STAGE_STATS_DEFAULT_HOURS, STAGE_STATS_MAX_HOURS
+from app_factory import create_app
+import serverless_wsgi
+
+routes = Blueprint('analytics', __name__)
+
+
+@routes.route('/.netlify/functions/analytics/stages', methods=['GET'])
+@routes.route('/api/analytics/stages', methods=['GET'])
+@admin_required
+def stage_timing_stats():
+    """Time-in-stage stats per (source_chain, dest_chain) over the last `hours`."""
+    hours = request.args.get('hours', STAGE_STATS_DEFAULT_HOURS, type=int)
+    if not hours or hours < 1 or hours > STAGE_STATS_MAX_HOURS:
+        return jsonify({'error': f'hours must be between 1 and {STAGE_STATS_MAX_HOURS}'}), 400
+    
+    since = datetime.utcnow() - timedelta(hours=hours)
+    stats = get_stage_timing_stats(
+        since,
+        source_chain=request.args.get('source_chain'),
+        dest_chain=request.args.get('dest_chain')
+    )
+    return jsonify({'stages': stats, 'since': since.isoformat(), 'hours': hours}), 200
+
+
+@routes.route('/.netlify/functions/analytics/volume', methods=['GET'])
+@routes.route('/api/analytics/volume', methods=['GET'])
+@admin_required
+def payment_volume():
+    """Payment count and USD volume from the hourly rollups (admins only)."""
+    try:
+        start, end, group_by = parse_volume_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows = get_payment_volume(start, end, group_by)
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'group_by': group_by,
+        'rows': rows,
+        'totals': {
+            'payment_count': sum(r['payment_count'] for r in rows),
+            'volume_usd': round(sum(r['volume_usd'] for r in rows), 2)
+        }
+    }), 200
+
+
+app = create_app(routes=[routes], sessions=True, import_name=__name__)
+
+
+# Netlify serverless function handler
+def handler(event, context):
+    return serverless_wsgi.handle_request(app, event, context)
@@ -13,73 +13,32 @@ load_dotenv()
 # From netlify/functions/auth_callback/index.py, go up 3 levels to reach api/
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
 
-from flask import Flask, request, redirect, session, jsonify
-from flask_cors import CORS
-from flask_session import Session
-from utils.auth import init_auth
-from utils.db import get_user_by_email, create_user, log_audit
+from flask import Blueprint, request, redirect, session, jsonify
+from utils.db import upsert_user_and_log_login
+from app_factory import create_app, FRONTEND_URL, IS_PRODUCTION
+from utils.auth import get_google, login_userinfo
 import serverless_wsgi
 
-app = Flask(__name__)
+routes = Blueprint('auth_callback', __name__)
 
-# SECURITY: Require SECRET_KEY
-FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY')
-if not FLASK_SECRET_KEY:
-    raise ValueError("FLASK_SECRET_KEY environment variable is required")
-app.config['SECRET_KEY'] = FLASK_SECRET_KEY
 
-# Session configuration for serverless
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = True
-app.config['SESSION_COOKIE_NAME'] = 'usdc_gateway_session'
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = os.getenv('ENV') == 'production'
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_PATH'] = '/'
-app.config['SESSION_COOKIE_DOMAIN'] = None
-
-# Initialize session
-Session(app)
-
-# CORS configuration for production
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-IS_PRODUCTION = os.getenv('ENV') == 'production' or os.getenv('NETLIFY') == 'true'
-allowed_origins = [FRONTEND_URL]
-if not IS_PRODUCTION:
-    allowed_origins.extend(['http://localhost:5173', 'http://127.0.0.1:5173'])
-
-CORS(app, 
-     supports_credentials=True,
-     origins=allowed_origins,
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
-
-# Initialize auth (must be after Session and CORS)
-init_auth(app)
-# Import google after init_auth
-from utils.auth import google
-
-
-@app.route('/', methods=['GET'])
-@app.route('/.netlify/functions/auth_callback', methods=['GET'])
-@app.route('/api/auth/callback', methods=['GET'])
+@routes.route('/', methods=['GET'])
+@routes.route('/.netlify/functions/auth_callback', methods=['GET'])
+@routes.route('/api/auth/callback', methods=['GET'])
 def auth_callback():
     """Handle OAuth callback."""
     try:
+        # Metadata and signing keys come from the OIDC cache (memory, then /tmp)
+        google = get_google()
+        
         # Get the token - this validates the state automatically
         token = google.authorize_access_token()
         
         if not token:
             return jsonify({'error': 'Failed to get access token from Google'}), 400
         
-        # Get user info from Google - use full URL
-        userinfo_url = 'https://www.googleapis.com/oauth2/v2/userinfo'
-        resp = google.get(userinfo_url, token=token)
-        
-        if resp.status_code != 200:
-            return jsonify({'error': f'Failed to get user info: {resp.status_code}'}), 400
-        
-        user_info = resp.json()
+        # Claims from the id_token, validated locally against the cached JWKS
+        user_info = login_userinfo(google, token)
         
         if not user_info or not user_info.get('email'):
             return jsonify({'error': 'Email not provided by Google'}), 400
@@ -89,18 +48,16 @@ def auth_callback():
         picture = user_info.get('picture')
         sub = user_info.get('sub')
         
-        # Get or create user
-        user = get_user_by_email(email)
-        if not user:
-            user_id = create_user(
-                email=email,
-                name=name,
-                picture=picture,
-                oauth_provider='google',
-                oauth_id=sub
-            )
-        else:
-            user_id = user['user_id']
+        # Create or refresh the user and audit the login in one transaction
+        user_id, _ = upsert_user_and_log_login(
+            email=email,
+            name=name,
+            picture=picture,
+            oauth_provider='google',
+            oauth_id=sub,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
         
         # Set session data - CRITICAL: Must set before redirect
         session['user_id'] = user_id
@@ -110,16 +67,6 @@ def auth_callback():
         session.permanent = True
         session.modified = True
         
-        # Log login
-        log_audit(
-            user_id=user_id,
-            action='login',
-            resource_type='user',
-            resource_id=user_id,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
-        
         # Get redirect URI from session (set during login)
         redirect_uri = session.pop('oauth_redirect_uri', FRONTEND_URL)
         if redirect_uri.startswith('/'):
@@ -151,6 +98,9 @@ def auth_callback():
         }), 500
 
 
+app = create_app(routes=[routes], oauth=True, import_name=__name__)
+
+
 # Netlify serverless function handler
 def handler(event, context):
     return serverless_wsgi.handle_request(app, event, context)
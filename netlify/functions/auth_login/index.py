@@ -13,55 +13,17 @@ load_dotenv()
 # From netlify/functions/auth_login/index.py, go up 3 levels to reach api/
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
 
-from flask import Flask, request, redirect, session
-from flask_cors import CORS
-from flask_session import Session
-from utils.auth import init_auth
+from flask import Blueprint, request, redirect, session
+from app_factory import create_app, FRONTEND_URL, IS_PRODUCTION
+from utils.auth import get_google
 import serverless_wsgi
 
-app = Flask(__name__)
+routes = Blueprint('auth_login', __name__)
 
-# SECURITY: Require SECRET_KEY
-FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY')
-if not FLASK_SECRET_KEY:
-    raise ValueError("FLASK_SECRET_KEY environment variable is required")
-app.config['SECRET_KEY'] = FLASK_SECRET_KEY
 
-# Session configuration for serverless
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = True
-app.config['SESSION_COOKIE_NAME'] = 'usdc_gateway_session'
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = os.getenv('ENV') == 'production'
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_PATH'] = '/'
-app.config['SESSION_COOKIE_DOMAIN'] = None
-
-# Initialize session
-Session(app)
-
-# CORS configuration for production
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-IS_PRODUCTION = os.getenv('ENV') == 'production' or os.getenv('NETLIFY') == 'true'
-allowed_origins = [FRONTEND_URL]
-if not IS_PRODUCTION:
-    allowed_origins.extend(['http://localhost:5173', 'http://127.0.0.1:5173'])
-
-CORS(app, 
-     supports_credentials=True,
-     origins=allowed_origins,
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
-
-# Initialize auth (must be after Session and CORS)
-init_auth(app)
-# Import google after init_auth
-from utils.auth import google
-
-
-@app.route('/', methods=['GET'])
-@app.route('/.netlify/functions/auth_login', methods=['GET'])
-@app.route('/api/auth/login', methods=['GET'])
+@routes.route('/', methods=['GET'])
+@routes.route('/.netlify/functions/auth_login', methods=['GET'])
+@routes.route('/api/auth/login', methods=['GET'])
 def login():
     """Initiate Google OAuth login."""
     # Store frontend URL in session for after OAuth callback
@@ -87,7 +49,10 @@ def login():
         base_url = request.url_root.rstrip('/')
     
     callback_url = base_url + '/api/auth/callback'
-    return google.authorize_redirect(callback_url)
+    return get_google().authorize_redirect(callback_url)
+
+
+app = create_app(routes=[routes], oauth=True, import_name=__name__)
 
 
 # Netlify serverless function handler
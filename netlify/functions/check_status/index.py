@@ -4,37 +4,68 @@ Netlify serverless function for checking payment status.
 
 import sys
 import os
+from datetime import datetime
 
 # Add parent directory to path to import utils
 # From netlify/functions/check_status/index.py, go up 3 levels to reach api/
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import os
-from utils.db import get_payment, get_recent_payments
+from flask import Blueprint, request, jsonify
+from utils.db import get_payment, get_recent_payments, get_payments_by_ids
+from utils.etags import (
+    payment_etags, payment_etag, etag_matches, not_modified, json_with_etag, parse_batch_status_request
+)
+from utils.auth import login_required, get_current_user
+from app_factory import create_app
 import serverless_wsgi
 
-app = Flask(__name__)
-
-# CORS configuration for production
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-CORS(app, 
-     supports_credentials=True,
-     origins=[FRONTEND_URL, 'http://localhost:5173', 'http://127.0.0.1:5173'],
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
+routes = Blueprint('check_status', __name__)
 
 
-@app.route('/.netlify/functions/check_status/<payment_id>', methods=['GET'])
-@app.route('/api/check_status/<payment_id>', methods=['GET'])
+@routes.route('/.netlify/functions/check_status/<payment_id>', methods=['GET'])
+@routes.route('/api/check_status/<payment_id>', methods=['GET'])
 def check_status(payment_id):
+    if_none_match = request.headers.get('If-None-Match')
+    
+    # Warm instances answer unchanged polls from the version cache
+    cached = payment_etags.get(payment_id)
+    if cached and etag_matches(if_none_match, cached[1]):
+        return not_modified(cached[1])
+    
     payment = get_payment(payment_id)
     
     if not payment:
         return jsonify({'error': 'Payment not found'}), 404
     
-    return jsonify(payment), 200
+    etag = payment_etag(payment)
+    payment_etags.set(payment_id, (payment['user_id'], etag))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    return json_with_etag(payment, etag)
+
+
+@routes.route('/.netlify/functions/check_status', methods=['POST'])
+@routes.route('/api/check_status', methods=['POST'])
+@login_required
+def check_status_batch():
+    """Returns statuses for the caller's payments in one query."""
+    user = get_current_user()
+    try:
+        payment_ids, since = parse_batch_status_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    as_of = datetime.utcnow().isoformat()
+    payments = get_payments_by_ids(payment_ids, user_id=user['user_id'], since=since)
+    
+    return jsonify({
+        'payments': {p['payment_id']: p for p in payments},
+        'as_of': as_of
+    }), 200
+
+
+app = create_app(routes=[routes], sessions=True, import_name=__name__)
 
 
 # Netlify serverless function handler
@@ -9,27 +9,19 @@ import os
 # From netlify/functions/create_payment/index.py, go up 3 levels to reach api/
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Blueprint, request, jsonify
 import uuid
 import os
 from utils.db import create_payment
-from utils.chain_config import get_all_chains
+from utils.chain_config import get_registry
+from app_factory import create_app
 import serverless_wsgi
 
-app = Flask(__name__)
+routes = Blueprint('create_payment', __name__)
 
-# CORS configuration for production
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-CORS(app, 
-     supports_credentials=True,
-     origins=[FRONTEND_URL, 'http://localhost:5173', 'http://127.0.0.1:5173'],
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
 
-
-@app.route('/.netlify/functions/create_payment', methods=['POST'])
-@app.route('/api/create_payment', methods=['POST'])
+@routes.route('/.netlify/functions/create_payment', methods=['POST'])
+@routes.route('/api/create_payment', methods=['POST'])
 def create_payment_handler():
     data = request.json
     
@@ -38,12 +30,11 @@ def create_payment_handler():
     if not all(field in data for field in required):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    # Validate chains
-    if data['source_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid source chain'}), 400
-    
-    if data['dest_chain'] not in get_all_chains():
-        return jsonify({'error': 'Invalid destination chain'}), 400
+    # Validate chains and route
+    try:
+        get_registry().check_route(data['source_chain'], data['dest_chain'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Generate unique payment ID
     payment_id = str(uuid.uuid4())
@@ -65,6 +56,9 @@ def create_payment_handler():
     }), 201
 
 
+app = create_app(routes=[routes], import_name=__name__)
+
+
 # Netlify serverless function handler
 def handler(event, context):
     return serverless_wsgi.handle_request(app, event, context)
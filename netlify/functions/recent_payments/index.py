@@ -9,31 +9,34 @@ import os
 # From netlify/functions/recent_payments/index.py, go up 3 levels to reach api/
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import os
-from utils.db import get_recent_payments
+from flask import Blueprint, request
+from utils.db import get_recent_payments, get_payments_version
+from utils.etags import user_versions, payments_list_etag, etag_matches, not_modified, json_with_etag
+from app_factory import create_app
 import serverless_wsgi
 
-app = Flask(__name__)
-
-# CORS configuration for production
-FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-CORS(app, 
-     supports_credentials=True,
-     origins=[FRONTEND_URL, 'http://localhost:5173', 'http://127.0.0.1:5173'],
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Content-Type'])
+routes = Blueprint('recent_payments', __name__)
 
 
-@app.route('/.netlify/functions/recent_payments', methods=['GET'])
-@app.route('/api/recent_payments', methods=['GET'])
+@routes.route('/.netlify/functions/recent_payments', methods=['GET'])
+@routes.route('/api/recent_payments', methods=['GET'])
 def recent_payments():
-    """Get recent payment history."""
+    """Get recent payment history. Supports If-None-Match (304)."""
     limit = request.args.get('limit', 50, type=int)
-    payments = get_recent_payments(limit)
     
-    return jsonify({'payments': payments}), 200
+    version = user_versions.get(None)
+    if version is None:
+        version = get_payments_version()
+        user_versions.set(None, version)
+    etag = payments_list_etag(None, version, limit)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return not_modified(etag)
+    
+    payments = get_recent_payments(limit)
+    return json_with_etag({'payments': payments}, etag)
+
+
+app = create_app(routes=[routes], import_name=__name__)
 
 
 # Netlify serverless function handler
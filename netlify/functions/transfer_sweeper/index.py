@@ -0,0 +1,36 @@
+"""
+Netlify scheduled function that advances in-flight transfers.
+
+Serverless invocations freeze as soon as a response is returned, so nothing
+can wait on attestations in the background. This function runs on a cron
+(see netlify.toml), picks up queued transfer jobs and moves a bounded batch
+of in-flight payments forward one step each within the invocation budget,
+then spends what is left of WEBHOOK_SWEEP_BUDGET delivering webhooks.
+"""
+
+import sys
+import os
+import json
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add parent directory to path to import utils
+# From netlify/functions/transfer_sweeper/index.py, go up 3 levels to reach api/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
+
+from utils.transfers import sweep_payments
+from utils.webhooks import dispatch_webhooks
+
+
+# Netlify serverless function handler
+def handler(event, context):
+    summary = sweep_payments()
+    summary['webhooks_sent'] = dispatch_webhooks()
+    print(f"[SWEEP] {summary}")
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(summary)
+    }
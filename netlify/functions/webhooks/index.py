@@ -0,0 +1,98 @@
+"""
+Netlify serverless function for webhook endpoint management.
+Deliveries are sent by the transfer_sweeper function.
+"""
+
+import sys
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add parent directory to path to import utils
+# From netlify/functions/webhooks/index.py, go up 3 levels to reach api/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../api'))
+
+from flask import Blueprint, request, jsonify
+from utils.auth import login_required, get_current_user
+from utils.db import (
+    create_webhook_endpoint, get_webhook_endpoints, delete_webhook_endpoint,
+    get_webhook_deliveries, retry_webhook_delivery
+)
+from utils.webhooks import parse_endpoint_request, generate_secret, WEBHOOK_MAX_ENDPOINTS
+from app_factory import create_app
+import serverless_wsgi
+
+routes = Blueprint('webhooks', __name__)
+
+
+@routes.route('/.netlify/functions/webhooks', methods=['POST'])
+@routes.route('/api/webhooks', methods=['POST'])
+@login_required
+def create_webhook():
+    """Register a webhook endpoint. The signing secret is only returned here."""
+    user = get_current_user()
+    try:
+        url, events = parse_endpoint_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(get_webhook_endpoints(user['user_id'])) >= WEBHOOK_MAX_ENDPOINTS:
+        return jsonify({'error': f'At most {WEBHOOK_MAX_ENDPOINTS} webhook endpoints per account'}), 409
+    
+    endpoint = create_webhook_endpoint(user['user_id'], url, generate_secret(), events)
+    return jsonify(endpoint), 201
+
+
+@routes.route('/.netlify/functions/webhooks', methods=['GET'])
+@routes.route('/api/webhooks', methods=['GET'])
+@login_required
+def list_webhooks():
+    """The current user's webhook endpoints (without secrets)."""
+    user = get_current_user()
+    return jsonify({'webhooks': get_webhook_endpoints(user['user_id'])}), 200
+
+
+@routes.route('/.netlify/functions/webhooks/<endpoint_id>', methods=['DELETE'])
+@routes.route('/api/webhooks/<endpoint_id>', methods=['DELETE'])
+@login_required
+def delete_webhook(endpoint_id):
+    """Remove an endpoint and its queued deliveries."""
+    user = get_current_user()
+    if not delete_webhook_endpoint(endpoint_id, user['user_id']):
+        return jsonify({'error': 'Webhook not found'}), 404
+    return jsonify({'deleted': endpoint_id}), 200
+
+
+@routes.route('/.netlify/functions/webhooks/<endpoint_id>/deliveries', methods=['GET'])
+@routes.route('/api/webhooks/<endpoint_id>/deliveries', methods=['GET'])
+@login_required
+def list_webhook_deliveries(endpoint_id):
+    """Recent deliveries for an endpoint, optionally filtered by status (e.g. ?status=dead)."""
+    user = get_current_user()
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    deliveries = get_webhook_deliveries(endpoint_id, user['user_id'],
+                                        status=request.args.get('status'), limit=limit)
+    if deliveries is None:
+        return jsonify({'error': 'Webhook not found'}), 404
+    return jsonify({'deliveries': deliveries}), 200
+
+
+@routes.route('/.netlify/functions/webhooks/<endpoint_id>/deliveries/<int:delivery_id>/retry', methods=['POST'])
+@routes.route('/api/webhooks/<endpoint_id>/deliveries/<int:delivery_id>/retry', methods=['POST'])
+@login_required
+def retry_webhook(endpoint_id, delivery_id):
+    """Requeue a dead-lettered delivery."""
+    user = get_current_user()
+    if not retry_webhook_delivery(delivery_id, endpoint_id, user['user_id']):
+        return jsonify({'error': 'No dead delivery with that id for this webhook'}), 404
+    return jsonify({'delivery_id': delivery_id, 'status': 'pending'}), 202
+
+
+app = create_app(routes=[routes], sessions=True, import_name=__name__)
+
+
+# Netlify serverless function handler
+def handler(event, context):
+    return serverless_wsgi.handle_request(app, event, context)
@@ -1,27 +1,37 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { checkPaymentStatus } from '../utils/api';
+import { checkPaymentStatus, subscribePaymentEvents } from '../utils/api';
 import { CHAINS } from './ChainSelector';
 
 function TransactionTracker({ payments }) {
   const [selectedPayment, setSelectedPayment] = useState(null);
   const [refreshing, setRefreshing] = useState(false);
 
-  // Poll selected payment for updates
+  const selectedId = selectedPayment?.payment_id;
+
+  // Stream status updates for the selected payment, falling back to polling
   useEffect(() => {
-    if (!selectedPayment) return;
+    if (!selectedId) return;
+
+    let interval = null;
+    const startPolling = () => {
+      interval = setInterval(async () => {
+        try {
+          const updated = await checkPaymentStatus(selectedId);
+          setSelectedPayment(updated);
+        } catch (error) {
+          console.error('Failed to refresh payment:', error);
+        }
+      }, 5000); // Poll every 5 seconds
+    };
 
-    const interval = setInterval(async () => {
-      try {
-        const updated = await checkPaymentStatus(selectedPayment.payment_id);
-        setSelectedPayment(updated);
-      } catch (error) {
-        console.error('Failed to refresh payment:', error);
-      }
-    }, 5000); // Poll every 5 seconds
+    const unsubscribe = subscribePaymentEvents(selectedId, setSelectedPayment, startPolling);
 
-    return () => clearInterval(interval);
-  }, [selectedPayment]);
+    return () => {
+      unsubscribe();
+      if (interval) clearInterval(interval);
+    };
+  }, [selectedId]);
 
   const getStatusColor = (status) => {
     switch (status) {
@@ -66,6 +66,52 @@ export async function checkPaymentStatus(paymentId) {
   return fetchAPI(`/api/check_status/${paymentId}`);
 }
 
+/**
+ * Fetch statuses for many payments in one request.
+ * Resolves to { payments: { [paymentId]: payment }, as_of }; pass as_of back
+ * as `since` to receive only payments that changed in between.
+ */
+export async function checkPaymentStatuses(paymentIds, since = null) {
+  return fetchAPI('/api/check_status', {
+    method: 'POST',
+    body: JSON.stringify({ payment_ids: paymentIds, since }),
+  });
+}
+
+/**
+ * Subscribe to status transitions for a payment via Server-Sent Events.
+ * Calls onUpdate with each payment snapshot and onError if the stream is
+ * unavailable (e.g. on Netlify) so the caller can fall back to polling.
+ * Returns a function that closes the stream.
+ */
+export function subscribePaymentEvents(paymentId, onUpdate, onError) {
+  if (typeof EventSource === 'undefined') {
+    onError(new Error('EventSource not supported'));
+    return () => {};
+  }
+
+  const source = new EventSource(getApiUrl(`/api/payments/${paymentId}/events`), {
+    withCredentials: true,
+  });
+  let received = false;
+
+  source.addEventListener('status', (event) => {
+    received = true;
+    onUpdate(JSON.parse(event.data));
+  });
+  // Terminal state reached - stop EventSource from reconnecting
+  source.addEventListener('end', () => source.close());
+  source.onerror = () => {
+    // Errors after data arrived are reconnects, which EventSource handles itself
+    if (!received) {
+      source.close();
+      onError(new Error('Event stream unavailable'));
+    }
+  };
+
+  return () => source.close();
+}
+
 export async function fetchRecentPayments(limit = 50) {
   const data = await fetchAPI(`/api/recent_payments?limit=${limit}`, {
     credentials: 'include', // Include cookies for session